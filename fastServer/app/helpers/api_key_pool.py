@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Longest a caller waits for a rate-limited key to reset before giving up
+GROQ_KEY_MAX_WAIT = float(os.getenv('GROQ_KEY_MAX_WAIT', '60'))
+
 class APIKeyPool:
     def __init__(self):
         keys = [
@@ -17,6 +20,7 @@ class APIKeyPool:
         self.key_status = {key: {"available": True, "reset_time": 0, "last_used": 0} for key in self.keys}  # Added last_used
         self.lock = threading.Lock()
         self.min_interval = 15.0  # 1 second between requests per key
+        self._cursor = 0
     
     def get_key_with_retry(self):
         with self.lock:
@@ -35,6 +39,50 @@ class APIKeyPool:
                     return key
             return None
     
+    def get_available_key(self):
+        """Next key that is not rate limited, round robin, without the per-key spacing"""
+        with self.lock:
+            current_time = time.time()
+            for _ in range(len(self.keys)):
+                key = self.keys[self._cursor % len(self.keys)]
+                self._cursor += 1
+                status = self.key_status[key]
+                if status["available"] or current_time >= status["reset_time"]:
+                    status["available"] = True
+                    status["last_used"] = current_time
+                    return key
+            return None
+
+    def seconds_until_available(self):
+        """0 when a key is usable now, else the time until the earliest reset_time (None without keys)"""
+        with self.lock:
+            if not self.keys:
+                return None
+            current_time = time.time()
+            return max(min(
+                0 if status["available"] else status["reset_time"] - current_time
+                for status in self.key_status.values()
+            ), 0)
+
+    def wait_for_key(self, max_wait=GROQ_KEY_MAX_WAIT):
+        """get_available_key, sleeping until the earliest reset when every key is rate limited.
+
+        Raises instead of returning None: when no key is configured, or when no
+        key resets within max_wait seconds.
+        """
+        deadline = time.time() + max_wait
+        while True:
+            key = self.get_available_key()
+            if key is not None:
+                return key
+            wait = self.seconds_until_available()
+            if wait is None:
+                raise Exception("No Groq API key configured (set GROQ_API_KEY, GROQ_API_KEY_2..4)")
+            if time.time() + wait > deadline:
+                raise Exception(f"All {len(self.keys)} Groq keys are rate limited for another {wait:.0f}s")
+            print(f"All Groq keys rate limited, waiting {wait:.1f}s for the next reset")
+            time.sleep(max(wait, 0.1))
+
     def mark_rate_limited(self, key, retry_after=60):
         with self.lock:
             self.key_status[key]["available"] = False
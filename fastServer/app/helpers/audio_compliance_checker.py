@@ -3,7 +3,8 @@ import json
 from typing import Dict, Any
 import requests
 from app.helpers.api_key_pool import groq_pool
-import time
+from app.helpers.rule_engine import rule_engine
+import threading
 
 class AudioComplianceChecker:
     def __init__(self, policy_checker, groq_api_key=None):
@@ -14,20 +15,25 @@ class AudioComplianceChecker:
         if not self.groq_api_key:
             raise Exception("GROQ_API_KEY not found. Set GROQ_API_KEY environment variable or pass groq_api_key parameter.")
         
+        self._clients = {}
+        self._clients_lock = threading.Lock()
         try:
-            import groq as groq_sdk
-            self.client = groq_sdk.Groq(api_key=self.groq_api_key)
+            self._client(self.groq_api_key)
             print("AudioComplianceChecker initialized with Groq Whisper API")
         except ImportError:
             raise Exception("groq package not installed. Run: pip install groq")
     
-    def _get_fresh_groq_key(self):
-        key = groq_pool.get_key_with_retry()
-        if key:
-            self.groq_api_key = key
-            import groq as groq_sdk
-            self.client = groq_sdk.Groq(api_key=key)
-        return key
+    def _client(self, key):
+        """One Groq client per API key, shared by concurrent transcriptions"""
+        client = self._clients.get(key)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(key)
+                if client is None:
+                    import groq as groq_sdk
+                    client = groq_sdk.Groq(api_key=key)
+                    self._clients[key] = client
+        return client
     
     def validate_audio_file(self, audio_path):
         if not os.path.exists(audio_path):
@@ -40,10 +46,11 @@ class AudioComplianceChecker:
     def transcribe_audio(self, audio_path):
         self.validate_audio_file(audio_path)
         
-        for attempt in range(len(groq_pool.keys)):
+        for attempt in range(max(len(groq_pool.keys), 1) * 2):
+            key = groq_pool.wait_for_key()
             try:
                 with open(audio_path, "rb") as file:
-                    transcription = self.client.audio.transcriptions.create(
+                    transcription = self._client(key).audio.transcriptions.create(
                         file=file,
                         model="whisper-large-v3",
                         response_format="text",
@@ -52,10 +59,8 @@ class AudioComplianceChecker:
                 return transcription.strip() if transcription else ""
             except Exception as e:
                 if "429" in str(e):
-                    groq_pool.mark_rate_limited(self.groq_api_key)
-                    if not self._get_fresh_groq_key():
-                        time.sleep(5)
-                        continue
+                    groq_pool.mark_rate_limited(key)
+                    continue
                 else:
                     raise Exception(f"Transcription failed: {str(e)}")
         
@@ -84,27 +89,15 @@ class AudioComplianceChecker:
             violations = compliance_result.get("violations", [])
             filtered_violations = []
             
-            family_friendly_contexts = [
-                "papa", "mom", "family", "gift", "celebration", "festival",
-                "chocolate", "cadbury", "sweets", "treat", "sharing",
-                "birthday", "special occasion", "children", "kids",
-                "home", "kitchen", "dinner", "snack", "dessert"
-            ]
-            
-            legitimate_ad_phrases = [
-                "give me", "can i have", "papa", "mama", "family time",
-                "celebration", "festival", "special moment", "sharing",
-                "together", "home", "love", "care", "tradition"
-            ]
-            
-            text_lower = transcribed_text.lower()
-            family_context_score = sum(1 for term in family_friendly_contexts if term in text_lower)
-            legitimate_phrase_score = sum(1 for phrase in legitimate_ad_phrases if phrase in text_lower)
+            # Lexicon forms, one per stem: "Celebrations" and "chocolates" come back as celebration, chocolate
+            family_terms = rule_engine.distinct_terms(transcribed_text, "family_context")
+            family_context_score = len(family_terms)
+            legitimate_phrase_score = len(rule_engine.distinct_terms(transcribed_text, "legitimate_ad_phrase"))
             
             is_family_advertisement = (
                 family_context_score >= 2 or 
                 legitimate_phrase_score >= 1 or
-                any(brand in text_lower for brand in ['cadbury', 'chocolate', 'celebration'])
+                any(brand in family_terms for brand in ['cadbury', 'chocolate', 'celebration'])
             )
             
             print(f"Family advertisement detection:")
@@ -0,0 +1,176 @@
+import os
+import re
+import time
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def torch_thread_budget() -> int:
+    """Intra-op threads torch may use in this process (TORCH_NUM_THREADS, else EMBEDDING_NUM_THREADS, else min(4, cores))"""
+    return int(os.getenv('TORCH_NUM_THREADS', '0')) or int(os.getenv('EMBEDDING_NUM_THREADS', '0')) \
+        or min(4, os.cpu_count() or 1)
+
+
+def configure_torch_threads(num_threads: Optional[int] = None):
+    """Pin torch intra-op threads once per process.
+
+    Left alone, every worker process spawns one thread per core and they fight
+    over the CPU; a small fixed pool per worker gives better throughput.
+
+    torch's pool is process-wide, so this is the only place that sets it: the
+    embedding model and the local VLM both run on torch_thread_budget().
+    Hosts that dedicate the box to local VLM inference raise TORCH_NUM_THREADS.
+    """
+    try:
+        import torch
+    except ImportError:
+        return None
+
+    if num_threads is None:
+        num_threads = torch_thread_budget()
+    if torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+    return num_threads
+
+
+class EmbeddingService:
+    """Shared query-embedding front end for policy retrieval.
+
+    Results are kept in a bounded LRU keyed by a hash of the model name and
+    whitespace-normalized text. Cache misses from concurrent callers are queued
+    and encoded together, so several requests share one forward pass.
+    """
+
+    def __init__(self, encode_fn: Optional[Callable[[List[str]], Sequence]] = None, model_name: str = "",
+                 cache_size: int = 4096, max_batch_size: int = 32, batch_wait_ms: float = 5.0):
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait_ms / 1000.0
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self.encode_fn = None
+        self.model_name = ""
+        self.stats = {"hits": 0, "misses": 0, "batches": 0, "batched_texts": 0}
+        if encode_fn is not None:
+            self.configure(encode_fn, model_name)
+
+    def configure(self, encode_fn: Callable[[List[str]], Sequence], model_name: str, num_threads: Optional[int] = None):
+        self.encode_fn = encode_fn
+        if model_name != self.model_name:
+            self.clear()
+        self.model_name = model_name
+        configure_torch_threads(num_threads)
+
+    def clear(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\x00{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+            return vector
+
+    def _cache_put(self, key, vector):
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Identical texts queued by different callers are encoded once
+        unique = OrderedDict()
+        for key, text, future in batch:
+            unique.setdefault(key, (text, []))[1].append(future)
+
+        try:
+            vectors = self.encode_fn([text for text, _ in unique.values()])
+            self.stats["batches"] += 1
+            self.stats["batched_texts"] += len(unique)
+            for (key, (_, futures)), vector in zip(unique.items(), vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._cache_put(key, vector)
+                for future in futures:
+                    future.set_result(vector)
+        except Exception as e:
+            for _, futures in unique.values():
+                for future in futures:
+                    future.set_exception(e)
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if self.encode_fn is None:
+            raise Exception("EmbeddingService not configured. Call configure() first.")
+
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            key = self._key(text)
+            vector = self._cache_get(key)
+            if vector is not None:
+                results[i] = vector
+            else:
+                self.stats["misses"] += 1
+                future = Future()
+                self._queue.put((key, normalize_text(text), future))
+                pending.append((i, future))
+
+        if pending:
+            self._ensure_worker()
+            for i, future in pending:
+                results[i] = future.result()
+
+        return np.vstack(results) if results else np.zeros((0, 0), dtype=np.float32)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+
+embedding_service = EmbeddingService(
+    cache_size=int(os.getenv('EMBEDDING_CACHE_SIZE', '4096')),
+    max_batch_size=int(os.getenv('EMBEDDING_MAX_BATCH', '32'))
+)
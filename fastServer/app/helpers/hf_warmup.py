@@ -0,0 +1,161 @@
+import os
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# "queue": requests wait (up to HF_COLD_START_MAX_WAIT) for a warming model.
+# "fail_fast": requests for a warming model fail immediately.
+HF_COLD_START_POLICY = os.getenv('HF_COLD_START_POLICY', 'queue')
+HF_COLD_START_MAX_WAIT = float(os.getenv('HF_COLD_START_MAX_WAIT', '120'))
+
+
+class ModelWarmingError(Exception):
+    """The model is cold on Hugging Face and the caller did not (or could no longer) wait"""
+
+    def __init__(self, model_key: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.model_key = model_key
+        self.retry_after = retry_after
+
+
+class ModelWarmupManager:
+    """Per-model readiness for Hugging Face hosted models that cold-start.
+
+    A 503 marks the model cold and starts one background probe thread for it.
+    The thread pings the model with bounded exponential backoff (base_delay
+    doubling up to max_delay, with jitter, and the 503's estimated_time as a
+    hint) until it answers or max_warmup seconds have passed. Request threads
+    never sleep themselves: they either fail fast or wait on a condition that
+    the probe thread notifies as soon as the model is ready or given up on.
+
+    `probe` returns True when the model answered, False while it is still
+    loading, and raises for anything else (bad key, bad request), which ends
+    the warm-up immediately.
+    """
+
+    def __init__(self, base_delay: float = 2.0, max_delay: float = 30.0, max_warmup: float = 600.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_warmup = max_warmup
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+
+    def _state(self, model_key: str) -> Dict[str, Any]:
+        # Callers hold self._changed
+        state = self._models.get(model_key)
+        if state is None:
+            state = {"status": "unknown", "cold_since": None, "probes": 0, "next_probe_in": None,
+                     "estimated_ready": None, "last_error": None, "cold_starts": 0}
+            self._models[model_key] = state
+        return state
+
+    def is_ready(self, model_key: str) -> bool:
+        with self._changed:
+            return self._state(model_key)["status"] != "warming"
+
+    def mark_ready(self, model_key: str):
+        with self._changed:
+            state = self._state(model_key)
+            if state["status"] == "ready":
+                return
+            if state["status"] == "warming":
+                print(f"{model_key} is warm after {time.time() - state['cold_since']:.0f}s")
+            state.update(status="ready", cold_since=None, next_probe_in=None, estimated_ready=None, last_error=None)
+            self._changed.notify_all()
+
+    def mark_cold(self, model_key: str, probe: Callable[[], bool], estimated_time: Optional[float] = None):
+        """Record a cold start and make sure exactly one probe thread is warming the model"""
+        with self._changed:
+            state = self._state(model_key)
+            if estimated_time:
+                state["estimated_ready"] = time.time() + estimated_time
+            if state["status"] == "warming":
+                return
+            state.update(status="warming", cold_since=time.time(), probes=0, last_error=None)
+            state["cold_starts"] += 1
+
+        print(f"{model_key} is cold, warming it up in the background")
+        threading.Thread(target=self._warm, args=(model_key, probe), name="hf-warmup", daemon=True).start()
+
+    def _warm(self, model_key: str, probe: Callable[[], bool]):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            with self._changed:
+                state = self._state(model_key)
+                if state["status"] != "warming":
+                    # A request got through in the meantime
+                    return
+                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+                if state["estimated_ready"]:
+                    delay = min(max(delay, state["estimated_ready"] - time.time()), self.max_delay)
+                delay *= random.uniform(0.8, 1.0)
+                if time.monotonic() - started + delay > self.max_warmup:
+                    state.update(status="unavailable", next_probe_in=None,
+                                 last_error=f"not ready after {self.max_warmup:.0f}s")
+                    self._changed.notify_all()
+                    print(f"{model_key} warm-up gave up after {self.max_warmup:.0f}s")
+                    return
+                state["next_probe_in"] = round(delay, 1)
+                # Waiting on the condition lets mark_ready end the wait early
+                probe_at = time.monotonic() + delay
+                while state["status"] == "warming" and time.monotonic() < probe_at:
+                    self._changed.wait(probe_at - time.monotonic())
+                if state["status"] != "warming":
+                    return
+                state["probes"] += 1
+
+            try:
+                ready = probe()
+            except Exception as e:
+                with self._changed:
+                    self._state(model_key).update(status="unavailable", next_probe_in=None, last_error=str(e))
+                    self._changed.notify_all()
+                print(f"{model_key} warm-up probe failed: {e}")
+                return
+
+            if ready:
+                self.mark_ready(model_key)
+                return
+            attempt += 1
+
+    def wait_until_ready(self, model_key: str, deadline: Optional[float] = None, policy: str = HF_COLD_START_POLICY):
+        """Return once the model is not warming; raise ModelWarmingError on fail_fast, timeout or give-up.
+
+        deadline is a time.monotonic() value shared by all attempts of one request.
+        """
+        with self._changed:
+            state = self._state(model_key)
+            if state["status"] != "warming":
+                return
+            if policy == "fail_fast":
+                raise ModelWarmingError(model_key, f"{model_key} is warming up, retry later",
+                                        retry_after=self._retry_after(state))
+
+            while state["status"] == "warming":
+                remaining = (deadline - time.monotonic()) if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise ModelWarmingError(model_key, f"{model_key} still warming up after waiting",
+                                            retry_after=self._retry_after(state))
+                self._changed.wait(remaining)
+
+            if state["status"] == "unavailable":
+                raise ModelWarmingError(model_key, f"{model_key} unavailable: {state['last_error']}")
+
+    @staticmethod
+    def _retry_after(state: Dict[str, Any]) -> Optional[float]:
+        if state["estimated_ready"]:
+            return max(round(state["estimated_ready"] - time.time(), 1), 1.0)
+        return state["next_probe_in"]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._changed:
+            return {key: dict(state) for key, state in self._models.items()}
+
+
+hf_warmup = ModelWarmupManager(
+    base_delay=float(os.getenv('HF_WARMUP_BASE_DELAY', '2')),
+    max_delay=float(os.getenv('HF_WARMUP_MAX_DELAY', '30')),
+    max_warmup=float(os.getenv('HF_WARMUP_MAX_SECONDS', '600'))
+)
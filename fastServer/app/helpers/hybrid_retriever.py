@@ -0,0 +1,121 @@
+import re
+import math
+from collections import defaultdict
+from typing import List, Dict, Any, Callable, Sequence
+
+import numpy as np
+
+from app.helpers.policy_vector_index import PolicyVectorIndex
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in into is it its of on or that the their them
+they this to was were will with you your our we may not any all such other shall must can
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring over policy chunks.
+
+    Dense MiniLM retrieval blurs exact regulatory terms ("COPPA", "BPC 22580",
+    "torrent"); BM25 ranks chunks that literally contain them.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(documents)
+
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        postings = defaultdict(dict)
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                postings[token][doc_id] = postings[token].get(doc_id, 0) + 1
+
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        self.length_norm = k1 * (1 - b + b * doc_lengths / (avg_length or 1.0))
+
+        self.postings = {}
+        for term, doc_tfs in postings.items():
+            doc_ids = np.fromiter(doc_tfs.keys(), dtype=np.int32, count=len(doc_tfs))
+            tfs = np.fromiter(doc_tfs.values(), dtype=np.float32, count=len(doc_tfs))
+            idf = math.log(1 + (self.num_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            self.postings[term] = (doc_ids, tfs, idf)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, tfs, idf = posting
+            scores[doc_ids] += idf * tfs * (self.k1 + 1) / (tfs + self.length_norm[doc_ids])
+        return scores
+
+    def search(self, query: str, top_k: int) -> List[tuple]:
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        order = candidates[np.argsort(-scores[candidates])]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+class HybridPolicyRetriever:
+    """Fuses dense vector and BM25 rankings with reciprocal rank fusion.
+
+    Exposes search_batch(queries, top_k) like PolicyComplianceChecker.search_policy_chunks,
+    returning chunk dicts best-first with the fused score plus both component scores.
+    """
+
+    def __init__(self, vector_index: PolicyVectorIndex, embed_fn: Callable[[List[str]], np.ndarray],
+                 rrf_k: int = 60, candidates: int = 20, bm25_weight: float = 1.0, vector_weight: float = 1.0):
+        self.vector_index = vector_index
+        self.embed_fn = embed_fn
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.bm25_weight = bm25_weight
+        self.vector_weight = vector_weight
+        self.bm25 = BM25Index([
+            f"{chunk.get('section', '')} {chunk['text']}" for chunk in vector_index.chunks
+        ])
+        self._positions = {chunk["chunk_id"]: i for i, chunk in enumerate(vector_index.chunks)}
+
+    def _fuse(self, query: str, vector_hits: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        fused = defaultdict(float)
+        vector_scores, bm25_scores = {}, {}
+
+        for rank, hit in enumerate(vector_hits):
+            position = self._positions[hit["chunk_id"]]
+            fused[position] += self.vector_weight / (self.rrf_k + rank + 1)
+            vector_scores[position] = hit["score"]
+
+        for rank, (position, score) in enumerate(self.bm25.search(query, self.candidates)):
+            fused[position] += self.bm25_weight / (self.rrf_k + rank + 1)
+            bm25_scores[position] = score
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                **self.vector_index.chunks[position],
+                "score": score,
+                "vector_score": vector_scores.get(position),
+                "bm25_score": bm25_scores.get(position, 0.0)
+            }
+            for position, score in ranked
+        ]
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        queries = list(queries)
+        query_embeddings = self.embed_fn(queries)
+        vector_results = self.vector_index.search_batch(query_embeddings, top_k=self.candidates)
+        return [self._fuse(query, hits, top_k) for query, hits in zip(queries, vector_results)]
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        return self.search_batch([query], top_k)[0]
@@ -3,21 +3,57 @@
 
 import os
 import json
+import math
 import base64
 import io
 import time
+import hashlib
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union, List, Dict, Any, Optional
 import requests
-from PIL import Image
+from PIL import Image, ImageOps
 import numpy as np
 import cv2
 import warnings
 warnings.filterwarnings('ignore')
 
 import torch
-from transformers import Qwen2VLForConditionalGeneration, AutoTokenizer, AutoProcessor
 from qwen_vl_utils import process_vision_info
+from app.helpers.policy_chunker import format_chunk_for_prompt, in_section
+from app.helpers.rule_engine import rule_engine
+from app.helpers.image_hash_cache import image_hash_cache, text_signature
+from app.helpers.text_detector import text_detector
+from app.helpers.vlm_payload import vlm_payload_encoder, fit_for_vlm, decode_for_vlm
+from app.helpers.vlm_batcher import LocalVLMBatcher, batcher_settings
+from app.helpers.local_vlm import LazyModelLoader, load_local_vlm, LOCAL_VLM_LOAD
+from app.helpers.hf_warmup import hf_warmup, ModelWarmingError, HF_COLD_START_MAX_WAIT
+from app.helpers.image_triage import image_triage, IMAGE_TRIAGE_MODE
+from app.helpers.media_downloader import DownloadedMedia, download_media
+from app.helpers.image_tiling import IMAGE_TILING_MODE, compose_grid, grid_capacity, pack_grid, pack_multi_image
+
+# "single_pass": one VLM call reads the text and judges compliance together.
+# "two_pass": OCR call, policy retrieval on the OCR text, then the analysis call.
+IMAGE_ANALYSIS_MODE = os.getenv('IMAGE_ANALYSIS_MODE', 'single_pass')
+IMAGE_HASH_CACHE_ENABLED = os.getenv('IMAGE_HASH_CACHE_ENABLED', 'true').lower() == 'true'
+# Two-pass mode: skip the OCR call when no text is detected locally, and OCR only the text regions otherwise
+TEXT_DETECTION_ENABLED = os.getenv('TEXT_DETECTION_ENABLED', 'true').lower() == 'true'
+# Output budget for the reduced prompt sent to images CLIP triage rates clean
+TRIAGE_REDUCED_MAX_TOKENS = int(os.getenv('IMAGE_TRIAGE_REDUCED_MAX_TOKENS', '768'))
+
+# Policy lookups for what an image can show, used as the single-pass policy
+# context. They do not depend on the image, so the retrieved sections are
+# computed once per policy version.
+VISUAL_POLICY_QUERIES = [
+    "nudity sexual or adult content imagery",
+    "violence weapons firearms and ammunition",
+    "gambling casino betting and lottery promotion",
+    "illegal drugs online pharmacy prescription medicine",
+    "alcohol tobacco and age-restricted products targeting minors",
+    "misleading claims before and after images fake testimonials",
+    "counterfeit goods trademark infringement and piracy",
+    "deceptive design fake buttons and phishing",
+]
 
 class ImageComplianceChecker:
     def __init__(self, 
@@ -36,6 +72,9 @@ class ImageComplianceChecker:
         self.model_name = "Qwen/Qwen2.5-VL-7B-Instruct"
         self.model = None
         self.processor = None
+        self.local_batcher = None
+        self.local_loader = None
+        self.local_model_info = {}
         
         self.hf_api_url = "https://router.huggingface.co/v1/chat/completions"
         self.hf_serverless_url = f"https://api-inference.huggingface.co/models/{self.model_name}"
@@ -51,6 +90,9 @@ class ImageComplianceChecker:
         
         if policy_checker:
             print("Using existing PolicyComplianceChecker for advanced policy analysis")
+
+        self.analysis_mode = IMAGE_ANALYSIS_MODE
+        self._visual_policy = {}
         
     def load_qwen_model(self):
         if self.deployment_mode in ["hf_api", "hf_serverless"]:
@@ -58,84 +100,137 @@ class ImageComplianceChecker:
             print("Hugging Face API client ready - no local model loading required")
             return
             
+        self.local_batcher = LocalVLMBatcher(
+            self._generate_local_batch,
+            max_pixels=vlm_payload_encoder.max_pixels,
+            **batcher_settings()
+        )
+        self.local_loader = LazyModelLoader(self._load_local_model)
+        
+        if LOCAL_VLM_LOAD == "eager":
+            self.local_loader.get()
+        elif LOCAL_VLM_LOAD == "background":
+            print("Loading Qwen2.5-VL model in the background...")
+            self.local_loader.start_background()
+        else:
+            print("Qwen2.5-VL model will load on first use")
+    
+    def _load_local_model(self):
         try:
-            print("Loading Qwen2.5-VL-7B model locally...")
+            print(f"Loading Qwen2.5-VL-7B model locally on {self.device}...")
             
-            self.model = Qwen2VLForConditionalGeneration.from_pretrained(
-                self.model_name,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                trust_remote_code=True
-            )
+            self.model, self.processor, self.local_model_info = load_local_vlm(self.model_name, self.device)
             
-            self.processor = AutoProcessor.from_pretrained(
-                self.model_name,
-                trust_remote_code=True
-            )
-            
-            print("Qwen2.5-VL model loaded successfully")
+            print(f"Qwen2.5-VL model loaded successfully: {self.local_model_info}")
+            return self.model
             
         except Exception as e:
             print(f"Local model loading failed: {e}")
             raise Exception(f"Failed to load Qwen2.5-VL model: {e}")
     
-    def query_huggingface_api(self, image: Image.Image, prompt: str) -> str:
-        try:
-            import io
-            import base64
-            
-            img_buffer = io.BytesIO()
-            image.save(img_buffer, format='JPEG', quality=90)
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-            
-            headers = {
-                "Authorization": f"Bearer {self.hf_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            if self.deployment_mode == "hf_api":
-                payload = {
-                    "model": self.model_name,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{img_base64}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    "max_tokens": 2048,
-                    "temperature": 0.1
-                }
-            else:
-                payload = {
-                    "inputs": {
-                        "image": img_base64,
-                        "question": prompt
+    @property
+    def hf_model_key(self) -> str:
+        return f"{self.deployment_mode}:{self.model_name}"
+
+    def _hf_request(self, images_base64: List[str], prompt: str, max_tokens: int = 2048):
+        headers = {
+            "Authorization": f"Bearer {self.hf_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        if self.deployment_mode == "hf_api":
+            payload = {
+                "model": self.model_name,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": prompt
+                            }
+                        ] + self._image_content(images_base64)
                     }
+                ],
+                "max_tokens": max_tokens,
+                "temperature": 0.1
+            }
+        else:
+            payload = {
+                "inputs": {
+                    "image": images_base64[0],
+                    "question": prompt
                 }
+            }
+        
+        endpoint = self.hf_api_url if self.deployment_mode == "hf_api" else self.hf_serverless_url
+        
+        return requests.post(
+            endpoint,
+            headers=headers,
+            json=payload,
+            timeout=120
+        )
+    
+    @staticmethod
+    def _image_content(images_base64: List[str]) -> List[Dict[str, Any]]:
+        if len(images_base64) == 1:
+            return [{"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{images_base64[0]}"}}]
+        # Multi-image message: each image preceded by the label the tiled prompt refers to
+        content = []
+        for index, img_base64 in enumerate(images_base64):
+            content.append({"type": "text", "text": f"Image {index + 1}:"})
+            content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"}})
+        return content
+
+    def _probe_hf_model(self) -> bool:
+        """Warm-up ping: a blank 56x56 image and a one-token answer"""
+        buffer = io.BytesIO()
+        Image.new("RGB", (56, 56), "white").save(buffer, format="JPEG")
+        response = self._hf_request([base64.b64encode(buffer.getvalue()).decode()], "Reply OK.", max_tokens=1)
+        if response.status_code == 200:
+            return True
+        if response.status_code == 503:
+            return False
+        raise Exception(f"HF API Error {response.status_code}: {response.text[:200]}")
+    
+    @staticmethod
+    def _estimated_load_time(response) -> Optional[float]:
+        # Serverless 503s carry {"error": "... is currently loading", "estimated_time": seconds}
+        try:
+            return float(response.json().get("estimated_time"))
+        except Exception:
+            return None
+    
+    def query_huggingface_api(self, image: Union[Image.Image, List[Image.Image]], prompt: str,
+                              max_tokens: int = 2048) -> str:
+        """One VLM call; a list of images goes out as one multi-image message (HF API mode only)"""
+        try:
+            images = image if isinstance(image, list) else [image]
+            encoded_images = [vlm_payload_encoder.encode(img) for img in images]
             
-            print(f"Querying Hugging Face {self.deployment_mode.upper()}...")
-            
-            endpoint = self.hf_api_url if self.deployment_mode == "hf_api" else self.hf_serverless_url
+            if len(encoded_images) == 1:
+                encoded = encoded_images[0]
+                print(f"Querying Hugging Face {self.deployment_mode.upper()} "
+                      f"({encoded['width']}x{encoded['height']}, {len(encoded['data']) // 1024} KB, "
+                      f"{encoded['image_tokens']} image tokens{', original bytes' if encoded['reused_source'] else ''})...")
+            else:
+                print(f"Querying Hugging Face {self.deployment_mode.upper()} with {len(encoded_images)} images "
+                      f"({sum(len(e['data']) for e in encoded_images) // 1024} KB, "
+                      f"{sum(e['image_tokens'] for e in encoded_images)} image tokens)...")
             
-            response = requests.post(
-                endpoint,
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
+            # One wait budget per request, however many cold starts it runs into
+            deadline = time.monotonic() + HF_COLD_START_MAX_WAIT
+            while True:
+                hf_warmup.wait_until_ready(self.hf_model_key, deadline)
+                response = self._hf_request([e["base64"] for e in encoded_images], prompt, max_tokens)
+                if response.status_code != 503:
+                    break
+                print("Model is loading on Hugging Face servers, waiting for the background warm-up...")
+                hf_warmup.mark_cold(self.hf_model_key, self._probe_hf_model, self._estimated_load_time(response))
             
             if response.status_code == 200:
+                hf_warmup.mark_ready(self.hf_model_key)
                 result = response.json()
                 
                 if self.deployment_mode == "hf_api":
@@ -150,12 +245,6 @@ class ImageComplianceChecker:
                         return result.get('generated_text', result.get('answer', str(result)))
                     else:
                         return str(result)
-                        
-            elif response.status_code == 503:
-                print("Model is loading on Hugging Face servers, this may take a few minutes...")
-                import time
-                time.sleep(30)
-                return self.query_huggingface_api(image, prompt)
                 
             else:
                 error_msg = f"HF API Error {response.status_code}: {response.text}"
@@ -164,6 +253,9 @@ class ImageComplianceChecker:
                 
         except requests.exceptions.Timeout:
             raise Exception("Hugging Face API timeout - model may be cold starting")
+        except ModelWarmingError as e:
+            print(f"Hugging Face model not ready: {e}")
+            raise
         except Exception as e:
             print(f"Hugging Face API error: {e}")
             raise Exception(f"HF API call failed: {e}")
@@ -181,49 +273,139 @@ class ImageComplianceChecker:
             print(f"Policy loading error: {e}")
             self.policy_content = "Basic advertising policy guidelines"
 
-    def preprocess_image(self, image_input: Union[str, Image.Image, np.ndarray]) -> Image.Image:
+    def preprocess_image(self, image_input: Union[str, Image.Image, np.ndarray, DownloadedMedia]) -> Image.Image:
         try:
-            if isinstance(image_input, str):
+            max_size = 1024
+            source_bytes = None
+            
+            if isinstance(image_input, DownloadedMedia):
+                # Downloaded by MediaDownloader: decoded straight from its buffer, no disk round trip
+                source_bytes = image_input.read()
+            elif isinstance(image_input, str):
                 if image_input.startswith('http'):
-                    response = requests.get(image_input)
-                    image = Image.open(io.BytesIO(response.content))
+                    media = download_media(image_input)
+                    try:
+                        source_bytes = media.read()
+                    finally:
+                        media.discard()
                 elif image_input.startswith('data:image'):
                     header, encoded = image_input.split(',', 1)
-                    image_data = base64.b64decode(encoded)
-                    image = Image.open(io.BytesIO(image_data))
+                    source_bytes = base64.b64decode(encoded)
                 elif os.path.exists(image_input):
-                    image = Image.open(image_input)
+                    with open(image_input, 'rb') as f:
+                        source_bytes = f.read()
                 else:
                     raise ValueError("Invalid image input")
+            
+            if source_bytes is not None:
+                # Large JPEGs decode at 1/2-1/8 scale, straight to about the VLM input size
+                image, decode = decode_for_vlm(source_bytes, max_size, vlm_payload_encoder.max_pixels)
+                if decode["decoded_size"] != decode["original_size"]:
+                    print(f"Decoded {decode['original_size'][0]}x{decode['original_size'][1]} {decode['format']} "
+                          f"at {decode['decoded_size'][0]}x{decode['decoded_size'][1]} in {decode['decode_ms']} ms")
                     
             elif isinstance(image_input, Image.Image):
-                image = image_input
+                image = ImageOps.exif_transpose(image_input)
                 
             elif isinstance(image_input, np.ndarray):
+                # Video frames: area-average down in OpenCV before building the PIL image
+                if max(image_input.shape[:2]) > max_size:
+                    scale = max_size / float(max(image_input.shape[:2]))
+                    image_input = cv2.resize(image_input, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
                 if len(image_input.shape) == 3 and image_input.shape[2] == 3:
                     image_input = cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB)
                 image = Image.fromarray(image_input)
             else:
                 raise ValueError("Unsupported image type")
             
+            decoded_mode = image.mode
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            max_size = 1024
-            if max(image.size) > max_size:
-                image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            # Straight to the VLM's input size, so the payload encoder has nothing left to shrink
+            image = fit_for_vlm(image, max_size, vlm_payload_encoder.max_pixels)
+            
+            # Let the payload encoder send the uploaded JPEG as-is when it already fits
+            if source_bytes and decode["format"] == 'JPEG' and decode["orientation"] == 1 and \
+                    decoded_mode == 'RGB' and image.size == decode["original_size"]:
+                image.info["source_bytes"] = source_bytes
+                image.info["source_format"] = decode["format"]
+            
+            if source_bytes:
+                # The pixels follow from the bytes and the size limits, so the payload cache can key on
+                # the (compressed, much smaller) download instead of hashing the decoded bitmap
+                image.info["pixel_digest"] = hashlib.blake2b(
+                    source_bytes, digest_size=16, key=f"{max_size}:{vlm_payload_encoder.max_pixels}".encode()
+                ).hexdigest()
             
             return image
             
         except Exception as e:
             raise Exception(f"Image preprocessing failed: {e}")
 
-    def create_analysis_prompt(self, analysis_type="full", extracted_text=""):
+    def visual_policy_context(self) -> Dict[str, Any]:
+        """Policy sections for VISUAL_POLICY_QUERIES as {"text", "chunk_ids"}, cached per policy version"""
+        if not self.policy_checker:
+            return {"text": self.policy_content[:1500], "chunk_ids": []}
+
+        version = self.policy_checker.policy_version
+        cached = self._visual_policy.get(version)
+        if cached is not None:
+            return cached
+
+        try:
+            sections, chunk_ids = [], []
+            for hits in self.policy_checker.search_policy_chunks(VISUAL_POLICY_QUERIES, top_k=2):
+                for hit in hits:
+                    if hit["chunk_id"] not in chunk_ids and len(hit["text"].strip()) > 20:
+                        chunk_ids.append(hit["chunk_id"])
+                        sections.append(format_chunk_for_prompt(hit))
+
+            text = "\n\n--- POLICY SECTION ---\n\n".join(sections)
+            if len(text) > 4000:
+                text = text[:4000] + "\n\n[Additional policy sections truncated...]"
+            context = {"text": text or self.policy_content[:1500], "chunk_ids": chunk_ids}
+        except Exception as e:
+            print(f"Visual policy retrieval failed, using basic policy: {e}")
+            return {"text": self.policy_content[:1500], "chunk_ids": []}
+
+        self._visual_policy = {version: context}
+        print(f"Visual policy context: {len(chunk_ids)} sections for policy version {version}")
+        return context
+
+    def create_analysis_prompt(self, analysis_type="full", extracted_text="", concerns=""):
         if analysis_type == "ocr":
             return """Please extract all visible text from this image. 
 Return only the text content you can see, preserving the layout and formatting as much as possible.
 If no text is visible, return 'NO_TEXT_FOUND'."""
 
+        elif analysis_type == "single_pass":
+            return self._compliance_prompt(
+                self.visual_policy_context()["text"],
+                text_instructions="""
+READ THE TEXT FIRST:
+- Transcribe all visible text (headlines, captions, fine print, logos with words) into "extracted_text", preserving layout where possible
+- Use an empty string if no text is visible
+- Judge that text as ad copy against the policy guidelines, together with the visual content
+""" + concerns,
+                extracted_text_field="all visible text in the image, verbatim"
+            )
+
+        elif analysis_type == "reduced":
+            return """You are an advertisement compliance analyzer. A visual classifier rated this image as a routine product advertisement.
+Transcribe all visible text and confirm whether the image or its text shows any of: adult or sexual content,
+violence or weapons, illegal drugs, gambling, alcohol or tobacco aimed at minors, unsubstantiated health or
+financial claims, deceptive before/after imagery, counterfeit goods. Promotional branding is normal, not a violation.
+
+Return ONLY this JSON:
+{
+  "visual_analysis": {"scene_description": "one sentence", "text_visible": true/false, "content_category": "product_promotion/service_ad/other"},
+  "extracted_text": "all visible text in the image, verbatim, or empty string",
+  "policy_violations": [{"policy_section": "...", "violation_type": "...", "description": "...", "confidence": 0.0, "evidence": "..."}],
+  "compliance_assessment": {"compliant": true/false, "risk_score": 0.0, "summary": "one sentence"}
+}
+Leave policy_violations empty unless a violation is actually visible or stated."""
+
         elif analysis_type == "full":
             relevant_policy = self.policy_content[:1500]
             
@@ -236,11 +418,49 @@ If no text is visible, return 'NO_TEXT_FOUND'."""
                     print(f"Policy extraction failed, using basic policy: {e}")
                     relevant_policy = self.policy_content[:1500]
             
-            return f"""You are an expert advertisement compliance analyzer. Analyze this image for ACTUAL policy violations only.
+            return self._compliance_prompt(relevant_policy, text_instructions=concerns, extracted_text_field=extracted_text)
+
+    def create_tiled_prompt(self, count: int, layout: str = "grid") -> str:
+        if layout == "grid":
+            arrangement = (f"The picture is a grid of {count} separate advertisement images, numbered 1 to {count} "
+                           f"in the yellow label at the top-left corner of each tile (left to right, top to bottom).")
+        else:
+            arrangement = f"You are given {count} separate advertisement images, each preceded by its label \"Image N\"."
+        
+        return f"""You are an expert advertisement compliance analyzer. {arrangement}
+Analyze EACH image on its own, as a separate advertisement, for ACTUAL policy violations only.
 
 RELEVANT POLICY GUIDELINES:
-{relevant_policy}
+{self.visual_policy_context()["text"]}
+
+FOR EACH IMAGE:
+- Transcribe all visible text in that image into "extracted_text" (empty string if none); never mix text between images
+- Judge the visuals and the text together against the policy guidelines
+- Promotional content, branding and family-friendly product ads are NORMAL and COMPLIANT
+- Only flag genuine violations: adult or sexual content, violence or weapons, illegal drugs, gambling,
+  alcohol or tobacco aimed at minors, unsubstantiated health or financial claims, deceptive before/after
+  imagery, counterfeit goods, missing required disclaimers
 
+Return ONLY this JSON, with exactly {count} entries in "images", one per image number:
+{{
+  "images": [
+    {{
+      "image": 1,
+      "visual_analysis": {{"scene_description": "one sentence", "text_visible": true/false, "content_category": "product_promotion/service_ad/other"}},
+      "extracted_text": "all visible text in this image, verbatim",
+      "policy_violations": [{{"policy_section": "...", "violation_type": "...", "description": "...", "confidence": 0.0, "evidence": "..."}}],
+      "compliance_assessment": {{"compliant": true/false, "risk_score": 0.0, "summary": "one sentence"}}
+    }}
+  ]
+}}
+Leave policy_violations empty for an image unless a violation is actually visible or stated in it."""
+
+    def _compliance_prompt(self, relevant_policy, text_instructions="", extracted_text_field=""):
+        return f"""You are an expert advertisement compliance analyzer. Analyze this image for ACTUAL policy violations only.
+
+RELEVANT POLICY GUIDELINES:
+{relevant_policy}
+{text_instructions}
 CRITICAL INSTRUCTIONS FOR ADVERTISEMENT ANALYSIS:
 ===============================================
 
@@ -328,7 +548,7 @@ Return analysis in JSON format:
     "promotional_intent": "promotion/anti_promotion/educational",
     "campaign_type": "product_ad/service_ad/health_campaign/other"
   }},
-  "extracted_text": "{extracted_text}",
+  "extracted_text": "{extracted_text_field}",
   "safety_assessment": {{
     "adult_content_detected": false,
     "violence_detected": false,
@@ -360,203 +580,313 @@ MANDATORY SETTINGS FOR FOOD/CONSUMER PRODUCT ADS (Cadbury, snacks, family produc
 
 Return ONLY the JSON response."""
 
-    def analyze_image_with_qwen(self, image: Image.Image) -> Dict[str, Any]:
+    def analyze_image_with_qwen(self, image: Image.Image, triage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
             if self.deployment_mode in ["hf_api", "hf_serverless"]:
-                return self._analyze_with_hf_api(image)
+                return self._analyze_with_hf_api(image, triage)
             else:
-                return self._analyze_with_local_model(image)
+                return self._analyze_with_local_model(image, triage)
                 
+        except ModelWarmingError as e:
+            print(f"Qwen2-VL not ready: {e}")
+            return self.create_warming_response(e)
         except Exception as e:
             print(f"Qwen2-VL analysis failed: {e}")
             return self.create_error_response(str(e))
     
-    def _analyze_with_hf_api(self, image: Image.Image) -> Dict[str, Any]:
+    def _analyze_with_hf_api(self, image: Image.Image, triage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
-            extracted_text = ""
+            if triage and triage["decision"] == "clean":
+                print("Analyzing with Qwen2-VL via HF API (triage: clean, reduced prompt)...")
+                response = self.query_huggingface_api(image, self.create_analysis_prompt("reduced"),
+                                                      max_tokens=TRIAGE_REDUCED_MAX_TOKENS)
+                return self._finish_single_pass(
+                    self.parse_analysis_response(response),
+                    lambda prompt: self.query_huggingface_api(image, prompt)
+                )
+
+            concerns = self._triage_concerns(triage)
+            if self.analysis_mode == "single_pass":
+                print("Analyzing with Qwen2-VL via HF API (single pass)...")
+                response = self.query_huggingface_api(image, self.create_analysis_prompt("single_pass", concerns=concerns))
+                return self._finish_single_pass(
+                    self.parse_analysis_response(response),
+                    lambda prompt: self.query_huggingface_api(image, prompt)
+                )
+
+            extracted_text, ocr_skipped = "", False
             if self.policy_checker:
                 print("Extracting text from image via HF API...")
-                try:
-                    ocr_prompt = self.create_analysis_prompt("ocr")
-                    ocr_response = self.query_huggingface_api(image, ocr_prompt)
-                    
-                    if ocr_response.strip() and ocr_response.strip() != "NO_TEXT_FOUND":
-                        extracted_text = ocr_response.strip()
-                        print(f"Extracted text: {extracted_text[:100]}...")
-                    
-                except Exception as e:
-                    print(f"OCR extraction failed: {e}")
+                extracted_text, ocr_skipped = self._extract_text(
+                    image, lambda ocr_image, prompt: self.query_huggingface_api(ocr_image, prompt)
+                )
             
             print("Analyzing with Qwen2-VL via HF API...")
-            full_prompt = self.create_analysis_prompt("full", extracted_text)
+            full_prompt = self.create_analysis_prompt("full", extracted_text, concerns)
             
             response = self.query_huggingface_api(image, full_prompt)
             
-            return self.parse_analysis_response(response)
+            result = self.parse_analysis_response(response)
+            result["image_compliance"]["ocr_skipped"] = ocr_skipped
+            return result
             
+        except ModelWarmingError as e:
+            print(f"HF API model not ready: {e}")
+            return self.create_warming_response(e)
         except Exception as e:
             print(f"HF API analysis failed: {e}")
             return self.create_error_response(f"HF API analysis failed: {e}")
     
-    def _analyze_with_local_model(self, image: Image.Image) -> Dict[str, Any]:
-        try:
-            if self.model is None:
-                raise Exception("Model not loaded. Call initialize() first.")
-            
-            extracted_text = ""
-            if self.policy_checker:
-                print("Extracting text from image for policy analysis...")
-                try:
-                    ocr_prompt = self.create_analysis_prompt("ocr")
-                    
-                    ocr_messages = [
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "image", "image": image},
-                                {"type": "text", "text": ocr_prompt}
-                            ]
-                        }
-                    ]
-                    
-                    text = self.processor.apply_chat_template(
-                        ocr_messages, tokenize=False, add_generation_prompt=True
-                    )
-                    
-                    image_inputs, video_inputs = process_vision_info(ocr_messages)
-                    
-                    inputs = self.processor(
-                        text=[text],
-                        images=image_inputs,
-                        videos=video_inputs,
-                        padding=True,
-                        return_tensors="pt"
-                    )
-                    
-                    inputs = inputs.to(self.device)
-                    
-                    with torch.no_grad():
-                        generated_ids = self.model.generate(
-                            **inputs,
-                            max_new_tokens=512,
-                            temperature=0.1,
-                            do_sample=True
-                        )
-                    
-                    generated_ids_trimmed = [
-                        out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-                    ]
-                    
-                    ocr_response = self.processor.batch_decode(
-                        generated_ids_trimmed, 
-                        skip_special_tokens=True, 
-                        clean_up_tokenization_spaces=False
-                    )[0]
-                    
-                    if ocr_response.strip() and ocr_response.strip() != "NO_TEXT_FOUND":
-                        extracted_text = ocr_response.strip()
-                        print(f"Extracted text: {extracted_text[:100]}...")
-                    
-                except Exception as e:
-                    print(f"OCR extraction failed: {e}")
-            
-            print("Analyzing with local Qwen2-VL model...")
-            prompt = self.create_analysis_prompt("full", extracted_text)
-            
-            messages = [
+    def _generate_local(self, image: Image.Image, prompt: str, max_new_tokens: int = 2048) -> str:
+        # Queued so concurrent images and frames share one generate call
+        return self.local_batcher.generate(image, prompt, max_new_tokens)
+
+    def _generate_local_batch(self, batch: List[tuple], max_new_tokens: int) -> List[str]:
+        conversations = [
+            [
                 {
                     "role": "user",
                     "content": [
-                        {"type": "image", "image": image},
+                        {"type": "image", "image": image, "max_pixels": vlm_payload_encoder.max_pixels},
                         {"type": "text", "text": prompt}
                     ]
                 }
             ]
-            
-            text = self.processor.apply_chat_template(
-                messages, tokenize=False, add_generation_prompt=True
-            )
-            
-            image_inputs, video_inputs = process_vision_info(messages)
-            
-            inputs = self.processor(
-                text=[text],
-                images=image_inputs,
-                videos=video_inputs,
-                padding=True,
-                return_tensors="pt"
+            for image, prompt, _ in batch
+        ]
+        
+        texts = [
+            self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            for messages in conversations
+        ]
+        
+        image_inputs, video_inputs = process_vision_info(conversations)
+        
+        inputs = self.processor(
+            text=texts,
+            images=image_inputs,
+            videos=video_inputs,
+            padding=True,
+            return_tensors="pt"
+        )
+        
+        inputs = inputs.to(self.device)
+        
+        with torch.no_grad():
+            generated_ids = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                temperature=0.1,
+                do_sample=True
             )
+        
+        generated_ids_trimmed = [
+            out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
+        ]
+        
+        return self.processor.batch_decode(
+            generated_ids_trimmed, 
+            skip_special_tokens=True, 
+            clean_up_tokenization_spaces=False
+        )
+
+    def _analyze_with_local_model(self, image: Image.Image, triage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            if self.local_loader is None:
+                raise Exception("Model not loaded. Call initialize() first.")
+            self.local_loader.get()
             
-            inputs = inputs.to(self.device)
+            if triage and triage["decision"] == "clean":
+                print("Analyzing with local Qwen2-VL model (triage: clean, reduced prompt)...")
+                response = self._generate_local(image, self.create_analysis_prompt("reduced"),
+                                                max_new_tokens=TRIAGE_REDUCED_MAX_TOKENS)
+                return self._finish_single_pass(
+                    self.parse_analysis_response(response),
+                    lambda prompt: self._generate_local(image, prompt)
+                )
             
-            with torch.no_grad():
-                generated_ids = self.model.generate(
-                    **inputs,
-                    max_new_tokens=2048,
-                    temperature=0.1,
-                    do_sample=True
+            concerns = self._triage_concerns(triage)
+            if self.analysis_mode == "single_pass":
+                print("Analyzing with local Qwen2-VL model (single pass)...")
+                response = self._generate_local(image, self.create_analysis_prompt("single_pass", concerns=concerns))
+                return self._finish_single_pass(
+                    self.parse_analysis_response(response),
+                    lambda prompt: self._generate_local(image, prompt)
                 )
             
-            generated_ids_trimmed = [
-                out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-            ]
+            extracted_text, ocr_skipped = "", False
+            if self.policy_checker:
+                print("Extracting text from image for policy analysis...")
+                extracted_text, ocr_skipped = self._extract_text(
+                    image, lambda ocr_image, prompt: self._generate_local(ocr_image, prompt, max_new_tokens=512)
+                )
             
-            response = self.processor.batch_decode(
-                generated_ids_trimmed, 
-                skip_special_tokens=True, 
-                clean_up_tokenization_spaces=False
-            )[0]
+            print("Analyzing with local Qwen2-VL model...")
+            response = self._generate_local(image, self.create_analysis_prompt("full", extracted_text, concerns))
             
-            return self.parse_analysis_response(response)
+            result = self.parse_analysis_response(response)
+            result["image_compliance"]["ocr_skipped"] = ocr_skipped
+            return result
             
         except Exception as e:
             print(f"Local model analysis failed: {e}")
             return self.create_error_response(f"Local model analysis failed: {e}")
 
-    def parse_analysis_response(self, response: str) -> Dict[str, Any]:
+    def _extract_text(self, image: Image.Image, generate) -> tuple:
+        """OCR via the VLM as (text, skipped); skipped when the local detector finds no text"""
+        ocr_image = image
+        if TEXT_DETECTION_ENABLED:
+            detection = self._detect_text(image)
+            if not detection["has_text"]:
+                print("No text regions detected, skipping OCR call")
+                return "", True
+            ocr_image = text_detector.crop_text_regions(image, detection["regions"])
+            print(f"Text detected in {detection['lines']} lines, OCR on {ocr_image.size[0]}x{ocr_image.size[1]} crop")
+        
         try:
-            response_clean = response.strip()
-            
-            if "```json" in response_clean:
-                json_part = response_clean.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_clean:
-                json_part = response_clean.split("```")[1].split("```")[0].strip()
-            elif response_clean.startswith('{') and response_clean.endswith('}'):
-                json_part = response_clean
+            ocr_response = generate(ocr_image, self.create_analysis_prompt("ocr"))
+            
+            if ocr_response.strip() and ocr_response.strip() != "NO_TEXT_FOUND":
+                extracted_text = ocr_response.strip()
+                print(f"Extracted text: {extracted_text[:100]}...")
+                return extracted_text, False
+            
+        except ModelWarmingError:
+            # The analysis call would hit the same cold model; let the caller report it
+            raise
+        except Exception as e:
+            print(f"OCR extraction failed: {e}")
+        return "", False
+
+    def _finish_single_pass(self, result: Dict[str, Any], generate) -> Dict[str, Any]:
+        """Re-check with text-grounded policy sections when the image text hits rules the visual context missed.
+
+        The single-pass prompt only carries the generic visual policy sections.
+        If the extracted text matches a rule-engine category whose policy
+        section was not among them, one more call is made with the sections
+        retrieved for that text (the OCR call is still saved).
+        """
+        compliance = result.get("image_compliance", {})
+        compliance["analysis_passes"] = 1
+        extracted_text = compliance.get("extracted_text", "")
+        if not self.policy_checker or not extracted_text or compliance.get("analysis_method") == "error":
+            return result
+
+        evaluation = rule_engine.evaluate(extracted_text)
+        covered = self.visual_policy_context()["chunk_ids"]
+        missing = []
+        for category in evaluation["categories"]:
+            section = rule_engine.rules[category].get("policy_section")
+            if section and not any(in_section(chunk_id, section) for chunk_id in covered):
+                missing.append(category)
+        if not missing:
+            return result
+
+        print(f"Image text matches {', '.join(missing)}; re-analyzing with text-grounded policy sections...")
+        try:
+            grounded = self.parse_analysis_response(generate(self.create_analysis_prompt("full", extracted_text)))
+        except Exception as e:
+            print(f"Text-grounded pass failed, keeping single-pass result: {e}")
+            return result
+        if grounded["image_compliance"].get("analysis_method") == "error":
+            return result
+        grounded["image_compliance"]["analysis_passes"] = 2
+        return grounded
+
+    @staticmethod
+    def _triage_concerns(triage: Optional[Dict[str, Any]]) -> str:
+        """Prompt note naming what CLIP triage flagged on an escalated image"""
+        if not triage or triage["decision"] != "escalate" or not triage["concerns"]:
+            return ""
+        flagged = ", ".join(f"{c['concept']} ({c['probability']:.2f})" for c in triage["concerns"])
+        return f"""
+FLAGGED FOR CLOSE REVIEW:
+- A visual classifier flagged possible {flagged}
+- Check specifically whether the image shows these, and cite the policy section if it does
+"""
+
+    def create_triage_response(self, triage: Dict[str, Any]) -> Dict[str, Any]:
+        """Verdict for an image CLIP triage rated clean and that has no text, without a VLM call"""
+        return {
+            "image_compliance": {
+                "compliant": True,
+                "violations": [],
+                "risk_score": triage["risk"],
+                "summary": "Routine product imagery with no visible text - cleared by visual triage",
+                "extracted_text": "",
+                "recommendations": [],
+                "analysis_method": "clip_triage",
+                "analysis_passes": 0
+            }
+        }
+
+    @staticmethod
+    def _extract_json(response: str) -> Dict[str, Any]:
+        response_clean = response.strip()
+        
+        if "```json" in response_clean:
+            json_part = response_clean.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_clean:
+            json_part = response_clean.split("```")[1].split("```")[0].strip()
+        elif response_clean.startswith('{') and response_clean.endswith('}'):
+            json_part = response_clean
+        else:
+            start = response_clean.find('{')
+            end = response_clean.rfind('}') + 1
+            if start != -1 and end > start:
+                json_part = response_clean[start:end]
             else:
-                start = response_clean.find('{')
-                end = response_clean.rfind('}') + 1
-                if start != -1 and end > start:
-                    json_part = response_clean[start:end]
-                else:
-                    raise ValueError("No valid JSON found in response")
-            
-            result = json.loads(json_part)
-            
-            required_fields = ['visual_analysis', 'policy_violations', 'compliance_assessment']
-            if not all(field in result for field in required_fields):
-                raise ValueError("Missing required fields in response")
-            
-            formatted_result = {
-                "image_compliance": {
-                    "compliant": result.get('compliance_assessment', {}).get('compliant', False),
-                    "violations": result.get('policy_violations', []),
-                    "risk_score": result.get('compliance_assessment', {}).get('risk_score', 0.5),
-                    "summary": result.get('compliance_assessment', {}).get('summary', 'Analysis completed'),
-                    "extracted_text": result.get('extracted_text', ''),
-                    "visual_analysis": result.get('visual_analysis', {}),
-                    "safety_assessment": result.get('safety_assessment', {}),
-                    "recommendations": result.get('recommendations', []),
-                    "analysis_method": "qwen2vl_api" if self.deployment_mode in ["hf_api", "hf_serverless"] else "qwen2vl_local"
-                }
+                raise ValueError("No valid JSON found in response")
+        
+        return json.loads(json_part)
+
+    def _format_analysis(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        required_fields = ['visual_analysis', 'policy_violations', 'compliance_assessment']
+        if not all(field in result for field in required_fields):
+            raise ValueError("Missing required fields in response")
+        
+        return {
+            "image_compliance": {
+                "compliant": result.get('compliance_assessment', {}).get('compliant', False),
+                "violations": result.get('policy_violations', []),
+                "risk_score": result.get('compliance_assessment', {}).get('risk_score', 0.5),
+                "summary": result.get('compliance_assessment', {}).get('summary', 'Analysis completed'),
+                "extracted_text": result.get('extracted_text', ''),
+                "visual_analysis": result.get('visual_analysis', {}),
+                "safety_assessment": result.get('safety_assessment', {}),
+                "recommendations": result.get('recommendations', []),
+                "analysis_method": "qwen2vl_api" if self.deployment_mode in ["hf_api", "hf_serverless"] else "qwen2vl_local"
             }
-            
-            return formatted_result
+        }
+
+    def parse_analysis_response(self, response: str) -> Dict[str, Any]:
+        try:
+            return self._format_analysis(self._extract_json(response))
             
         except Exception as e:
             print(f"Response parsing error: {e}")
             return self.create_error_response(f"Response parsing failed: {e}")
 
+    def parse_tiled_response(self, response: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """Per-image results by image number; None for images the response is missing or garbled for"""
+        results = [None] * count
+        try:
+            entries = self._extract_json(response).get("images", [])
+        except Exception as e:
+            print(f"Tiled response parsing error: {e}")
+            return results
+        
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get("image", position + 1)) - 1
+                if 0 <= index < count and results[index] is None:
+                    results[index] = self._format_analysis(entry)
+            except (TypeError, ValueError) as e:
+                print(f"Skipping tile entry {position + 1}: {e}")
+        return results
+
     def create_error_response(self, error_msg: str) -> Dict[str, Any]:
         return {
             "image_compliance": {
@@ -575,23 +905,229 @@ Return ONLY the JSON response."""
             }
         }
 
+    def create_warming_response(self, error: ModelWarmingError) -> Dict[str, Any]:
+        """No verdict: the HF model is still cold-starting, so the image should be resubmitted, not rejected"""
+        retry_after = math.ceil(error.retry_after) if error.retry_after else None
+        summary = f"Vision model {error.model_key} is warming up"
+        return {
+            "image_compliance": {
+                "compliant": None,
+                "violations": [],
+                "risk_score": None,
+                "summary": f"{summary}, retry after {retry_after}s" if retry_after else f"{summary}, retry later",
+                "extracted_text": "",
+                "analysis_method": "model_warming",
+                "retry_after": retry_after
+            }
+        }
+
+    @property
+    def policy_version(self) -> str:
+        """Cache key for the policy the verdicts were made under"""
+        if self.policy_checker:
+            return f"{self.policy_checker.policy_version}:{self.analysis_mode}"
+        return f"{hashlib.sha256(self.policy_content.encode('utf-8')).hexdigest()[:16]}:{self.analysis_mode}"
+
+    @staticmethod
+    def _detect_text(image: Image.Image) -> Dict[str, Any]:
+        """text_detector.detect, run once per preprocessed image (cache signature, triage skip and OCR crop share it)"""
+        detection = image.info.get("text_detection")
+        if detection is None:
+            detection = text_detector.detect(image)
+            image.info["text_detection"] = detection
+        return detection
+
+    def _prepare_image(self, image_input: Union[str, Image.Image, np.ndarray]) -> tuple:
+        """(image, hashes, triage, result); result is set when the image needs no VLM analysis.
+
+        hashes is (pHash, dHash, text signature) for the near-duplicate cache, or None when it is off.
+        """
+        image = self.preprocess_image(image_input)
+        print("Image preprocessed")
+        
+        hashes = None
+        if IMAGE_HASH_CACHE_ENABLED:
+            hashes = (*image_hash_cache.hashes(image), text_signature(image, self._detect_text(image)["regions"]))
+            cached = image_hash_cache.lookup(hashes[0], hashes[1], self.policy_version, hashes[2])
+            if cached:
+                print(f"Near-duplicate image (distance {cached['distance']}), reusing verdict")
+                result = cached["verdict"]
+                result["image_compliance"]["image_cache"] = {
+                    "distance": cached["distance"],
+                    "age_seconds": cached["age_seconds"]
+                }
+                return image, hashes, None, result
+        
+        triage = None
+        if IMAGE_TRIAGE_MODE != "off":
+            triage = image_triage.triage(image)
+            print(f"CLIP triage: {triage['decision']} (risk {triage['risk']})")
+            if triage["decision"] == "clean" and IMAGE_TRIAGE_MODE == "skip":
+                # CLIP cannot read claims, so only text-free images skip the VLM
+                if TEXT_DETECTION_ENABLED and not self._detect_text(image)["has_text"]:
+                    print("Clean and no text detected, skipping the VLM call")
+                    result = self.create_triage_response(triage)
+                    result["image_compliance"]["triage"] = triage
+                    return image, hashes, triage, result
+        
+        return image, hashes, triage, None
+
+    def _store_result(self, result: Dict[str, Any], hashes, triage) -> Dict[str, Any]:
+        if triage:
+            result["image_compliance"]["triage"] = triage
+        # Verdicts from the reduced prompt or a triage skip are only as good as CLIP's
+        # call on this image; near-duplicates get their own look instead of inheriting them
+        cacheable = (
+            result.get("image_compliance", {}).get("analysis_method") not in ("error", "model_warming", "clip_triage")
+            and not (triage and triage["decision"] == "clean")
+        )
+        if hashes and cacheable:
+            image_hash_cache.put(hashes[0], hashes[1], self.policy_version, hashes[2], result)
+        return result
+
     def check_image_compliance(self, image_input: Union[str, Image.Image, np.ndarray]) -> Dict[str, Any]:
         try:
             print("Starting image compliance analysis...")
             
-            image = self.preprocess_image(image_input)
-            print("Image preprocessed")
+            image, hashes, triage, result = self._prepare_image(image_input)
+            if result is not None:
+                return result
             
             print("Analyzing with Qwen2-VL...")
-            result = self.analyze_image_with_qwen(image)
+            result = self._store_result(self.analyze_image_with_qwen(image, triage), hashes, triage)
             
             print("Image compliance analysis complete!")
             return result
             
+        except ModelWarmingError as e:
+            print(f"Compliance check deferred: {e}")
+            return self.create_warming_response(e)
         except Exception as e:
             print(f"Compliance check failed: {e}")
             return self.create_error_response(str(e))
 
+    def _map_concurrently(self, fn, items: list) -> list:
+        """In local mode items run concurrently so their VLM calls share batches"""
+        workers = self.local_batcher.max_batch_size if self.local_batcher else 1
+        if workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(items)), thread_name_prefix="image-check") as pool:
+            return list(pool.map(fn, items))
+
+    def check_images_compliance(self, image_inputs: List[Union[str, Image.Image, np.ndarray]]) -> List[Dict[str, Any]]:
+        """Results in input order"""
+        if not image_inputs:
+            return []
+        if IMAGE_TILING_MODE != "off" and len(image_inputs) > 1:
+            return self._check_images_tiled(image_inputs)
+        return self._map_concurrently(self.check_image_compliance, image_inputs)
+
+    def _tiling_layout(self) -> str:
+        # Multi-image messages need the chat completions router; the serverless VQA task and the
+        # local batcher take one image per sequence
+        if IMAGE_TILING_MODE == "multi_image" and self.deployment_mode == "hf_api":
+            return "multi_image"
+        return "grid"
+
+    def _check_images_tiled(self, image_inputs: List[Union[str, Image.Image, np.ndarray]]) -> List[Dict[str, Any]]:
+        """Several images per VLM call, one labeled grid or one multi-image message.
+
+        Cached and triage-skipped images are answered first. Escalated images,
+        images that would not fit a group, and tiles the response leaves out or
+        garbles are analyzed one per call.
+        """
+        results = [None] * len(image_inputs)
+        prepared = []
+        for index, image_input in enumerate(image_inputs):
+            try:
+                image, hashes, triage, result = self._prepare_image(image_input)
+            except Exception as e:
+                print(f"Compliance check failed: {e}")
+                results[index] = self.create_error_response(str(e))
+                continue
+            if result is not None:
+                results[index] = result
+            else:
+                prepared.append((index, image, hashes, triage))
+        
+        shared = [item for item in prepared if not (item[3] and item[3]["decision"] == "escalate")]
+        individual = [item for item in prepared if item[3] and item[3]["decision"] == "escalate"]
+        
+        layout = self._tiling_layout()
+        if layout == "multi_image":
+            groups = pack_multi_image([item[1] for item in shared])
+        else:
+            groups = pack_grid(len(shared), grid_capacity())
+        jobs = [[shared[i] for i in group] for group in groups if len(group) > 1]
+        individual += [shared[group[0]] for group in groups if len(group) == 1]
+        
+        def analyze_group(group):
+            return group, self._analyze_tiles([item[1] for item in group], layout)
+        
+        for group, tile_results in self._map_concurrently(analyze_group, jobs):
+            for item, tile_result in zip(group, tile_results):
+                if tile_result is None:
+                    individual.append(item)
+                else:
+                    results[item[0]] = self._store_result(tile_result, item[2], item[3])
+        
+        if individual:
+            print(f"Analyzing {len(individual)} images individually")
+        
+        def analyze_one(item):
+            index, image, hashes, triage = item
+            return index, self._store_result(self.analyze_image_with_qwen(image, triage), hashes, triage)
+        
+        for index, result in self._map_concurrently(analyze_one, individual):
+            results[index] = result
+        return results
+
+    def _analyze_tiles(self, images: List[Image.Image], layout: str) -> List[Optional[Dict[str, Any]]]:
+        """Per-image results of one tiled VLM call; None where the image needs its own call"""
+        count = len(images)
+        prompt = self.create_tiled_prompt(count, layout)
+        max_tokens = min(4096, 640 * count + 256)
+        try:
+            if layout == "multi_image":
+                print(f"Analyzing {count} images in one multi-image request...")
+                response = self.query_huggingface_api(images, prompt, max_tokens=max_tokens)
+            else:
+                grid = compose_grid(images, vlm_payload_encoder.max_pixels)
+                print(f"Analyzing {count} images as a {grid.size[0]}x{grid.size[1]} grid...")
+                if self.deployment_mode in ["hf_api", "hf_serverless"]:
+                    response = self.query_huggingface_api(grid, prompt, max_tokens=max_tokens)
+                else:
+                    if self.local_loader is None:
+                        raise Exception("Model not loaded. Call initialize() first.")
+                    self.local_loader.get()
+                    response = self._generate_local(grid, prompt, max_new_tokens=max_tokens)
+        except ModelWarmingError as e:
+            # Individual calls would wait on the same cold model, one after another
+            print(f"Tiled analysis deferred: {e}")
+            return [self.create_warming_response(e) for _ in images]
+        except Exception as e:
+            print(f"Tiled analysis failed, falling back to individual calls: {e}")
+            return [None] * count
+        
+        tile_results = self.parse_tiled_response(response, count)
+        finished = []
+        for tile, (image, result) in enumerate(zip(images, tile_results)):
+            if result is None:
+                finished.append(None)
+                continue
+            generate = (lambda prompt, image=image: self.query_huggingface_api(image, prompt)) \
+                if self.deployment_mode in ["hf_api", "hf_serverless"] else \
+                (lambda prompt, image=image: self._generate_local(image, prompt))
+            # Same text-grounded re-check as a single-pass result, on this image alone
+            result = self._finish_single_pass(result, generate)
+            result["image_compliance"]["tiling"] = {"layout": layout, "group_size": count, "tile": tile + 1}
+            finished.append(result)
+        missing = finished.count(None)
+        if missing:
+            print(f"Tiled response missing {missing} of {count} images")
+        return finished
+
     def initialize(self):
         print("Initializing Image Compliance Checker...")
         
@@ -0,0 +1,276 @@
+import os
+import copy
+import atexit
+import json
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.reshape(-1):
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail"""
+    pixels = np.asarray(image.convert('L').resize((9, 8), Image.Resampling.BILINEAR), dtype=np.float32)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit perceptual hash: low 8x8 DCT coefficients of a 32x32 thumbnail against their median"""
+    pixels = np.asarray(image.convert('L').resize((32, 32), Image.Resampling.BILINEAR), dtype=np.float32)
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].reshape(-1)
+    # The DC term only tracks overall brightness
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def text_line_hash(image: Image.Image, box: Tuple[int, int, int, int]) -> int:
+    """256-bit difference hash of one text row, on a 33x8 grid that follows the row's wide shape"""
+    x, y, w, h = box
+    pixels = np.asarray(image.crop((x, y, x + w, y + h)).convert('L').resize((33, 8), Image.Resampling.BILINEAR),
+                        dtype=np.float32)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def text_signature(image: Image.Image, regions: List[Tuple[int, int, int, int]]) -> List[Dict[str, Any]]:
+    """Per text row, top to bottom: its box relative to the image size and its line hash.
+
+    Two creatives on the same template with different copy ("Summer sale" vs
+    "Buy Xanax without a prescription") are a few bits apart on pHash/dHash,
+    since text is a small share of the pixels, but differ here in row widths
+    and row hashes. An empty list means no text was detected.
+    """
+    width, height = image.size
+    return [
+        {
+            "box": [round(x / width, 3), round(y / height, 3), round(w / width, 3), round(h / height, 3)],
+            "hash": f"{text_line_hash(image, (x, y, w, h)):064x}",
+        }
+        for x, y, w, h in sorted(regions, key=lambda box: (box[1], box[0]))
+    ]
+
+
+def text_signatures_match(a: List[Dict[str, Any]], b: List[Dict[str, Any]],
+                          max_distance: int = 40, max_shift: float = 0.05) -> bool:
+    """Same number of text rows, each within max_shift (share of the image side) and max_distance bits"""
+    if len(a) != len(b):
+        return False
+    for row_a, row_b in zip(a, b):
+        if any(abs(p - q) > max_shift for p, q in zip(row_a["box"], row_b["box"])):
+            return False
+        if hamming(int(row_a["hash"], 16), int(row_b["hash"], 16)) > max_distance:
+            return False
+    return True
+
+
+def _block_ranges(blocks: int) -> List[Tuple[int, int]]:
+    edges = np.linspace(0, HASH_BITS, blocks + 1).astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+class ImageHashCache:
+    """Prior image verdicts found by perceptual hash within a Hamming distance.
+
+    Re-uploaded creatives (resized, recompressed, re-encoded) keep nearly the
+    same pHash. Hashes are split into max_distance + 1 blocks and indexed per
+    block (a multi-index hash table): two hashes within max_distance bits agree
+    exactly on at least one block, so a lookup only compares the entries
+    sharing a block with the query. A candidate must be within max_distance on
+    both pHash and dHash, stored under the same policy version, and have a
+    matching text signature: whole-image hashes barely see the ad copy, so
+    the same template with different text would otherwise get the old verdict.
+
+    Entries are keyed by policy version, pHash and text signature, so two
+    creatives on one template with different copy are both kept. They are
+    evicted least-recently-used beyond max_entries. With a `path` they are
+    persisted as JSON (written atomically every save_every puts, and by
+    save() when anything changed since the last write); without one they
+    live in memory only. Verdicts carry the extracted ad text, so writing
+    them to disk is opt-in (IMAGE_HASH_CACHE_PATH).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000, max_distance: int = 6,
+                 save_every: int = 20, text_max_distance: int = 40):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.text_max_distance = text_max_distance
+        self.save_every = save_every
+
+        self.blocks = _block_ranges(max_distance + 1)
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.tables: List[Dict[int, set]] = [{} for _ in self.blocks]
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    @staticmethod
+    def hashes(image: Image.Image) -> Tuple[int, int]:
+        return phash(image), dhash(image)
+
+    @staticmethod
+    def _key(p_hash: int, policy_version: str, signature: List[Dict[str, Any]]) -> str:
+        text = hashlib.sha1(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return f"{policy_version}:{p_hash:016x}:{text}"
+
+    def _block_values(self, p_hash: int):
+        for lo, hi in self.blocks:
+            yield (p_hash >> (HASH_BITS - hi)) & ((1 << (hi - lo)) - 1)
+
+    def _index(self, key: str, p_hash: int):
+        for table, value in zip(self.tables, self._block_values(p_hash)):
+            table.setdefault(value, set()).add(key)
+
+    def _unindex(self, key: str, p_hash: int):
+        for table, value in zip(self.tables, self._block_values(p_hash)):
+            bucket = table.get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[value]
+
+    def lookup(self, p_hash: int, d_hash: int, policy_version: str,
+               signature: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Closest stored verdict as {"verdict", "distance", "age_seconds"}, or None"""
+        with self._lock:
+            candidates = set()
+            for table, value in zip(self.tables, self._block_values(p_hash)):
+                candidates.update(table.get(value, ()))
+
+            best, best_distance = None, None
+            for key in candidates:
+                entry = self.entries[key]
+                if entry["policy_version"] != policy_version:
+                    continue
+                distance = hamming(p_hash, entry["phash"])
+                if distance > self.max_distance or hamming(d_hash, entry["dhash"]) > self.max_distance:
+                    continue
+                if not text_signatures_match(signature, entry["text_signature"], self.text_max_distance):
+                    continue
+                if best_distance is None or distance < best_distance:
+                    best, best_distance = key, distance
+
+            if best is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.entries.move_to_end(best)
+            self.stats["hits"] += 1
+            entry = self.entries[best]
+            return {
+                "verdict": copy.deepcopy(entry["verdict"]),
+                "distance": best_distance,
+                "age_seconds": round(time.time() - entry["created"], 1)
+            }
+
+    def put(self, p_hash: int, d_hash: int, policy_version: str, signature: List[Dict[str, Any]],
+            verdict: Dict[str, Any]):
+        key = self._key(p_hash, policy_version, signature)
+        with self._lock:
+            if key in self.entries:
+                self._unindex(key, self.entries[key]["phash"])
+            self.entries[key] = {
+                "phash": p_hash,
+                "dhash": d_hash,
+                "policy_version": policy_version,
+                "text_signature": signature,
+                "verdict": copy.deepcopy(verdict),
+                "created": time.time()
+            }
+            self.entries.move_to_end(key)
+            self._index(key, p_hash)
+
+            while len(self.entries) > self.max_entries:
+                evicted, entry = self.entries.popitem(last=False)
+                self._unindex(evicted, entry["phash"])
+
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self.path or not self._unsaved:
+                return
+            records = [
+                {**entry, "phash": f"{entry['phash']:016x}", "dhash": f"{entry['dhash']:016x}"}
+                for entry in self.entries.values()
+            ]
+            self._unsaved = 0
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"max_distance": self.max_distance, "entries": records}, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Image hash cache save failed: {e}")
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f).get("entries", [])
+        except Exception as e:
+            print(f"Image hash cache load failed, starting empty: {e}")
+            return
+
+        for record in records[-self.max_entries:]:
+            if "text_signature" not in record:
+                # Written before text signatures; its text cannot be checked
+                continue
+            p_hash, d_hash = int(record["phash"], 16), int(record["dhash"], 16)
+            key = self._key(p_hash, record["policy_version"], record["text_signature"])
+            self.entries[key] = {**record, "phash": p_hash, "dhash": d_hash}
+            self._index(key, p_hash)
+        print(f"Image hash cache: {len(self.entries)} verdicts loaded from {self.path}")
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.tables = [{} for _ in self.blocks]
+            self._unsaved += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+image_hash_cache = ImageHashCache(
+    # In memory only unless a path is configured, e.g. .cache/image_verdicts.json
+    path=os.getenv('IMAGE_HASH_CACHE_PATH') or None,
+    max_entries=int(os.getenv('IMAGE_HASH_CACHE_SIZE', '10000')),
+    max_distance=int(os.getenv('IMAGE_HASH_MAX_DISTANCE', '6')),
+    text_max_distance=int(os.getenv('IMAGE_HASH_TEXT_MAX_DISTANCE', '40'))
+)
+atexit.register(image_hash_cache.save)
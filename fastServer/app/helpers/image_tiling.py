@@ -0,0 +1,97 @@
+import os
+import math
+from typing import List, Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.helpers.vlm_payload import QWEN_PIXEL_FACTOR, VLM_MAX_PIXELS, image_tokens, qwen_target_size
+
+# "off", "grid" (one labeled grid image) or "multi_image" (one chat message with N images, HF API only)
+IMAGE_TILING_MODE = os.getenv('IMAGE_TILING_MODE', 'off')
+IMAGE_TILE_MAX = int(os.getenv('IMAGE_TILE_MAX', '4'))
+# Grid: smallest tile side worth analyzing; below it images go out one per call
+IMAGE_TILE_MIN_SIDE = int(os.getenv('IMAGE_TILE_MIN_SIDE', '392'))
+# Multi-image: image tokens per request across all images
+IMAGE_TILE_MAX_TOKENS = int(os.getenv('IMAGE_TILE_MAX_TOKENS', '4096'))
+
+GRID_GAP = 12
+GRID_BACKGROUND = (40, 40, 40)
+
+
+def grid_shape(count: int):
+    columns = math.ceil(math.sqrt(count))
+    return columns, math.ceil(count / columns)
+
+
+def grid_cell_side(count: int, max_pixels: int = VLM_MAX_PIXELS, gap: int = GRID_GAP) -> int:
+    """Largest square tile side (a multiple of 28px) that keeps the whole grid within max_pixels"""
+    columns, rows = grid_shape(count)
+    side = QWEN_PIXEL_FACTOR
+    while (columns * (side + QWEN_PIXEL_FACTOR) + (columns - 1) * gap) * \
+            (rows * (side + QWEN_PIXEL_FACTOR) + (rows - 1) * gap) <= max_pixels:
+        side += QWEN_PIXEL_FACTOR
+    return side
+
+
+def grid_capacity(max_tiles: int = IMAGE_TILE_MAX, min_side: int = IMAGE_TILE_MIN_SIDE,
+                  max_pixels: int = VLM_MAX_PIXELS) -> int:
+    """Most images one grid can hold with tiles of at least min_side (1: tiling not possible)"""
+    for count in range(max_tiles, 1, -1):
+        if grid_cell_side(count, max_pixels) >= min_side:
+            return count
+    return 1
+
+
+def compose_grid(images: List[Image.Image], max_pixels: int = VLM_MAX_PIXELS) -> Image.Image:
+    """Images letterboxed into equal square tiles, numbered 1..N in each tile's top-left corner"""
+    columns, rows = grid_shape(len(images))
+    side = grid_cell_side(len(images), max_pixels)
+    canvas = Image.new("RGB", (columns * side + (columns - 1) * GRID_GAP, rows * side + (rows - 1) * GRID_GAP),
+                       GRID_BACKGROUND)
+    draw = ImageDraw.Draw(canvas)
+    try:
+        font = ImageFont.load_default(size=max(16, side // 12))
+    except TypeError:
+        # Pillow < 10.1: fixed-size bitmap font
+        font = ImageFont.load_default()
+
+    for index, image in enumerate(images):
+        x = (index % columns) * (side + GRID_GAP)
+        y = (index // columns) * (side + GRID_GAP)
+        tile = image.copy()
+        tile.thumbnail((side, side), Image.Resampling.BICUBIC)
+        canvas.paste(tile, (x + (side - tile.width) // 2, y + (side - tile.height) // 2))
+
+        label = str(index + 1)
+        left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+        pad = 4
+        draw.rectangle([x, y, x + right - left + 2 * pad, y + bottom - top + 2 * pad], fill=(255, 255, 0))
+        draw.text((x + pad - left, y + pad - top), label, fill=(0, 0, 0), font=font)
+    return canvas
+
+
+def pack_multi_image(images: List[Image.Image], max_tiles: int = IMAGE_TILE_MAX,
+                     max_tokens: int = IMAGE_TILE_MAX_TOKENS,
+                     max_pixels: int = VLM_MAX_PIXELS) -> List[List[int]]:
+    """Image indices grouped for multi-image requests, in order, within max_tiles and max_tokens"""
+    groups, current, tokens = [], [], 0
+    for index, image in enumerate(images):
+        cost = image_tokens(*qwen_target_size(*image.size, max_pixels=max_pixels))
+        if current and (len(current) >= max_tiles or tokens + cost > max_tokens):
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(index)
+        tokens += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def pack_grid(count: int, capacity: Optional[int] = None) -> List[List[int]]:
+    """Indices 0..count-1 in grids of at most capacity, sized evenly (7 at capacity 4: 4 + 3, not 4 + ... + 1)"""
+    capacity = capacity or grid_capacity()
+    if capacity < 2:
+        return [[index] for index in range(count)]
+    grids = math.ceil(count / capacity)
+    size = math.ceil(count / grids)
+    return [list(range(start, min(start + size, count))) for start in range(0, count, size)]
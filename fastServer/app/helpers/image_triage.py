@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from PIL import Image
+
+# "off", "reduce" (clean images get a short prompt) or "skip" (clean images without text skip the VLM)
+IMAGE_TRIAGE_MODE = os.getenv('IMAGE_TRIAGE_MODE', 'off')
+IMAGE_TRIAGE_POLICY_EMBEDDINGS = os.getenv(
+    'IMAGE_TRIAGE_POLICY_EMBEDDINGS', os.path.join('..', 'embeddings', 'policy_clip_embeddings.npz')
+)
+
+# Zero-shot prompts, CLIP-style. Risky concepts follow the list in
+# embeddings/multimodal_embedding.py (analyze_image_comprehensive), without
+# the ones CLIP cannot judge from pixels (claims, testimonials) or that are
+# not risky on their own (children, luxury goods). Benign anchors give the
+# softmax somewhere to put ordinary product shots.
+RISK_CONCEPTS = [
+    "adult content", "nudity or sexually suggestive content", "violence or blood", "weapons or firearms",
+    "illegal drugs or pills", "alcohol", "cigarettes or tobacco", "gambling or casino chips",
+    "misleading graphics", "before and after weight loss photos", "counterfeit designer goods",
+]
+BENIGN_CONCEPTS = [
+    "a product photo", "food or snacks", "a beverage can or bottle of juice", "clothing or shoes",
+    "electronics or a smartphone", "a car", "a family or friends smiling", "a landscape or travel destination",
+    "a company logo", "furniture or home decor", "cosmetics or skincare products", "a sale banner",
+]
+PROMPT_TEMPLATE = "an advertisement image showing {}"
+# CLIP's learned temperature (logit_scale.exp() for ViT-B-32/openai)
+CLIP_LOGIT_SCALE = 100.0
+
+
+class ClipImageTriage:
+    """Cheap CLIP ViT-B-32 pass that decides how much VLM work an image needs.
+
+    The image embedding is scored against zero-shot concept prompts (risk
+    probability = softmax mass on RISK_CONCEPTS) and against the shipped
+    policy_clip_embeddings.npz chunks. Decisions:
+
+        clean     risk <= clean_below and no policy chunk match: reduced prompt or no VLM call
+        escalate  risk >= escalate_above or a policy chunk match: full prompt with the concerns named
+        review    anything in between: the normal path
+
+    The encoder loads on first use. When open_clip / onnxruntime are missing
+    every image gets "review", i.e. triage is a no-op.
+    """
+
+    def __init__(self, policy_embeddings_path: str = IMAGE_TRIAGE_POLICY_EMBEDDINGS,
+                 clean_below: float = 0.15, escalate_above: float = 0.45, policy_match: float = 0.30,
+                 encoder=None):
+        self.policy_embeddings_path = policy_embeddings_path
+        self.clean_below = clean_below
+        self.escalate_above = escalate_above
+        self.policy_match = policy_match
+
+        self.encoder = encoder
+        self.concept_embeddings = None
+        self.policy_embeddings = None
+        self.policy_chunks: List[str] = []
+        self.error = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {"clean": 0, "review": 0, "escalate": 0, "ms": 0.0}
+
+    @property
+    def available(self) -> bool:
+        self._ensure_loaded()
+        return self.error is None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                if self.encoder is None:
+                    from app.helpers.onnx_encoders import OnnxClipEncoder
+                    self.encoder = OnnxClipEncoder()
+                prompts = [PROMPT_TEMPLATE.format(concept) for concept in RISK_CONCEPTS + BENIGN_CONCEPTS]
+                self.concept_embeddings = self.encoder.encode_texts(prompts)
+                self._load_policy_embeddings()
+                print(f"CLIP image triage ready ({len(prompts)} concepts, {len(self.policy_chunks)} policy chunks)")
+            except Exception as e:
+                self.error = str(e)
+                print(f"CLIP image triage unavailable, every image goes to the VLM: {e}")
+            self._loaded = True
+
+    def _load_policy_embeddings(self):
+        if not os.path.exists(self.policy_embeddings_path):
+            print(f"Policy CLIP embeddings not found at {self.policy_embeddings_path}, scoring concepts only")
+            return
+        # Written by embeddings/multimodal_embedding.py save_embeddings (metadata is a JSON string)
+        data = np.load(self.policy_embeddings_path, allow_pickle=True)
+        embeddings = data["embeddings"].astype(np.float32)
+        if embeddings.shape[1] != self.concept_embeddings.shape[1]:
+            print(f"Policy CLIP embeddings have dimension {embeddings.shape[1]}, "
+                  f"expected {self.concept_embeddings.shape[1]}; ignoring them")
+            return
+        metadata = json.loads(str(data["metadata"])) if "metadata" in data.files else {}
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.policy_embeddings = embeddings / norms
+        self.policy_chunks = metadata.get("chunks", [""] * len(embeddings))
+
+    def _score(self, image_embedding: np.ndarray) -> Dict[str, Any]:
+        logits = CLIP_LOGIT_SCALE * (self.concept_embeddings @ image_embedding)
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        risky = probabilities[:len(RISK_CONCEPTS)]
+        risk = float(risky.sum())
+
+        concerns = [
+            {"concept": RISK_CONCEPTS[i], "probability": round(float(risky[i]), 3)}
+            for i in np.argsort(-risky)[:3] if risky[i] >= 0.05
+        ]
+
+        policy_matches = []
+        if self.policy_embeddings is not None:
+            similarities = self.policy_embeddings @ image_embedding
+            for i in np.argsort(-similarities)[:2]:
+                policy_matches.append({
+                    "chunk": int(i),
+                    "similarity": round(float(similarities[i]), 3),
+                    "preview": self.policy_chunks[i][:80] if i < len(self.policy_chunks) else "",
+                })
+
+        if risk >= self.escalate_above or (policy_matches and policy_matches[0]["similarity"] >= self.policy_match):
+            decision = "escalate"
+        elif risk <= self.clean_below:
+            decision = "clean"
+        else:
+            decision = "review"
+        return {"decision": decision, "risk": round(risk, 3), "concerns": concerns, "policy_matches": policy_matches}
+
+    def triage_batch(self, images: Sequence[Image.Image]) -> List[Dict[str, Any]]:
+        if not images:
+            return []
+        self._ensure_loaded()
+        if self.error:
+            return [{"decision": "review", "risk": None, "concerns": [], "policy_matches": [], "error": self.error}
+                    for _ in images]
+
+        t0 = time.perf_counter()
+        image_embeddings = self.encoder.encode_images(images)
+        results = [self._score(embedding) for embedding in image_embeddings]
+        elapsed = (time.perf_counter() - t0) * 1000.0
+
+        with self._lock:
+            self.stats["ms"] += elapsed
+            for result in results:
+                self.stats[result["decision"]] += 1
+        for result in results:
+            result["ms"] = round(elapsed / len(results), 1)
+        return results
+
+    def triage(self, image: Image.Image) -> Dict[str, Any]:
+        return self.triage_batch([image])[0]
+
+
+image_triage = ClipImageTriage(
+    clean_below=float(os.getenv('IMAGE_TRIAGE_CLEAN_BELOW', '0.15')),
+    escalate_above=float(os.getenv('IMAGE_TRIAGE_ESCALATE_ABOVE', '0.45')),
+    policy_match=float(os.getenv('IMAGE_TRIAGE_POLICY_MATCH', '0.30'))
+)
@@ -0,0 +1,119 @@
+import os
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Tuple
+
+from langdetect.detector_factory import DetectorFactory, PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
+
+# Non-Latin scripts identify the language on their own (unicodedata name prefix -> code)
+SCRIPT_LANGUAGES = {
+    "DEVANAGARI": "hi", "BENGALI": "bn", "GURMUKHI": "pa", "GUJARATI": "gu", "TAMIL": "ta",
+    "TELUGU": "te", "KANNADA": "kn", "MALAYALAM": "ml", "ORIYA": "or", "ARABIC": "ar",
+    "CYRILLIC": "ru", "GREEK": "el", "HEBREW": "he", "THAI": "th", "HANGUL": "ko",
+    "HIRAGANA": "ja", "KATAKANA": "ja", "CJK": "zh",
+}
+
+# Closed-class words (articles, prepositions, pronouns) that are not English words.
+# langdetect's n-gram model alone calls short English product copy French or
+# Italian ("Car insurance quote comparison instant" -> fr 1.0), so short texts
+# only leave English when they also contain one of these.
+FUNCTION_WORDS = {
+    "es": "el los las del y en para una un que es su al por tu nuestro nuestra ahora",
+    "fr": "le les des du et est pour avec une un que au aux sur dans votre vos notre nos vous nous",
+    "de": "der das und mit für ist ein eine einen zum zur dem sie ihr ihre unsere jetzt nicht",
+    "pt": "os as da dos das em para com um uma que na ao seu sua você nosso agora",
+    "it": "il gli di del della per un una che è al nel sul tuo tua nostro ora",
+    "nl": "het een en voor met op niet je jouw onze bij nu",
+    "id": "yang di untuk dengan ini itu dari ke anda kami sekarang",
+}
+
+MIN_LETTERS = int(os.getenv('LANGID_MIN_LETTERS', '12'))
+# Probability the detected language must lead 'en' by before a text leaves the English route
+MIN_MARGIN = float(os.getenv('LANGID_MIN_MARGIN', '0.5'))
+# Texts with fewer words also need a function word of the detected language
+SHORT_TEXT_WORDS = int(os.getenv('LANGID_SHORT_TEXT_WORDS', '10'))
+SCRIPT_SHARE = 0.3
+FALLBACK_LANGUAGE = "en"
+
+
+def _script(char: str) -> str:
+    if char.isascii():
+        return "LATIN"
+    name = unicodedata.name(char, "")
+    return name.split(" ", 1)[0] if name else ""
+
+
+class LanguageIdentifier:
+    """Language ID for routing: Unicode script first, then langdetect for Latin text.
+
+    langdetect samples n-grams at random; the factory is seeded so the same
+    text always routes the same way. A Latin text only leaves English when
+    its language leads 'en' by MIN_MARGIN, and a short one also has to
+    contain a function word of that language. Texts too short or too
+    ambiguous to call fall back to FALLBACK_LANGUAGE, as the langdetect
+    error path always did.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.factory = DetectorFactory()
+        self.factory.load_profile(PROFILES_DIRECTORY)
+        self.factory.set_seed(seed)
+        self.function_words = {language: frozenset(words.split()) for language, words in FUNCTION_WORDS.items()}
+
+    def _script_vote(self, text: str) -> Tuple[str, float, int]:
+        scripts = Counter(_script(char) for char in text if char.isalpha())
+        letters = sum(scripts.values())
+        if not letters:
+            return "", 0.0, 0
+        for script, count in scripts.most_common():
+            if script == "LATIN":
+                continue
+            language = SCRIPT_LANGUAGES.get(script)
+            if language and count / letters >= SCRIPT_SHARE:
+                if script == "CJK" and (scripts.get("HIRAGANA", 0) + scripts.get("KATAKANA", 0)):
+                    language = "ja"
+                return language, count / letters, letters
+        return "", 0.0, letters
+
+    def identify(self, text: str) -> Tuple[str, float]:
+        """(language code, confidence in [0, 1])"""
+        return _identify_cached(self, " ".join(text.lower().split())[:2000])
+
+    def _probabilities(self, text: str):
+        detector = self.factory.create()
+        detector.append(text)
+        return {result.lang: result.prob for result in detector.get_probabilities()}
+
+    def _identify(self, text: str) -> Tuple[str, float]:
+        language, share, letters = self._script_vote(text)
+        if language:
+            return language, round(share, 3)
+        if letters < MIN_LETTERS:
+            return FALLBACK_LANGUAGE, 0.0
+
+        try:
+            probabilities = self._probabilities(text)
+        except LangDetectException:
+            return FALLBACK_LANGUAGE, 0.0
+        best = max(probabilities, key=probabilities.get)
+        margin = probabilities[best] - probabilities.get(FALLBACK_LANGUAGE, 0.0)
+        if best == FALLBACK_LANGUAGE or margin < MIN_MARGIN:
+            return FALLBACK_LANGUAGE, round(probabilities.get(FALLBACK_LANGUAGE, 0.0), 3)
+
+        words = "".join(char if char.isalpha() else " " for char in text).split()
+        if len(words) < SHORT_TEXT_WORDS and not self.function_words.get(best, frozenset()).intersection(words):
+            return FALLBACK_LANGUAGE, 0.0
+        return best, round(margin, 3)
+
+    def detect(self, text: str) -> str:
+        return self.identify(text)[0]
+
+
+@lru_cache(maxsize=int(os.getenv('LANGID_CACHE_SIZE', '4096')))
+def _identify_cached(identifier: LanguageIdentifier, normalized: str) -> Tuple[str, float]:
+    return identifier._identify(normalized)
+
+
+language_identifier = LanguageIdentifier()
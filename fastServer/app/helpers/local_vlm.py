@@ -0,0 +1,166 @@
+import os
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from app.helpers.embedding_service import configure_torch_threads, torch_thread_budget
+
+# "int8" / "int4" weight-only quantization, or "none"
+LOCAL_VLM_QUANTIZATION = os.getenv('LOCAL_VLM_QUANTIZATION', 'int8')
+# "auto" (bfloat16 when the CPU has native bf16, else float32), "bfloat16" or "float32"
+LOCAL_VLM_CPU_DTYPE = os.getenv('LOCAL_VLM_CPU_DTYPE', 'auto')
+# "lazy" (first request), "background" (thread started by initialize) or "eager"
+LOCAL_VLM_LOAD = os.getenv('LOCAL_VLM_LOAD', 'background')
+
+
+def cpu_supports_bf16() -> bool:
+    """Native bf16 matmuls (AVX512-BF16 or AMX); elsewhere bf16 is emulated and slower than fp32"""
+    try:
+        import torch
+        return bool(torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def torchao_available() -> bool:
+    try:
+        import torchao.quantization  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cpu_profile(quantization: Optional[str] = None, dtype: Optional[str] = None,
+                num_threads: Optional[int] = None) -> Dict[str, Any]:
+    import torch
+
+    quantization = quantization or LOCAL_VLM_QUANTIZATION
+    dtype = dtype or LOCAL_VLM_CPU_DTYPE
+    if quantization not in ("", "none") and not torchao_available():
+        # Dynamic int8 quantizes fp32 Linear weights; loading bf16 and casting afterwards would
+        # hold a second, full fp32 copy of the model during the cast
+        if dtype not in ("auto", "float32"):
+            print(f"torchao not installed, {quantization} runs as dynamic int8 on float32; loading float32, not {dtype}")
+        dtype = "float32"
+    elif dtype == "auto":
+        dtype = "bfloat16" if cpu_supports_bf16() else "float32"
+    return {
+        "dtype": getattr(torch, dtype),
+        "quantization": quantization,
+        # Shares the process budget with the embedding model; only the benchmark passes its own
+        "num_threads": num_threads or torch_thread_budget(),
+    }
+
+
+def _vlm_class():
+    # The Qwen2-VL class cannot load 2.5 checkpoints, so there is no fallback on older transformers
+    try:
+        from transformers import Qwen2_5_VLForConditionalGeneration
+        return Qwen2_5_VLForConditionalGeneration
+    except ImportError:
+        import transformers
+        raise Exception(f"Local Qwen2.5-VL needs transformers>=4.49 (installed: {transformers.__version__}); "
+                        f"install requirements.txt or use the hf_api deployment mode")
+
+
+def quantize_weights(model, mode: str):
+    """Weight-only quantization of the Linear layers on CPU; returns the mode actually applied"""
+    if mode in (None, "", "none"):
+        return "none"
+
+    try:
+        from torchao.quantization import quantize_, int8_weight_only, int4_weight_only
+        quantize_(model, int4_weight_only() if mode == "int4" else int8_weight_only())
+        return f"torchao-{mode}"
+    except ImportError:
+        pass
+
+    # Without torchao: dynamic int8 (int8 weights, fp32 activations quantized per batch)
+    import torch
+    if mode == "int4":
+        print("torchao not installed, int4 unavailable; using torch dynamic int8 instead")
+    if model.dtype != torch.float32:
+        # Only reached with an explicit profile; cpu_profile loads float32 when this path will be taken
+        model.to(torch.float32)
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return "dynamic-int8"
+
+
+def load_local_vlm(model_name: str, device: str, profile: Optional[Dict[str, Any]] = None):
+    """(model, processor, info) for local Qwen2.5-VL inference"""
+    import torch
+    from transformers import AutoProcessor
+
+    t0 = time.perf_counter()
+    if device == "cuda":
+        model = _vlm_class().from_pretrained(
+            model_name,
+            torch_dtype=torch.float16,
+            device_map="auto",
+            trust_remote_code=True
+        )
+        info = {"dtype": "float16", "quantization": "none"}
+    else:
+        profile = profile or cpu_profile()
+        configure_torch_threads(profile["num_threads"])
+        # low_cpu_mem_usage loads safetensors shards memory-mapped instead of
+        # building a random-initialized copy of the model first
+        model = _vlm_class().from_pretrained(
+            model_name,
+            torch_dtype=profile["dtype"],
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+            trust_remote_code=True
+        )
+        model.eval()
+        applied = quantize_weights(model, profile["quantization"])
+        info = {"dtype": str(model.dtype).replace("torch.", ""), "quantization": applied,
+                "num_threads": profile["num_threads"]}
+
+    processor = AutoProcessor.from_pretrained(model_name, trust_remote_code=True)
+    # Batched generation needs prompts aligned on the right edge
+    processor.tokenizer.padding_side = "left"
+
+    info["load_seconds"] = round(time.perf_counter() - t0, 1)
+    return model, processor, info
+
+
+class LazyModelLoader:
+    """Loads the local model once: on first use, or in a background thread started at startup.
+
+    Requests arriving while a background load runs wait for it instead of
+    starting a second load; a failed load is retried by the next request.
+    """
+
+    def __init__(self, load_fn):
+        self.load_fn = load_fn
+        self._lock = threading.Lock()
+        self._thread = None
+        self.loaded = None
+        self.error = None
+
+    def start_background(self):
+        with self._lock:
+            if self.loaded is not None or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._background_load, name="vlm-loader", daemon=True)
+            self._thread.start()
+
+    def _background_load(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(f"Background model load failed: {e}")
+
+    def get(self):
+        if self.loaded is not None:
+            return self.loaded
+        with self._lock:
+            if self.loaded is None:
+                try:
+                    self.loaded = self.load_fn()
+                    self.error = None
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+        return self.loaded
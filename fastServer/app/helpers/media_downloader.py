@@ -1,9 +1,99 @@
+import io
 import os
 import requests
 import tempfile
 from typing import List, Optional
 from urllib.parse import urlparse
 import uuid
+from requests.adapters import HTTPAdapter
+
+# Images up to this size stay in memory; larger ones spill to a temp file
+MEDIA_MEMORY_LIMIT = int(float(os.getenv('MEDIA_MEMORY_LIMIT_MB', '16')) * 1024 * 1024)
+MEDIA_MAX_DOWNLOAD = int(float(os.getenv('MEDIA_MAX_DOWNLOAD_MB', '100')) * 1024 * 1024)
+
+# Shared keep-alive connections for media hosts (CDNs serve an ad's images from one host)
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+http_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
+
+class DownloadedMedia:
+    """A download held in memory, or in a temp file when it was larger than the memory limit"""
+
+    def __init__(self, url: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                 content_type: Optional[str] = None):
+        self.url = url
+        self.data = data
+        self.path = path
+        self.content_type = content_type
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    def read(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def discard(self):
+        """Drop the bytes and any spill file"""
+        self.data = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def __repr__(self):
+        where = "memory" if self.in_memory else self.path
+        return f"DownloadedMedia({self.url}, {where})"
+
+
+def download_media(url: str, memory_limit: int = MEDIA_MEMORY_LIMIT, max_bytes: int = MEDIA_MAX_DOWNLOAD,
+                   spill_dir: Optional[str] = None, file_extension: str = '.tmp') -> DownloadedMedia:
+    """Stream a URL into a bounded in-memory buffer, spilling to disk past memory_limit"""
+    response = http_session.get(url, stream=True, timeout=30)
+    response.raise_for_status()
+    content_type = response.headers.get('Content-Type')
+    declared = int(response.headers.get('Content-Length') or 0)
+    if declared > max_bytes:
+        response.close()
+        raise Exception(f"{url} is {declared // (1024 * 1024)} MB, over the {max_bytes // (1024 * 1024)} MB limit")
+
+    buffer = io.BytesIO()
+    spill, spill_path, received = None, None, 0
+    try:
+        for chunk in response.iter_content(chunk_size=65536):
+            received += len(chunk)
+            if received > max_bytes:
+                raise Exception(f"{url} exceeded the {max_bytes // (1024 * 1024)} MB download limit")
+            if spill is None and (received > memory_limit or declared > memory_limit):
+                fd, spill_path = tempfile.mkstemp(suffix=file_extension, dir=spill_dir)
+                spill = os.fdopen(fd, 'wb')
+                spill.write(buffer.getvalue())
+                buffer = None
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                buffer.write(chunk)
+    except Exception:
+        if spill is not None:
+            spill.close()
+            os.remove(spill_path)
+        raise
+    finally:
+        response.close()
+
+    if spill is not None:
+        spill.close()
+        print(f"Downloaded: {url} -> {spill_path} ({received // 1024} KB, over the memory limit)")
+        return DownloadedMedia(url, path=spill_path, content_type=content_type)
+    return DownloadedMedia(url, data=buffer.getvalue(), content_type=content_type)
+
 
 class MediaDownloader:
     def __init__(self, temp_dir: Optional[str] = None):
@@ -13,7 +103,7 @@ class MediaDownloader:
     def download_file(self, url: str, file_extension: Optional[str] = None) -> str:
         """Download a file from URL and return local path"""
         try:
-            response = requests.get(url, stream=True, timeout=30)
+            response = http_session.get(url, stream=True, timeout=30)
             response.raise_for_status()
             
             # Generate unique filename
@@ -35,17 +125,16 @@ class MediaDownloader:
             print(f"Error downloading {url}: {str(e)}")
             raise Exception(f"Failed to download file from {url}: {str(e)}")
     
-    def download_images(self, urls: List[str]) -> List[str]:
-        """Download multiple images"""
-        local_paths = []
+    def download_images(self, urls: List[str]) -> List[DownloadedMedia]:
+        """Download multiple images, in memory unless they are larger than MEDIA_MEMORY_LIMIT"""
+        images = []
         for url in urls:
             try:
-                path = self.download_file(url, '.jpg')
-                local_paths.append(path)
+                images.append(download_media(url, spill_dir=self.temp_dir, file_extension='.jpg'))
             except Exception as e:
                 print(f"Failed to download image {url}: {str(e)}")
                 continue
-        return local_paths
+        return images
     
     def download_videos(self, urls: List[str]) -> List[str]:
         """Download multiple videos"""
@@ -0,0 +1,279 @@
+import os
+import shutil
+import tempfile
+import threading
+from typing import List, Sequence, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.helpers.embedding_service import torch_thread_budget
+
+ONNX_CACHE_DIR = os.getenv('ONNX_CACHE_DIR', os.path.join('.cache', 'onnx'))
+
+# CLIP ViT-B-32 preprocessing constants (open_clip / OpenAI defaults)
+CLIP_IMAGE_SIZE = 224
+CLIP_MEAN = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+CLIP_STD = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
+
+_export_lock = threading.Lock()
+
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime
+        return onnxruntime
+    except ImportError:
+        raise Exception("onnxruntime not installed. Run: pip install onnxruntime onnx")
+
+
+def _session(model_path: str, num_threads: Optional[int] = None):
+    ort = _require_onnxruntime()
+    options = ort.SessionOptions()
+    # Same process budget as torch, so an ONNX encoder next to the local VLM does not oversubscribe the CPU
+    options.intra_op_num_threads = num_threads or torch_thread_budget()
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _quantize(fp32_path: str, int8_path: str):
+    _require_onnxruntime()
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+
+def _model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '__'))
+
+
+def _export_dir() -> str:
+    # Scratch dir on the same filesystem as the cache so os.replace is a rename
+    os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+    return tempfile.mkdtemp(dir=ONNX_CACHE_DIR, prefix=".export-")
+
+
+def _publish_export(tmp_dir: str, out_dir: str, targets: Sequence[str]):
+    """Move a finished export into out_dir file by file, the target models last.
+
+    _export_lock only serializes threads; other uvicorn workers may export
+    the same model at the same time. Each worker writes into its own scratch
+    dir and every os.replace is atomic, so readers, which check for the
+    targets, never see a partial file and concurrent exports just overwrite
+    each other with identical copies.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    targets = {os.path.basename(target) for target in targets}
+    for name in sorted(os.listdir(tmp_dir), key=lambda name: name in targets):
+        os.replace(os.path.join(tmp_dir, name), os.path.join(out_dir, name))
+
+
+def export_text_encoder(model_name: str, quantize: bool = True) -> str:
+    """Export a sentence-transformers BERT encoder to ONNX (int8 dynamic quantized by default)"""
+    out_dir = _model_dir(model_name)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    target = int8_path if quantize else fp32_path
+
+    with _export_lock:
+        if os.path.exists(target):
+            return target
+
+        print(f"Exporting {model_name} to ONNX...")
+        tmp_dir = _export_dir()
+        try:
+            _export_text_encoder(model_name, tmp_dir, quantize)
+            _publish_export(tmp_dir, out_dir, [target])
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"ONNX text encoder ready: {target}")
+        return target
+
+
+def _export_text_encoder(model_name: str, out_dir: str, quantize: bool):
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+
+    sample = tokenizer(["policy export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        _quantize(fp32_path, os.path.join(out_dir, "model.int8.onnx"))
+
+
+def export_clip_encoders(model_name: str = "ViT-B-32", pretrained: str = "openai", quantize: bool = True):
+    """Export the open_clip image and text towers used by embeddings/multimodal_embedding.py"""
+    out_dir = _model_dir(f"open_clip-{model_name}-{pretrained}")
+    suffix = ".int8.onnx" if quantize else ".onnx"
+    image_path = os.path.join(out_dir, "image" + suffix)
+    text_path = os.path.join(out_dir, "text" + suffix)
+
+    with _export_lock:
+        if os.path.exists(image_path) and os.path.exists(text_path):
+            return image_path, text_path
+
+        print(f"Exporting CLIP {model_name} ({pretrained}) to ONNX...")
+        tmp_dir = _export_dir()
+        try:
+            _export_clip_encoders(model_name, pretrained, tmp_dir, quantize)
+            _publish_export(tmp_dir, out_dir, [image_path, text_path])
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"ONNX CLIP encoders ready: {out_dir}")
+        return image_path, text_path
+
+
+def _export_clip_encoders(model_name: str, pretrained: str, out_dir: str, quantize: bool):
+    import torch
+    import open_clip
+
+    model, _, _ = open_clip.create_model_and_transforms(model_name, pretrained=pretrained)
+    model.eval()
+    tokenizer = open_clip.get_tokenizer(model_name)
+
+    class ImageTower(torch.nn.Module):
+        def forward(self, pixel_values):
+            return model.encode_image(pixel_values)
+
+    class TextTower(torch.nn.Module):
+        def forward(self, input_ids):
+            return model.encode_text(input_ids)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            ImageTower(), (torch.zeros(1, 3, CLIP_IMAGE_SIZE, CLIP_IMAGE_SIZE),),
+            os.path.join(out_dir, "image.onnx"),
+            input_names=["pixel_values"], output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=14
+        )
+        torch.onnx.export(
+            TextTower(), (tokenizer(["policy export sample"]),),
+            os.path.join(out_dir, "text.onnx"),
+            input_names=["input_ids"], output_names=["text_embeds"],
+            dynamic_axes={"input_ids": {0: "batch"}, "text_embeds": {0: "batch"}},
+            opset_version=14
+        )
+
+    if quantize:
+        _quantize(os.path.join(out_dir, "image.onnx"), os.path.join(out_dir, "image.int8.onnx"))
+        _quantize(os.path.join(out_dir, "text.onnx"), os.path.join(out_dir, "text.int8.onnx"))
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class OnnxTextEncoder:
+    """Mean-pooled, L2-normalized sentence embeddings served by onnxruntime.
+
+    Matches sentence-transformers' all-MiniLM-L6-v2 pipeline (mean pooling then
+    Normalize), without loading torch at serving time.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = True, max_length: int = 256, num_threads: Optional[int] = None):
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.max_length = max_length
+        model_path = export_text_encoder(model_name, quantize=quantize)
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(model_path))
+        self.session = _session(model_path, num_threads)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        tokens = self.tokenizer(list(texts), padding=True, truncation=True,
+                                max_length=self.max_length, return_tensors="np")
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _l2_normalize(pooled.astype(np.float32))
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        return self.encode(texts)
+
+
+class OnnxClipEncoder:
+    """CLIP ViT-B-32 image and text embeddings served by onnxruntime"""
+
+    def __init__(self, model_name: str = "ViT-B-32", pretrained: str = "openai", quantize: bool = True, num_threads: Optional[int] = None):
+        import open_clip
+
+        image_path, text_path = export_clip_encoders(model_name, pretrained, quantize)
+        self.tokenizer = open_clip.get_tokenizer(model_name)
+        self.image_session = _session(image_path, num_threads)
+        self.text_session = _session(text_path, num_threads)
+
+    @staticmethod
+    def preprocess(image: Image.Image) -> np.ndarray:
+        image = image.convert('RGB')
+        scale = CLIP_IMAGE_SIZE / min(image.size)
+        resized = image.resize(
+            (max(CLIP_IMAGE_SIZE, round(image.width * scale)), max(CLIP_IMAGE_SIZE, round(image.height * scale))),
+            Image.Resampling.BICUBIC
+        )
+        left = (resized.width - CLIP_IMAGE_SIZE) // 2
+        top = (resized.height - CLIP_IMAGE_SIZE) // 2
+        cropped = resized.crop((left, top, left + CLIP_IMAGE_SIZE, top + CLIP_IMAGE_SIZE))
+        pixels = (np.asarray(cropped, dtype=np.float32) / 255.0 - CLIP_MEAN) / CLIP_STD
+        return pixels.transpose(2, 0, 1)
+
+    def encode_images(self, images: Sequence[Image.Image]) -> np.ndarray:
+        batch = np.stack([self.preprocess(image) for image in images]).astype(np.float32)
+        return _l2_normalize(self.image_session.run(["image_embeds"], {"pixel_values": batch})[0])
+
+    def encode_texts(self, texts: Sequence[str]) -> np.ndarray:
+        input_ids = self.tokenizer(list(texts)).numpy().astype(np.int64)
+        return _l2_normalize(self.text_session.run(["text_embeds"], {"input_ids": input_ids})[0])
+
+
+def create_llama_embedding(encoder: OnnxTextEncoder):
+    """Wrap an OnnxTextEncoder as a llama_index embedding so index builds skip torch too"""
+    from llama_index.core.embeddings import BaseEmbedding
+    from pydantic import PrivateAttr
+
+    class OnnxLlamaEmbedding(BaseEmbedding):
+        _encoder: OnnxTextEncoder = PrivateAttr()
+
+        def __init__(self, onnx_encoder, **kwargs):
+            super().__init__(model_name=onnx_encoder.model_name, **kwargs)
+            self._encoder = onnx_encoder
+
+        def _get_query_embedding(self, query: str) -> List[float]:
+            return self._encoder.encode([query])[0].tolist()
+
+        def _get_text_embedding(self, text: str) -> List[float]:
+            return self._encoder.encode([text])[0].tolist()
+
+        def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+            return self._encoder.encode(texts).tolist()
+
+        async def _aget_query_embedding(self, query: str) -> List[float]:
+            return self._get_query_embedding(query)
+
+    return OnnxLlamaEmbedding(encoder)
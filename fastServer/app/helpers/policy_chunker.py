@@ -0,0 +1,195 @@
+import re
+import hashlib
+from typing import List, Dict, Any, Optional
+
+# Bump when the chunking rules change so persisted indexes are rebuilt.
+CHUNKER_VERSION = "sections-v2"
+
+ROMAN_HEADING = re.compile(r'^([IVX]+)\.\s+(.{1,60}?)\.?$')
+LETTER_HEADING = re.compile(r'^([A-H])\.\s+([^.?:]{1,60})(?:[.?:]\s*(.*))?$')
+SENTENCE_SPLIT = re.compile(r'(?<=[.;!?])\s+')
+
+
+def _slug(text: str, max_len: int = 40) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    return slug[:max_len].rstrip('-') or "section"
+
+
+def _looks_like_title(line: str) -> bool:
+    return (
+        0 < len(line) <= 60
+        and line[0].isalnum()
+        and ' ' in line
+        and line[-1] not in '.;,?!'
+        and ':' not in line[:-1]
+    )
+
+
+def _is_short_heading(line: str, next_line: Optional[str]) -> bool:
+    # Unnumbered headings ("Landing pages", "Invalid Traffic:", "Publishers shall not:")
+    # are short, unpunctuated and followed by a blank line.
+    return _looks_like_title(line) and (next_line is None or not next_line.strip())
+
+
+def _chunk_anchor(body: str, content_hash: str) -> str:
+    """Stable per-chunk ID segment: first words of the chunk plus a short content hash"""
+    return f"{_slug(' '.join(body.split()[:4]), 32)}-{content_hash[:6]}"
+
+
+def _split_long_line(line: str, max_chars: int) -> List[str]:
+    if len(line) <= max_chars:
+        return [line]
+
+    pieces, current = [], ""
+    for sentence in SENTENCE_SPLIT.split(line):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _classify_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    stripped = [line.strip() for line in lines]
+    classified = []
+    blank_run = 2  # start of file counts as a document boundary
+
+    for i, line in enumerate(stripped):
+        if not line:
+            blank_run += 1
+            continue
+
+        following = [l for l in stripped[i + 1:i + 3] if l]
+        next_line = stripped[i + 1] if i + 1 < len(stripped) else None
+        next_nonblank = following[0] if following else None
+        entry = {"line_no": i + 1, "text": line}
+
+        roman = ROMAN_HEADING.match(line)
+        letter = LETTER_HEADING.match(line)
+
+        if blank_run >= 2 and _looks_like_title(line):
+            # A title line after two blank lines (or at the top of the file) opens a new document
+            entry.update(kind="document", title=line)
+        elif roman:
+            entry.update(kind="roman", code=roman.group(1), title=line)
+        elif letter:
+            entry.update(kind="letter", code=letter.group(1),
+                         title=f"{letter.group(1)}. {letter.group(2).strip()}",
+                         body=(letter.group(3) or "").strip())
+        elif _is_short_heading(line, next_line):
+            next_is_heading = (
+                next_nonblank is not None
+                and not next_nonblank.endswith(':')
+                and _is_short_heading(next_nonblank, None)
+                and len(next_nonblank) < 60
+            )
+            if next_is_heading:
+                entry.update(kind="document", title=line)
+            else:
+                entry.update(kind="subheading", title=line.rstrip(':'))
+        else:
+            entry.update(kind="body")
+
+        classified.append(entry)
+        blank_run = 0
+
+    return classified
+
+
+def chunk_policy_sections(text: str, max_chars: int = 600) -> List[Dict[str, Any]]:
+    """Split a structured policy document into one chunk per rule or bullet group.
+
+    Each chunk carries its section path (document > numbered section > lettered
+    section > sub-heading) and an ID made of that path's heading anchors plus
+    an anchor for the chunk itself: a slug of its first words and a hash of
+    its text. IDs do not depend on position, so inserting, removing or
+    editing a rule leaves the IDs of every other chunk unchanged.
+    """
+    path_titles = {"document": None, "roman": None, "letter": None, "subheading": None}
+    path_codes = dict(path_titles)
+    levels = ["document", "roman", "letter", "subheading"]
+
+    chunks: List[Dict[str, Any]] = []
+    seen_ids = set()
+    pending: List[str] = []
+    pending_line = None
+
+    def current_path():
+        return [path_titles[level] for level in levels if path_titles[level]]
+
+    def current_prefix():
+        return "/".join(path_codes[level] for level in levels if path_codes[level]) or "preamble"
+
+    def flush():
+        nonlocal pending, pending_line
+        if not pending:
+            return
+        body = "\n".join(pending)
+        content_hash = hashlib.sha1(body.encode('utf-8')).hexdigest()[:12]
+        base_id = f"{current_prefix()}/{_chunk_anchor(body, content_hash)}"
+        # Identical text twice under one heading: number the repeats in order
+        chunk_id, repeat = base_id, 1
+        while chunk_id in seen_ids:
+            repeat += 1
+            chunk_id = f"{base_id}-{repeat}"
+        seen_ids.add(chunk_id)
+
+        path = current_path()
+        chunks.append({
+            "chunk_id": chunk_id,
+            "section_path": path,
+            "section": " > ".join(path),
+            "text": body,
+            "line_no": pending_line,
+            "content_hash": content_hash
+        })
+        pending, pending_line = [], None
+
+    def set_level(level, title, code):
+        flush()
+        path_titles[level] = title
+        path_codes[level] = code
+        for lower in levels[levels.index(level) + 1:]:
+            path_titles[lower] = None
+            path_codes[lower] = None
+
+    for entry in _classify_lines(text.splitlines()):
+        kind = entry["kind"]
+        if kind == "document":
+            set_level("document", entry["title"], _slug(entry["title"]))
+            continue
+        if kind == "roman":
+            set_level("roman", entry["title"], entry["code"])
+            continue
+        if kind == "letter":
+            set_level("letter", entry["title"], entry["code"])
+            if not entry["body"]:
+                continue
+            line = entry["body"]
+        elif kind == "subheading":
+            set_level("subheading", entry["title"], _slug(entry["title"], 32))
+            continue
+        else:
+            line = entry["text"]
+
+        for piece in _split_long_line(line, max_chars):
+            if pending and len("\n".join(pending)) + len(piece) + 1 > max_chars:
+                flush()
+            if not pending:
+                pending_line = entry["line_no"]
+            pending.append(piece)
+
+    flush()
+    return chunks
+
+
+def in_section(chunk_id: str, section: str) -> bool:
+    """True when chunk_id is the section itself or a chunk under it ("…/I" does not cover "…/II/…")"""
+    return chunk_id == section or chunk_id.startswith(section + "/")
+
+
+def format_chunk_for_prompt(chunk: Dict[str, Any]) -> str:
+    return f"[{chunk['chunk_id']}] {chunk.get('section', '')}\n{chunk['text']}".strip()
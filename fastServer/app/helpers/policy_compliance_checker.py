@@ -4,70 +4,397 @@
 import os
 import json
 import re
+import shutil
+import hashlib
+import tempfile
+import threading
 from dotenv import load_dotenv
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext
+from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
 from llama_index.llms.groq import Groq
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.core import Settings
-from langdetect import detect
+from llama_index.core.schema import TextNode
 import google.generativeai as genai
 from app.helpers.api_key_pool import groq_pool
+from app.helpers.policy_vector_index import PolicyVectorIndex
+from app.helpers.embedding_service import embedding_service
+from app.helpers.hybrid_retriever import HybridPolicyRetriever
+from app.helpers.policy_chunker import chunk_policy_sections, format_chunk_for_prompt, CHUNKER_VERSION
+from app.helpers.rule_engine import rule_engine
+from app.helpers.policy_registry import PolicyRegistry, DEFAULT_POLICY
+from app.helpers.verdict_cache import verdict_cache
+from app.helpers.language_id import language_identifier
 import time
 
 load_dotenv()
 
+EMBED_MODEL_NAME = os.getenv('EMBED_MODEL_NAME', "sentence-transformers/all-MiniLM-L6-v2")
+MULTILINGUAL_EMBED_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# Models whose embedding space is shared across languages: queries in any language retrieve English policy chunks
+MULTILINGUAL_EMBED_MODELS = {
+    MULTILINGUAL_EMBED_MODEL,
+    "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
+    "sentence-transformers/distiluse-base-multilingual-cased-v2",
+}
+GROQ_MODEL = "llama-3.1-8b-instant"
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # "torch" or "onnx" (int8 onnxruntime)
+POLICY_RETRIEVER = os.getenv('POLICY_RETRIEVER', 'hybrid')  # "hybrid" (BM25 + vector) or "vector"
+POLICY_HOT_RELOAD = os.getenv('POLICY_HOT_RELOAD', 'true').lower() == 'true'
+RULE_ENGINE_SHORT_CIRCUIT = os.getenv('RULE_ENGINE_SHORT_CIRCUIT', 'true').lower() == 'true'
+VERDICT_CACHE_ENABLED = os.getenv('VERDICT_CACHE_ENABLED', 'true').lower() == 'true'
+NON_ENGLISH_ROUTE = os.getenv('NON_ENGLISH_ROUTE', 'auto')  # "auto", "shared" (Groq + RAG) or "gemini"
+
+
+def build_policy_nodes(policy_text, reusable=None):
+    """TextNodes for the section chunks of a policy document, keyed by chunk ID"""
+    reusable = reusable or {}
+    nodes = []
+    for chunk in chunk_policy_sections(policy_text):
+        nodes.append(TextNode(
+            id_=chunk["chunk_id"],
+            text=chunk["text"],
+            metadata={
+                "section": chunk["section"],
+                "section_id": chunk["chunk_id"],
+                "content_hash": chunk["content_hash"]
+            },
+            excluded_embed_metadata_keys=["section_id", "content_hash"],
+            excluded_llm_metadata_keys=["content_hash"],
+            # Nodes that already carry an embedding are not re-embedded by VectorStoreIndex
+            embedding=reusable.get((chunk["section"], chunk["content_hash"]))
+        ))
+    return nodes
+
+
+class PolicySnapshot:
+    """Everything derived from one version of the policy file, swapped as a unit on reload"""
+
+    def __init__(self, name=DEFAULT_POLICY, version=None, index=None, query_engine=None, vector_index=None,
+                 retriever=None, policy_content="", source_digest=None):
+        self.name = name
+        self.version = version
+        self.index = index
+        self.query_engine = query_engine
+        self.vector_index = vector_index
+        self.retriever = retriever
+        self.policy_content = policy_content
+        # sha256 of the policy file bytes this snapshot was built from (the file watcher's baseline)
+        self.source_digest = source_digest
+
+
 class PolicyComplianceChecker:
-    def __init__(self, policy_file="policy.txt"):
+    def __init__(self, policy_file="policy.txt", index_cache_dir=None, embed_model_name=None):
         self.policy_file = policy_file
+        self.embed_model_name = embed_model_name or EMBED_MODEL_NAME
+        self.multilingual_retrieval = self.embed_model_name in MULTILINGUAL_EMBED_MODELS
+        self.embedding_backend = EMBEDDING_BACKEND
+        self.index_cache_dir = index_cache_dir or os.getenv('POLICY_INDEX_CACHE_DIR', os.path.join('.cache', 'policy_index'))
         
         # Get API keys from environment variables
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         
-        self.index = None
-        self.query_engine = None
-        self.policy_content = ""
+        self.registry = PolicyRegistry(self._load_snapshot, policy_file)
+        self._groq_llms = {}
+        self._groq_llms_lock = threading.Lock()
         if not self.gemini_api_key:
             raise Exception("GEMINI_API_KEY not found in environment")
 
         genai.configure(api_key=self.gemini_api_key)
         self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
 
-    def _get_fresh_groq_key(self):
-        """Get a fresh API key and recreate client"""
-        key = groq_pool.get_key_with_retry()
-        if key:
-            groq_api_key = key
-            # Update Settings for llamaindex
-            from llama_index.llms.groq import Groq
-            Settings.llm = Groq(model="llama-3.1-8b-instant", api_key=groq_api_key)
-        return key
+    def _groq_llm(self, key):
+        """Shared Groq handle for one API key; handles are never swapped under a running query"""
+        llm = self._groq_llms.get(key)
+        if llm is None:
+            with self._groq_llms_lock:
+                llm = self._groq_llms.get(key)
+                if llm is None:
+                    llm = Groq(model=GROQ_MODEL, api_key=key)
+                    self._groq_llms[key] = llm
+        return llm
+
+    def _call_with_groq(self, fn):
+        """Run fn(llm) with a per-call Groq handle, moving to the next key on 429"""
+        for attempt in range(max(len(groq_pool.keys), 1) * 2):
+            key = groq_pool.wait_for_key()
+            try:
+                return fn(self._groq_llm(key))
+            except Exception as e:
+                if "429" in str(e):
+                    groq_pool.mark_rate_limited(key)
+                    continue
+                raise e
+        raise Exception("All Groq keys exhausted")
+
+    def _query_engine_for(self, llm, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        return snapshot.index.as_query_engine(llm=llm, similarity_top_k=3, response_mode="compact")
     
-    def setup_models(self):
-        key = groq_pool.get_key_with_retry()
-        embed_model = HuggingFaceEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        llm = Groq(model="llama-3.1-8b-instant", api_key=key)
+    def _create_embed_model(self):
+        if self.embedding_backend == "onnx":
+            from app.helpers.onnx_encoders import OnnxTextEncoder, create_llama_embedding
+            encoder = OnnxTextEncoder(self.embed_model_name)
+            return create_llama_embedding(encoder), encoder.encode
 
-        Settings.embed_model = embed_model
-        Settings.llm = llm
+        embed_model = HuggingFaceEmbedding(model_name=self.embed_model_name)
+        return embed_model, embed_model.get_text_embedding_batch
 
-    def load_policy_documents(self):
-        if not os.path.exists(self.policy_file):
-            raise FileNotFoundError(f"Policy file {self.policy_file} not found")
+    def setup_models(self):
+        key = groq_pool.wait_for_key()
+        embed_model, encode_fn = self._create_embed_model()
 
-        documents = SimpleDirectoryReader(input_files=[self.policy_file]).load_data()
-        self.index = VectorStoreIndex.from_documents(documents)
-        self.query_engine = self.index.as_query_engine(
+        # Set once at startup as llama_index's default; request paths pass
+        # explicit per-key handles and never touch Settings again.
+        Settings.embed_model = embed_model
+        Settings.llm = self._groq_llm(key)
+        embedding_service.configure(encode_fn, f"{self.embed_model_name}:{self.embedding_backend}")
+        print(f"Embedding backend: {self.embedding_backend}")
+
+    def _index_cache_key(self, policy_bytes):
+        """Content hash of the policy text plus the embedding model, backend and chunker version"""
+        hasher = hashlib.sha256(policy_bytes)
+        hasher.update(self.embed_model_name.encode('utf-8'))
+        hasher.update(self.embedding_backend.encode('utf-8'))
+        hasher.update(CHUNKER_VERSION.encode('utf-8'))
+        return hasher.hexdigest()[:16]
+
+    def _load_persisted_index(self, cache_path):
+        try:
+            storage_context = StorageContext.from_defaults(persist_dir=cache_path)
+            return load_index_from_storage(storage_context)
+        except Exception as e:
+            print(f"Persisted policy index unreadable, rebuilding: {e}")
+            shutil.rmtree(cache_path, ignore_errors=True)
+            return None
+
+    @staticmethod
+    def _reusable_embeddings(index):
+        """Embeddings of an existing index keyed by (section, content_hash)"""
+        reusable = {}
+        if index is None:
+            return reusable
+        for node_id, node in index.docstore.docs.items():
+            embedding = index.vector_store.get(node_id)
+            if embedding is not None and "content_hash" in node.metadata:
+                reusable[(node.metadata.get("section"), node.metadata["content_hash"])] = embedding
+        return reusable
+
+    def _build_and_persist_index(self, cache_path, nodes, policy_file):
+        reused = sum(1 for node in nodes if node.embedding is not None)
+        print(f"Embedding {len(nodes) - reused} new or changed policy chunks ({reused} reused)")
+        index = VectorStoreIndex(nodes)
+
+        # Persist into a scratch dir and rename into place so concurrent
+        # workers never load a half-written index.
+        os.makedirs(self.index_cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.index_cache_dir, prefix=".build-")
+        try:
+            index.storage_context.persist(persist_dir=tmp_path)
+            with open(os.path.join(tmp_path, "cache_meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({
+                    "policy_file": os.path.abspath(policy_file),
+                    "embed_model": self.embed_model_name,
+                    "embedding_backend": self.embedding_backend,
+                    "created_at": time.time()
+                }, f)
+            os.rename(tmp_path, cache_path)
+        except OSError:
+            # Another worker won the race; its copy is identical.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self._prune_stale_indexes(os.path.basename(cache_path), policy_file)
+        return index
+
+    def _prune_stale_indexes(self, current_key, policy_file):
+        """Remove older indexes of the same policy file; other registry policies keep theirs"""
+        policy_file = os.path.abspath(policy_file)
+        try:
+            for name in os.listdir(self.index_cache_dir):
+                if name == current_key or name.startswith('.'):
+                    continue
+                path = os.path.join(self.index_cache_dir, name)
+                try:
+                    with open(os.path.join(path, "cache_meta.json"), 'r', encoding='utf-8') as f:
+                        owner = json.load(f).get("policy_file")
+                except (OSError, ValueError):
+                    owner = None
+                if owner in (None, policy_file):
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+    def _load_snapshot(self, name, policy_file, previous=None):
+        """Build a complete PolicySnapshot for one registry policy file.
+
+        With a previous snapshot, unchanged chunks keep their embeddings and
+        only new or edited chunks go through the embedding model.
+        """
+        if not os.path.exists(policy_file):
+            raise FileNotFoundError(f"Policy file {policy_file} not found")
+
+        with open(policy_file, 'rb') as f:
+            policy_bytes = f.read()
+        policy_text = policy_bytes.decode('utf-8')
+
+        cache_key = self._index_cache_key(policy_bytes)
+        if previous is not None and previous.version == cache_key:
+            return previous
+        cache_path = os.path.join(self.index_cache_dir, cache_key)
+
+        index = None
+        if os.path.isdir(cache_path):
+            index = self._load_persisted_index(cache_path)
+            if index is not None:
+                print(f"Policy index loaded from cache: {cache_path}")
+
+        if index is None:
+            print("Building policy index (policy or embedding model changed)...")
+            reusable = self._reusable_embeddings(previous.index if previous else None)
+            index = self._build_and_persist_index(cache_path, build_policy_nodes(policy_text, reusable), policy_file)
+            print(f"Policy index persisted: {cache_path}")
+
+        if name == DEFAULT_POLICY:
+            for category, section in rule_engine.unresolved_sections(index.docstore.docs.keys()).items():
+                print(f"Rule category {category} maps to policy section {section}, which is not in {policy_file}")
+
+        query_engine = index.as_query_engine(
             similarity_top_k=3,
             response_mode="compact"
         )
+        vector_index = self._build_vector_index(index, name)
+        retriever = None
+        if vector_index is not None and POLICY_RETRIEVER == "hybrid":
+            retriever = HybridPolicyRetriever(vector_index, embedding_service.embed_batch)
+
+        return PolicySnapshot(name, cache_key, index, query_engine, vector_index, retriever, policy_text,
+                              hashlib.sha256(policy_bytes).hexdigest())
+
+    def load_policy_documents(self):
+        self.registry.get(DEFAULT_POLICY)
+        print(f"Policy document loaded: {self.policy_file} (version {self.policy_version})")
+
+    def reload_policy(self, name=DEFAULT_POLICY):
+        """Rebuild a policy index from its current file and swap it in.
+
+        Requests already running keep the snapshot they started with; new
+        requests pick up the new one. Returns True when the policy changed.
+        """
+        return self.registry.reload(name)
+
+    def start_policy_watcher(self, interval=None):
+        self.registry.start_watching(interval or float(os.getenv('POLICY_WATCH_INTERVAL', '5')))
+
+    def policy_snapshots(self, target_region=None, sector=None):
+        """Snapshots of every registry policy that applies to an ad (global policy first)"""
+        return self.registry.snapshots_for(target_region, sector)
+
+    def policy_version_for(self, target_region=None, sector=None):
+        return "+".join(f"{s.name}:{s.version}" for s in self.policy_snapshots(target_region, sector))
+
+    @property
+    def snapshot(self):
+        return self.registry.snapshots.get(DEFAULT_POLICY) or PolicySnapshot()
+
+    @property
+    def policy_version(self):
+        return self.snapshot.version
+
+    @property
+    def index(self):
+        return self.snapshot.index
+
+    @property
+    def query_engine(self):
+        return self.snapshot.query_engine
+
+    @property
+    def vector_index(self):
+        return self.snapshot.vector_index
+
+    @property
+    def retriever(self):
+        return self.snapshot.retriever
+
+    @property
+    def policy_content(self):
+        return self.snapshot.policy_content
+
+    def _build_vector_index(self, index, policy_name=DEFAULT_POLICY):
+        """Lift the chunk embeddings already stored in the llama_index vector store into a numpy index"""
+        try:
+            chunks, embeddings = [], []
+            for node_id, node in index.docstore.docs.items():
+                embedding = index.vector_store.get(node_id)
+                if embedding is None:
+                    continue
+                chunks.append({**node.metadata, "chunk_id": node_id, "text": node.get_content(), "policy": policy_name})
+                embeddings.append(embedding)
+
+            if not chunks:
+                return None
 
-        with open(self.policy_file, 'r', encoding='utf-8') as f:
-            self.policy_content = f.read()
+            vector_index = PolicyVectorIndex(embeddings, chunks, {"embed_model": self.embed_model_name})
+            print(f"Policy vector index ready: {len(vector_index)} chunks")
+            return vector_index
+        except Exception as e:
+            print(f"Policy vector index unavailable, falling back to query engine: {e}")
+            return None
+
+    def _combine_policy_sections(self, relevant_sections):
+        if not relevant_sections:
+            return self.policy_content[:2000]
+
+        combined_policy = "\n\n--- POLICY SECTION ---\n\n".join(relevant_sections[:3])
+
+        if len(combined_policy) > 4000:
+            combined_policy = combined_policy[:4000] + "\n\n[Additional policy sections truncated...]"
+
+        return combined_policy
+
+    @staticmethod
+    def _search_snapshot(snapshot, queries, top_k):
+        if snapshot.retriever is not None:
+            return snapshot.retriever.search_batch(queries, top_k=top_k)
+        query_embeddings = embedding_service.embed_batch(queries)
+        return snapshot.vector_index.search_batch(query_embeddings, top_k=top_k)
+
+    def search_policy_chunks(self, queries, top_k=3, snapshots=None):
+        """Top-k policy chunks per query string, best first, across the given policy snapshots"""
+        queries = list(queries)
+        snapshots = [s for s in (snapshots or [self.snapshot]) if s.vector_index is not None]
+        if len(snapshots) == 1:
+            return self._search_snapshot(snapshots[0], queries, top_k)
+
+        merged = [[] for _ in queries]
+        for snapshot in snapshots:
+            for hits, results in zip(merged, self._search_snapshot(snapshot, queries, top_k)):
+                hits.extend(results)
+        return [sorted(hits, key=lambda hit: hit["score"], reverse=True)[:top_k] for hits in merged]
+
+    def extract_relevant_policy_sections(self, ad_text, target_region=None, sector=None, snapshots=None):
+        if self.vector_index is None:
+            return self._call_with_groq(lambda llm: self._extract_sections_with_query_engine(ad_text, llm))
 
-        print(f"Policy document loaded: {self.policy_file}")
+        try:
+            snapshots = snapshots or self.policy_snapshots(target_region, sector)
+            relevant_sections = []
+            seen = set()
+            for hits in self.search_policy_chunks([ad_text[:1000]], top_k=3, snapshots=snapshots):
+                for hit in hits:
+                    key = (hit.get("policy"), hit["chunk_id"])
+                    if key not in seen and len(hit["text"].strip()) > 20:
+                        seen.add(key)
+                        relevant_sections.append(format_chunk_for_prompt(hit))
+
+            return self._combine_policy_sections(relevant_sections)
+
+        except Exception as e:
+            print(f"Error extracting policy sections: {e}")
+            return self.policy_content[:2000]
 
-    def extract_relevant_policy_sections(self, ad_text):
+    def _extract_sections_with_query_engine(self, ad_text, llm):
         try:
+            query_engine = self._query_engine_for(llm)
             policy_search_queries = [
                 f"What policies apply to this content: {ad_text[:150]}",
                 f"Policy violations and restrictions for: {ad_text[:100]}",
@@ -79,9 +406,7 @@ class PolicyComplianceChecker:
 
             for query in policy_search_queries:
                 try:
-                    import time
-                    time.sleep(1)
-                    response = self.query_engine.query(query)
+                    response = query_engine.query(query)
                     policy_text = str(response).strip()
 
                     if policy_text and len(policy_text) > 20:
@@ -91,35 +416,36 @@ class PolicyComplianceChecker:
                     print(f"Policy search failed for query: {query[:50]}...")
                     continue
 
-            if relevant_sections:
-                combined_policy = "\n\n--- POLICY SECTION ---\n\n".join(relevant_sections[:3])
-
-                if len(combined_policy) > 4000:
-                    combined_policy = combined_policy[:4000] + "\n\n[Additional policy sections truncated...]"
-
-                return combined_policy
-            else:
-                return self.policy_content[:2000]
+            return self._combine_policy_sections(relevant_sections)
 
         except Exception as e:
             print(f"Error extracting policy sections: {e}")
             return self.policy_content[:2000]
 
     def detect_language(self, text):
-        try:
-            lang = detect(text)
-            return lang
-        except:
-            return 'en'
-
-    def create_groq_prompt(self, ad_text):
+        return language_identifier.detect(text)
+
+    @staticmethod
+    def _format_rule_hints(rule_hints):
+        if not rule_hints:
+            return ""
+        return f"""
+PRE-SCREEN FLAGS (keyword rule matches with their policy sections; confirm or dismiss them in context):
+{rule_hints}
+"""
+
+    def create_groq_prompt(self, ad_text, rule_hints="", policy_sections="", detected_lang='en'):
+        retrieved = f"""
+RELEVANT POLICY SECTIONS (Retrieved from policy database):
+{policy_sections}
+""" if policy_sections else ""
         return f"""You are an expert advertisement policy compliance analyzer.
 
 Analyze the following advertisement text against the loaded policy documents and provide a detailed compliance assessment.
-
-ADVERTISEMENT TEXT:
+{retrieved}
+ADVERTISEMENT TEXT{"" if detected_lang == 'en' else f" (Language: {detected_lang}; judge it in its own cultural context)"}:
 {ad_text}
-
+{self._format_rule_hints(rule_hints)}
 Please analyze this advertisement and return your response in the following JSON format ONLY:
 
 {{
@@ -145,7 +471,7 @@ Focus on:
 
 Return ONLY the JSON response, no additional text."""
 
-    def create_gemini_prompt_with_rag_sections(self, ad_text, detected_lang, relevant_policy_sections):
+    def create_gemini_prompt_with_rag_sections(self, ad_text, detected_lang, relevant_policy_sections, rule_hints=""):
         return f"""You are an expert advertisement policy compliance analyzer with multilingual capabilities.
 
 RELEVANT POLICY SECTIONS (Retrieved from policy database):
@@ -153,7 +479,7 @@ RELEVANT POLICY SECTIONS (Retrieved from policy database):
 
 ADVERTISEMENT TEXT (Language: {detected_lang}):
 {ad_text}
-
+{self._format_rule_hints(rule_hints)}
 ANALYSIS INSTRUCTIONS:
 1. Analyze the advertisement against the SPECIFIC policy sections provided above
 2. The policy sections were retrieved based on the advertisement content using semantic search
@@ -167,7 +493,7 @@ Please analyze this advertisement and return your response in the following JSON
   "compliant": true/false,
   "violations": [
     {{
-      "policy_section": "specific policy rule from the sections above",
+      "policy_section": "section id in brackets and rule name from the sections above",
       "violation": "detailed description of the violation",
       "confidence": 0.0-1.0,
       "evidence": "specific text from the advertisement that violates the policy"
@@ -194,46 +520,31 @@ RESPONSE REQUIREMENTS:
 
 Return ONLY the JSON response, no additional text."""
 
-    def analyze_with_groq(self, ad_text):
-        for attempt in range(len(groq_pool.keys)):
-            try:
-                prompt = self.create_groq_prompt(ad_text)
-                response = self.query_engine.query(prompt)
-                return self.parse_response(response, ad_text, "groq_rag")
-            except Exception as e:
-                if "429" in str(e):
-                    key = groq_pool.get_key_with_retry()
-                    groq_pool.mark_rate_limited(key)
-                    if not self._get_fresh_groq_key():
-                        time.sleep(10)  # Wait if all keys exhausted
-                        continue
-                else:
-                    raise e
-        raise Exception("All Groq keys exhausted")
-
-    def analyze_with_gemini_rag_enhanced(self, ad_text, detected_lang):
+    def analyze_with_groq(self, ad_text, rule_hints="", target_region=None, sector=None, detected_lang='en'):
+        snapshot = self.snapshot
+        if snapshot.vector_index is not None:
+            # Retrieval needs no LLM; one completion call per ad
+            policy_sections = self.extract_relevant_policy_sections(ad_text, target_region, sector)
+            prompt = self.create_groq_prompt(ad_text, rule_hints, policy_sections, detected_lang)
+            response = self._call_with_groq(lambda llm: llm.complete(prompt))
+        else:
+            prompt = self.create_groq_prompt(ad_text, rule_hints, detected_lang=detected_lang)
+            response = self._call_with_groq(lambda llm: self._query_engine_for(llm, snapshot).query(prompt))
+
+        result = self.parse_response(response, ad_text, "groq_rag")
+        if detected_lang != 'en':
+            result["detected_language"] = detected_lang
+        return result
+
+    def analyze_with_gemini_rag_enhanced(self, ad_text, detected_lang, rule_hints="", target_region=None, sector=None):
         try:
-            # Handle Groq API for policy sections with key rotation
-            relevant_policy_sections = None
-            for attempt in range(len(groq_pool.keys)):
-                try:
-                    relevant_policy_sections = self.extract_relevant_policy_sections(ad_text)
-                    break  # Success, exit loop
-                except Exception as e:
-                    if "429" in str(e):
-                        key = groq_pool.get_key_with_retry()
-                        groq_pool.mark_rate_limited(key)
-                        if not self._get_fresh_groq_key():
-                            time.sleep(10)
-                            continue
-                    else:
-                        raise e
-            
+            relevant_policy_sections = self.extract_relevant_policy_sections(ad_text, target_region, sector)
+
             if not relevant_policy_sections:
                 raise Exception("Failed to extract policy sections")
             
             # Gemini call (no key rotation needed)
-            prompt = self.create_gemini_prompt_with_rag_sections(ad_text, detected_lang, relevant_policy_sections)
+            prompt = self.create_gemini_prompt_with_rag_sections(ad_text, detected_lang, relevant_policy_sections, rule_hints)
             response = self.gemini_model.generate_content(prompt)
             return self.parse_gemini_response(response.text, ad_text, detected_lang)
             
@@ -327,20 +638,71 @@ Return ONLY the JSON response, no additional text."""
                 "analysis_method": "rag_to_gemini_parse_error"
             }
 
-    def check_compliance(self, ad_text):
+    @staticmethod
+    def _reused_verdict(cached, ad_text):
+        verdict = cached["verdict"]
+        verdict["processed_content"] = ad_text[:200]
+        verdict["verdict_reused"] = True
+        verdict["verdict_cache"] = {
+            "similarity": round(cached["similarity"], 4),
+            "source_text_hash": cached["text_hash"],
+            "original_analysis_method": verdict.get("analysis_method")
+        }
+        verdict["analysis_method"] = "semantic_verdict_cache"
+        return verdict
+
+    @staticmethod
+    def _format_verdict_seed(cached):
+        verdict = cached["verdict"]
+        status = "compliant" if verdict.get("compliant") else "non-compliant"
+        return (f"- similar_ad (similarity {cached['similarity']:.2f}) was previously judged {status}: "
+                f"{verdict.get('summary', '')} Judge this advertisement independently.")
+
+    def _shared_pipeline_for_all_languages(self):
+        """Non-English ads take the English path when retrieval understands every language"""
+        if NON_ENGLISH_ROUTE == "auto":
+            return self.multilingual_retrieval
+        return NON_ENGLISH_ROUTE == "shared"
+
+    def check_compliance(self, ad_text, target_region=None, sector=None):
         if not self.query_engine:
             raise Exception("Policy documents not loaded. Call initialize() first.")
 
         try:
+            # Clear-cut prohibited content never needs an LLM round trip
+            screening = rule_engine.evaluate(ad_text)
+            if screening["short_circuit"] and RULE_ENGINE_SHORT_CIRCUIT:
+                print(f"Rule pre-screen blocked: {list(screening['blocking_categories'])}")
+                return rule_engine.build_violation_verdict(ad_text, screening)
+            rule_hints = rule_engine.format_prompt_hints(screening)
+            rule_terms = [match["term"] for match in screening["matches"]]
+
             detected_lang = self.detect_language(ad_text)
 
+            cache_key = None
+            if VERDICT_CACHE_ENABLED:
+                cache_key = (embedding_service.embed(ad_text[:1000]), self.policy_version_for(target_region, sector))
+                cached = verdict_cache.lookup(cache_key[0], ad_text, cache_key[1], detected_lang, rule_terms)
+                if cached and cached["reuse"]:
+                    print(f"Reusing cached verdict (similarity {cached['similarity']:.3f})")
+                    return self._reused_verdict(cached, ad_text)
+                if cached:
+                    rule_hints = "\n".join(filter(None, [rule_hints, self._format_verdict_seed(cached)]))
+
             if detected_lang == 'en':
                 print(f"Language: English -> Using Groq + RAG")
                 # return self.analyze_with_gemini_rag_enhanced(ad_text, detected_lang)
-                return self.analyze_with_groq(ad_text) #return afterwards
+                result = self.analyze_with_groq(ad_text, rule_hints, target_region, sector) #return afterwards
+            elif self._shared_pipeline_for_all_languages():
+                print(f"Language: {detected_lang} -> Using Groq + multilingual RAG")
+                result = self.analyze_with_groq(ad_text, rule_hints, target_region, sector, detected_lang)
             else:
                 print(f"Language: {detected_lang} -> Using RAG-to-Gemini approach")
-                return self.analyze_with_gemini_rag_enhanced(ad_text, detected_lang)
+                result = self.analyze_with_gemini_rag_enhanced(ad_text, detected_lang, rule_hints, target_region, sector)
+
+            if cache_key and not result.get("analysis_method", "").endswith("error"):
+                verdict_cache.put(cache_key[0], ad_text, result, cache_key[1], detected_lang, rule_terms)
+            return result
 
         except Exception as e:
             print(f"Compliance check error: {e}")
@@ -361,4 +723,6 @@ Return ONLY the JSON response, no additional text."""
 
     def initialize(self):
         self.setup_models()
-        self.load_policy_documents()
\ No newline at end of file
+        self.load_policy_documents()
+        if POLICY_HOT_RELOAD:
+            self.start_policy_watcher()
\ No newline at end of file
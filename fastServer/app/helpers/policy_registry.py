@@ -0,0 +1,115 @@
+import os
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.helpers.policy_watcher import PolicyFileWatcher
+
+DEFAULT_POLICY = "global"
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+class PolicyRegistry:
+    """Policy documents selected per ad by target_region and sector.
+
+    The manifest (policy_registry.json next to policy.txt by default) lists
+    extra documents on top of the global policy:
+
+        {"policies": [
+            {"name": "in-gaming", "file": "policies/in_gaming.txt",
+             "regions": ["india", "in"], "sectors": ["gaming"]}
+        ]}
+
+    An entry without regions (or sectors) applies to every region (or
+    sector). Each policy's snapshot is built by `loader` on first use and
+    then shared by all requests; loaded policies are hot-reloaded
+    independently once watching is enabled.
+    """
+
+    def __init__(self, loader: Callable, default_policy_file: str = "policy.txt", manifest_path: Optional[str] = None):
+        self.loader = loader
+        self.entries: Dict[str, Dict] = {
+            DEFAULT_POLICY: {"file": default_policy_file, "regions": [], "sectors": []}
+        }
+        self.manifest_path = manifest_path or os.getenv(
+            'POLICY_REGISTRY',
+            os.path.join(os.path.dirname(default_policy_file), "policy_registry.json")
+        )
+        self._load_manifest()
+
+        self.snapshots = {}
+        self._locks = {name: threading.Lock() for name in self.entries}
+        self._watchers = {}
+        self.watch_interval = None
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        base_dir = os.path.dirname(self.manifest_path)
+        for entry in manifest.get("policies", []):
+            self.entries[entry["name"]] = {
+                "file": os.path.join(base_dir, entry["file"]),
+                "regions": [_normalize(r) for r in entry.get("regions", [])],
+                "sectors": [_normalize(s) for s in entry.get("sectors", [])]
+            }
+        print(f"Policy registry: {len(self.entries)} policies from {self.manifest_path}")
+
+    def applicable(self, target_region: Optional[str] = None, sector: Optional[str] = None) -> List[str]:
+        region, sector = _normalize(target_region), _normalize(sector)
+        names = []
+        for name, entry in self.entries.items():
+            if entry["regions"] and region not in entry["regions"]:
+                continue
+            if entry["sectors"] and sector not in entry["sectors"]:
+                continue
+            names.append(name)
+        return names
+
+    def get(self, name: str = DEFAULT_POLICY):
+        snapshot = self.snapshots.get(name)
+        if snapshot is not None:
+            return snapshot
+
+        # One build per policy even when several requests need it at once
+        with self._locks[name]:
+            snapshot = self.snapshots.get(name)
+            if snapshot is None:
+                snapshot = self.loader(name, self.entries[name]["file"])
+                self.snapshots[name] = snapshot
+                print(f"Policy '{name}' loaded (version {snapshot.version})")
+                if self.watch_interval is not None:
+                    self._start_watcher(name)
+        return snapshot
+
+    def snapshots_for(self, target_region: Optional[str] = None, sector: Optional[str] = None):
+        return [self.get(name) for name in self.applicable(target_region, sector)]
+
+    def reload(self, name: str = DEFAULT_POLICY) -> bool:
+        with self._locks[name]:
+            previous = self.snapshots.get(name)
+            snapshot = self.loader(name, self.entries[name]["file"], previous)
+            if snapshot is previous:
+                return False
+            self.snapshots[name] = snapshot
+        print(f"Policy '{name}' reloaded: version {previous.version if previous else None} -> {snapshot.version}")
+        return True
+
+    def start_watching(self, interval: float):
+        self.watch_interval = interval
+        for name in list(self.snapshots):
+            self._start_watcher(name)
+
+    def _start_watcher(self, name: str):
+        if name not in self._watchers:
+            # Baseline is what the loaded snapshot was built from, not the file as it is now
+            self._watchers[name] = PolicyFileWatcher(
+                self.entries[name]["file"], lambda: self.reload(name), self.watch_interval,
+                digest=getattr(self.snapshots.get(name), "source_digest", None)
+            )
+        self._watchers[name].start()
@@ -0,0 +1,93 @@
+import json
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+import numpy as np
+
+
+class PolicyVectorIndex:
+    """In-process top-k search over a normalized float32 matrix of policy chunk embeddings.
+
+    A query is a single matrix-vector product followed by argpartition, so for
+    a policy corpus of a few hundred chunks it answers in microseconds without
+    going through llama_index or a vector database.
+    """
+
+    def __init__(self, embeddings: np.ndarray, chunks: Sequence[Union[str, Dict[str, Any]]], metadata: Optional[Dict[str, Any]] = None):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.ndim != 2:
+            raise ValueError(f"Embeddings must be a 2-D matrix, got shape {matrix.shape}")
+        if len(chunks) != matrix.shape[0]:
+            raise ValueError(f"Got {len(chunks)} chunks for {matrix.shape[0]} embeddings")
+
+        self.matrix = np.ascontiguousarray(self._normalize(matrix))
+        self.chunks = [
+            chunk if isinstance(chunk, dict) else {"chunk_id": i, "text": chunk}
+            for i, chunk in enumerate(chunks)
+        ]
+        self.metadata = metadata or {}
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @classmethod
+    def from_npz(cls, path: str) -> "PolicyVectorIndex":
+        """Load an artifact written by save_npz or by the embeddings notebook"""
+        with np.load(path, allow_pickle=False) as data:
+            embeddings = data['embeddings']
+            metadata = json.loads(str(data['metadata'])) if 'metadata' in data else {}
+
+        chunks = metadata.pop('chunks', None)
+        if chunks is None:
+            chunks = [""] * len(embeddings)
+        return cls(embeddings, chunks, metadata)
+
+    def save_npz(self, path: str):
+        metadata = dict(self.metadata)
+        metadata['chunks'] = self.chunks
+        np.savez_compressed(path, embeddings=self.matrix, metadata=json.dumps(metadata))
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _top_k_indices(self, scores: np.ndarray, top_k: int) -> np.ndarray:
+        # scores has shape (n_queries, n_chunks); returns best-first indices per row
+        if top_k < scores.shape[1]:
+            candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return np.take_along_axis(candidates, order, axis=1)
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        query_matrix = np.asarray(queries, dtype=np.float32)
+        if query_matrix.ndim == 1:
+            query_matrix = query_matrix.reshape(1, -1)
+        if query_matrix.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {query_matrix.shape[1]} does not match index dimension {self.dim}")
+        if len(self) == 0 or top_k <= 0:
+            return [[] for _ in range(query_matrix.shape[0])]
+
+        scores = self._normalize(query_matrix) @ self.matrix.T
+        top_k = min(top_k, len(self))
+        indices = self._top_k_indices(scores, top_k)
+
+        results = []
+        for row, row_indices in enumerate(indices):
+            results.append([
+                {**self.chunks[i], "score": float(scores[row, i])}
+                for i in row_indices
+            ])
+        return results
+
+    def search(self, query: np.ndarray, top_k: int = 3) -> List[Dict[str, Any]]:
+        return self.search_batch(np.asarray(query).reshape(1, -1), top_k)[0]
@@ -0,0 +1,88 @@
+import os
+import hashlib
+import threading
+from typing import Callable, Optional
+
+
+def file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class PolicyFileWatcher:
+    """Polls a policy file and calls on_change once an edit has settled.
+
+    Polling the mtime/size is cheap and works the same on every platform and
+    on mounted volumes; the content digest is only computed when they move,
+    and on_change only fires when the digest actually differs (touch or a
+    save-without-edit is ignored). An edit must stay unchanged for one full
+    interval before it is reported, so half-written saves are not loaded.
+
+    `digest` is the sha256 of the bytes the current policy was built from.
+    With it, the first poll hashes the file and reports any edit that landed
+    between that build and the watcher starting; without it, the file as it
+    is now is taken as the baseline.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], None], interval: float = 5.0,
+                 digest: Optional[str] = None):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if digest is not None:
+            self._stat = None
+            self._digest = digest
+        else:
+            self._stat = self._read_stat()
+            self._digest = file_digest(path) if self._stat else None
+
+    def _read_stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
+        self._thread.start()
+        print(f"Watching {self.path} for policy changes every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        pending = None
+        while not self._stop.wait(self.interval):
+            stat = self._read_stat()
+            if stat is None or stat == self._stat:
+                pending = None
+                continue
+            if stat != pending:
+                # Changed since the last poll; wait for the writer to finish
+                pending = stat
+                continue
+
+            pending = None
+            self._stat = stat
+            try:
+                digest = file_digest(self.path)
+            except OSError:
+                continue
+            if digest == self._digest:
+                continue
+
+            try:
+                self.on_change()
+                self._digest = digest
+            except Exception as e:
+                # Keep serving the previous policy; the next edit retries
+                print(f"Policy reload failed, keeping current policy: {e}")
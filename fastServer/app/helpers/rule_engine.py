@@ -0,0 +1,439 @@
+import unicodedata
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterable
+
+from app.helpers.policy_chunker import in_section
+
+# Rule kinds:
+#   block   - unambiguous prohibited-content terms; enough distinct hits short-circuit the LLM
+#   flag    - suspicious terms passed to the LLM as pre-screen annotations
+#   context - benign signals (family/celebration, negation/PSA language) used to filter false positives
+# policy_section is the policy_chunker heading the rule falls under, a chunk ID prefix matched with
+# policy_chunker.in_section. Headings carry no content hash, so editing one list item under them does
+# not orphan the rule; the description names the policy line itself.
+# Categories with "prescreen": False are lookup lexicons and never feed evaluate().
+DEFAULT_RULES = {
+    "gambling": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Gambling (online and offline)",
+        "block": {
+            "en": ["online casino", "sportsbook", "slot machines", "online betting", "place your bets", "sports betting"],
+            "es": ["casino en línea", "apuestas deportivas", "tragamonedas"],
+            "fr": ["casino en ligne", "paris sportifs", "machines à sous"],
+            "de": ["online-casino", "sportwetten", "spielautomaten"],
+            "hi": ["ऑनलाइन कैसीनो", "सट्टा"],
+        },
+        "flag": {
+            "en": ["casino", "betting", "poker", "jackpot", "lottery", "roulette", "blackjack", "wager"],
+            "es": ["casino", "apuesta", "póker", "lotería"],
+            "fr": ["casino", "parier", "loterie"],
+            "de": ["casino", "wetten", "lotterie"],
+            "hi": ["कैसीनो", "जुआ", "लॉटरी"],
+        },
+    },
+    "illegal_drugs": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Sale of drug paraphernalia and/or illegal drug use",
+        "block": {
+            "en": ["cocaine", "heroin", "methamphetamine", "crystal meth", "mdma", "fentanyl", "lsd tabs"],
+            "es": ["cocaína", "heroína", "metanfetamina"],
+            "fr": ["cocaïne", "héroïne", "méthamphétamine"],
+            "de": ["kokain", "heroin", "methamphetamin"],
+            "hi": ["कोकीन", "हेरोइन"],
+        },
+        "flag": {
+            "en": ["drug paraphernalia", "bong", "rolling papers", "weed grinder", "herb grinder"],
+        },
+    },
+    "online_pharmacy": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Promotion of online pharmacies and the sale of any prescription medication",
+        "block": {
+            "en": ["without a prescription", "no prescription needed", "no doctor's note", "oxycodone", "xanax", "tramadol"],
+            "es": ["sin receta"],
+            "fr": ["sans ordonnance"],
+            "de": ["ohne rezept"],
+        },
+        "flag": {
+            "en": ["online pharmacy", "prescription pills", "prescription drugs", "viagra", "pills"],
+            "es": ["farmacia en línea"],
+            "fr": ["pharmacie en ligne", "médicaments sur ordonnance"],
+            "de": ["online-apotheke"],
+        },
+    },
+    "weapons": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Tobacco, ammunition, hazardous substances, weapons and ads featuring weapons",
+        "block": {
+            "en": ["ammunition", "assault rifle", "bomb-making", "ghost gun", "9mm rounds"],
+            "es": ["munición"],
+            "fr": ["munitions"],
+            "de": ["munition"],
+            "hi": ["गोला-बारूद"],
+        },
+        "flag": {
+            "en": ["rifle", "handgun", "firearm", "pistol", "tobacco", "cigarettes", "vape"],
+            "es": ["armas", "rifle", "tabaco"],
+            "fr": ["armes", "fusil", "tabac"],
+            "de": ["waffen", "gewehr", "tabak"],
+            "hi": ["बंदूक", "हथियार", "तंबाकू"],
+        },
+    },
+    "adult": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Adult, Pornographic or any illegal content",
+        "block": {
+            "en": ["porn", "pornography", "xxx", "explicit sex", "nude cams"],
+            "es": ["pornografía"],
+            "fr": ["pornographie"],
+            "de": ["pornografie"],
+        },
+        "flag": {
+            "en": ["adult content", "escort", "sexy singles", "hookup"],
+        },
+    },
+    "piracy": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Online Piracy, pirating, copyright infringement, file-sharing or torrent sites",
+        "block": {
+            "en": ["torrent", "pirated", "cracked software", "warez"],
+            "es": ["pirateado", "descarga pirata"],
+            "fr": ["piraté", "téléchargement illégal"],
+            "de": ["raubkopie"],
+        },
+        "flag": {
+            "en": ["file-sharing", "free movies download", "replica", "counterfeit"],
+        },
+    },
+    "crypto": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Cryptocurrencies and related content (reviewed case-by-case)",
+        "flag": {
+            "en": ["initial coin offering", "ico", "cryptocurrency", "crypto exchange", "bitcoin", "token sale"],
+            "es": ["criptomoneda"],
+            "fr": ["cryptomonnaie"],
+            "de": ["kryptowährung"],
+        },
+    },
+    "deceptive_behavior": {
+        "policy_section": "media-net-ad-quality-policy/II/buyer-s-are-also-prohibited-from",
+        "description": "Phishing, mimicking system errors, deceptive click practices",
+        "flag": {
+            "en": ["your computer is infected", "verify your account", "enter your password", "account has been suspended",
+                   "click ok to", "system warning"],
+        },
+    },
+    "misleading_claims": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Unsubstantiated or misleading claims and guarantees",
+        "flag": {
+            "en": ["guaranteed", "100%", "cure", "miracle", "risk-free", "instant results",
+                   "limited time", "act now", "secret", "lose weight fast", "get rich quick"],
+            "es": ["garantizado", "milagro", "cura"],
+            "fr": ["garanti", "miracle", "guérit"],
+            "de": ["garantiert", "wunder", "heilt"],
+            "hi": ["गारंटी", "चमत्कार"],
+        },
+    },
+    "family_context": {
+        "policy_section": None,
+        "description": "Family and celebration context typical of consumer product ads",
+        "context": {
+            "en": ["papa", "mom", "family", "gift", "celebration", "festival", "chocolate", "cadbury", "sweets",
+                   "treat", "sharing", "birthday", "special occasion", "children", "kids", "home", "kitchen",
+                   "dinner", "snack", "dessert"],
+        },
+    },
+    "legitimate_ad_phrase": {
+        "policy_section": None,
+        "description": "Everyday phrases that commonly trigger false positives",
+        "context": {
+            "en": ["give me", "can i have", "papa", "mama", "family time", "celebration", "festival",
+                   "special moment", "sharing", "together", "home", "love", "care", "tradition"],
+        },
+    },
+    "psa_context": {
+        "policy_section": None,
+        "description": "Negation, prevention and public-service language around prohibited terms",
+        "context": {
+            "en": ["say no to", "said no to", "no to drugs", "don't do drugs", "stay away from", "rehab",
+                   "rehabilitation", "helpline", "hotline", "addiction", "recovery program", "get help",
+                   "overdose", "prevention", "awareness", "anti-piracy", "anti-drug", "drug-free",
+                   "report piracy", "harm reduction", "public service announcement"],
+            "es": ["di no a", "no a las drogas", "rehabilitación", "adicción", "prevención", "línea de ayuda"],
+            "fr": ["dites non", "non à la drogue", "désintoxication", "prévention", "ligne d'écoute"],
+            "de": ["sag nein", "nein zu drogen", "entzug", "sucht", "prävention", "hilfetelefon"],
+            "hi": ["नशा मुक्ति", "नशे को ना"],
+        },
+    },
+    "landing_page_claims": {
+        "policy_section": None,
+        "description": "Ad claims the landing page has to back up (web agent alignment check)",
+        "prescreen": False,
+        "flag": {
+            "en": ["guaranteed", "100%", "instant", "free", "best", "proven", "certified", "risk-free"],
+            "es": ["garantizado", "gratis", "instantáneo", "mejor", "probado", "certificado"],
+            "fr": ["garanti", "gratuit", "instantané", "meilleur", "prouvé", "certifié"],
+            "de": ["garantiert", "kostenlos", "sofort", "beste", "bewiesen", "zertifiziert"],
+        },
+    },
+    "url_suspicious": {
+        "policy_section": "media-net-ad-quality-policy/II",
+        "description": "Prohibited Content",
+        "word_boundary": False,
+        "prescreen": False,
+        "flag": {
+            "en": ["adult", "casino", "gambling", "pharma", "pills"],
+        },
+    },
+}
+
+
+# Plural / inflection endings a term may carry and still match ("torrents", "municiones", "chocolates")
+INFLECTION_SUFFIXES = ("es", "s")
+
+
+def _is_word_char(char: str) -> bool:
+    # Letters, digits and combining marks (Devanagari matras) all belong to a word
+    return unicodedata.category(char)[0] in ('L', 'N', 'M')
+
+
+def _fold(text: str) -> str:
+    """Lowercase and drop accents one character at a time, so offsets still index the original text.
+
+    Each character folds to exactly one: "İ".lower() is two code points and would shift every later offset.
+    """
+    return "".join(unicodedata.normalize('NFKD', char.lower())[0] for char in text)
+
+
+def _stem(term: str) -> str:
+    """Crude shared stem of a term, used to count "torrent"/"torrents" or "cocaine"/"cocaína" once"""
+    words = []
+    for word in _fold(term).split():
+        for suffix in INFLECTION_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                break
+        if len(word) >= 5 and word[-1] in "aeo":
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def _distinct_stems(terms: Iterable[str]) -> List[str]:
+    """Terms with inflections and prefix variants ("porn"/"pornography") collapsed, first seen kept"""
+    kept, stems = [], []
+    for term in terms:
+        stem = _stem(term)
+        if any(stem.startswith(other) or other.startswith(stem) for other in stems):
+            continue
+        kept.append(term)
+        stems.append(stem)
+    return kept
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every occurrence of every pattern"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.patterns = []
+        self._built = False
+
+    def add(self, pattern: str, payload: Any) -> int:
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        pattern_id = len(self.patterns)
+        self.patterns.append((pattern, payload))
+        self.outputs[state].append(pattern_id)
+        self._built = False
+        return pattern_id
+
+    def build(self):
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+        self._built = True
+
+    def iter_matches(self, text: str):
+        if not self._built:
+            self.build()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern_id in self.outputs[state]:
+                pattern, payload = self.patterns[pattern_id]
+                yield end - len(pattern) + 1, end + 1, payload
+
+
+class RuleEngine:
+    """Compiled prohibited-content lexicons scanned in a single pass.
+
+    Every language's lexicon goes into one automaton, so text, OCR output and
+    transcripts are scanned once regardless of language. Text and terms are
+    matched accent-folded, and a term also matches with a plural ending, so
+    "municion" finds "municiones". Each match carries its category, rule kind
+    and the policy_chunker heading it falls under.
+
+    Block hits are counted per stem, so inflections of one word never reach
+    min_block_hits on their own, and any psa_context term (negation, rehab,
+    anti-piracy) turns the short-circuit off and leaves the verdict to the LLM.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Dict[str, Any]]] = None, min_block_hits: int = 2):
+        self.rules = rules or DEFAULT_RULES
+        self.min_block_hits = min_block_hits
+        self.automaton = AhoCorasick()
+
+        # Loanwords such as "casino" appear in several lexicons; compile each once
+        compiled = set()
+        for category, rule in self.rules.items():
+            for kind in ("block", "flag", "context"):
+                for language, terms in rule.get(kind, {}).items():
+                    for term in terms:
+                        pattern = _fold(term)
+                        if (pattern, category, kind) in compiled:
+                            continue
+                        compiled.add((pattern, category, kind))
+                        self.automaton.add(pattern, {
+                            "term": term,
+                            "category": category,
+                            "kind": kind,
+                            "language": language,
+                            "word_boundary": rule.get("word_boundary", True),
+                        })
+        self.automaton.build()
+
+    @staticmethod
+    def _word_end(text: str, start: int, end: int) -> Optional[int]:
+        """End of the whole word the match covers (past a plural ending), or None when it is inside a word"""
+        if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+            return None
+        if not _is_word_char(text[end - 1]) or end >= len(text) or not _is_word_char(text[end]):
+            return end
+        for suffix in INFLECTION_SUFFIXES:
+            stop = end + len(suffix)
+            if text.startswith(suffix, end) and (stop >= len(text) or not _is_word_char(text[stop])):
+                return stop
+        return None
+
+    def scan(self, text: str, categories: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        if not text:
+            return []
+
+        wanted = set(categories) if categories else None
+        folded = _fold(text)
+        matches = []
+        for start, end, payload in self.automaton.iter_matches(folded):
+            if wanted and payload["category"] not in wanted:
+                continue
+            if payload["word_boundary"]:
+                end = self._word_end(folded, start, end)
+                if end is None:
+                    continue
+            matches.append({
+                **{k: v for k, v in payload.items() if k != "word_boundary"},
+                "start": start,
+                "end": end,
+                "policy_section": self.rules[payload["category"]].get("policy_section"),
+            })
+        return matches
+
+    def distinct_terms(self, text: str, category: str) -> List[str]:
+        """Lexicon terms of one category found in text, one per stem"""
+        return _distinct_stems(match["term"] for match in self.scan(text, [category]))
+
+    def evaluate(self, text: str) -> Dict[str, Any]:
+        """Summarize violation matches and decide whether they are clear-cut enough to skip the LLM"""
+        scanned = [m for m in self.scan(text) if self.rules[m["category"]].get("prescreen", True)]
+        matches = [m for m in scanned if m["kind"] != "context"]
+        psa_terms = _distinct_stems(m["term"] for m in scanned if m["category"] == "psa_context")
+
+        by_category = {}
+        for match in matches:
+            entry = by_category.setdefault(match["category"], {"block": [], "flag": []})
+            entry[match["kind"]].append(match["term"])
+        for terms in by_category.values():
+            terms["block"] = _distinct_stems(terms["block"])
+            terms["flag"] = _distinct_stems(terms["flag"])
+
+        blocking = {
+            category: terms["block"] for category, terms in by_category.items()
+            if len(terms["block"]) >= self.min_block_hits
+        }
+        return {
+            "matches": matches,
+            "categories": by_category,
+            # "Say no to heroin", "our anti-piracy team removes torrents": the LLM decides
+            "short_circuit": bool(blocking) and not psa_terms,
+            "blocking_categories": blocking if not psa_terms else {},
+            "psa_context": psa_terms,
+        }
+
+    def unresolved_sections(self, chunk_ids: Iterable[str]) -> Dict[str, str]:
+        """Categories whose policy_section heading covers none of the given chunk IDs"""
+        chunk_ids = list(chunk_ids)
+        unresolved = {}
+        for category, rule in self.rules.items():
+            section = rule.get("policy_section")
+            if section and not any(in_section(chunk_id, section) for chunk_id in chunk_ids):
+                unresolved[category] = section
+        return unresolved
+
+    def build_violation_verdict(self, text: str, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        violations = []
+        for category, terms in evaluation["blocking_categories"].items():
+            rule = self.rules[category]
+            violations.append({
+                "policy_section": f"[{rule['policy_section']}] {rule['description']}",
+                "violation": f"Prohibited {category.replace('_', ' ')} content: {', '.join(terms)}",
+                "confidence": 0.95,
+                "evidence": ", ".join(terms)
+            })
+        return {
+            "compliant": False,
+            "violations": violations,
+            "risk_score": 0.95,
+            "summary": "Clear-cut prohibited content detected by rule pre-screen",
+            "processed_content": text[:200],
+            "analysis_method": "rule_engine"
+        }
+
+    def format_prompt_hints(self, evaluation: Dict[str, Any]) -> str:
+        lines = []
+        for category, terms in evaluation["categories"].items():
+            found = terms["block"] + terms["flag"]
+            if not found:
+                continue
+            rule = self.rules[category]
+            lines.append(f"- {category} ({', '.join(found)}) -> [{rule['policy_section']}] {rule['description']}")
+        if lines and evaluation.get("psa_context"):
+            lines.append(f"- negation/PSA context ({', '.join(evaluation['psa_context'])}): "
+                         f"the terms above may be discouraged rather than promoted")
+        return "\n".join(lines)
+
+
+rule_engine = RuleEngine()
@@ -0,0 +1,167 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+
+class TextPresenceDetector:
+    """Fast local check for rendered text in an image, before paying for a VLM OCR call.
+
+    Works on a downscaled Lab copy with two OpenCV cues:
+
+    - MSER regions shaped like glyphs (size, aspect ratio, fill) whose edge
+      density and stroke-width consistency (distance transform) look like
+      text strokes rather than texture
+    - glyph candidates lining up into rows of similar height, which is what
+      separates a line of text from scattered blobs in a product photo
+
+    An image has text when at least min_lines rows of min_glyphs glyphs are
+    found. The rows also give the crop boxes (in original-image pixels) sent
+    to OCR instead of the whole image.
+    """
+
+    def __init__(self, max_side: int = 800, min_glyphs: int = 3, min_lines: int = 1,
+                 max_stroke_variation: float = 0.8, min_contrast: float = 40.0, padding: float = 0.25):
+        self.max_side = max_side
+        self.min_glyphs = min_glyphs
+        self.min_lines = min_lines
+        self.max_stroke_variation = max_stroke_variation
+        self.min_contrast = min_contrast
+        self.padding = padding
+        self.mser = cv2.MSER_create(5, 30, 8000)
+
+    def _glyph_candidates(self, gray: np.ndarray) -> List[Box]:
+        edges = cv2.Canny(gray, 80, 200)
+        height, width = gray.shape
+        regions, boxes = self.mser.detectRegions(gray)
+
+        glyphs = []
+        seen = set()
+        for points, (x, y, w, h) in zip(regions, boxes):
+            if (x, y, w, h) in seen:
+                continue
+            seen.add((x, y, w, h))
+            if h < 6 or h > height * 0.3 or w > width * 0.3:
+                continue
+            aspect = w / float(h)
+            if aspect < 0.1 or aspect > 2.5:
+                continue
+            fill = len(points) / float(w * h)
+            if fill < 0.15 or fill > 0.95:
+                continue
+
+            # Rendered text stands out from its background; noise and soft shading do not
+            patch = gray[y:y + h, x:x + w]
+            inside = gray[points[:, 1], points[:, 0]]
+            if abs(float(inside.mean()) - float(patch.mean())) / max(1.0 - fill, 0.05) < self.min_contrast:
+                continue
+
+            edge_density = np.count_nonzero(edges[y:y + h, x:x + w]) / float(w * h)
+            if edge_density < 0.08 or edge_density > 0.7:
+                continue
+
+            # Glyph strokes have near-constant width
+            mask = np.zeros((h + 2, w + 2), dtype=np.uint8)
+            mask[points[:, 1] - y + 1, points[:, 0] - x + 1] = 255
+            stroke = cv2.distanceTransform(mask, cv2.DIST_L2, 3)[mask > 0]
+            if stroke.size == 0 or stroke.std() / (stroke.mean() + 1e-6) > self.max_stroke_variation:
+                continue
+
+            glyphs.append((int(x), int(y), int(w), int(h)))
+        return self._suppress_nested(glyphs)
+
+    @staticmethod
+    def _suppress_nested(boxes: List[Box]) -> List[Box]:
+        """MSER reports the same blob at several thresholds; keep the largest box of each overlapping group"""
+        kept = []
+        for box in sorted(boxes, key=lambda b: b[2] * b[3], reverse=True):
+            x, y, w, h = box
+            for kx, ky, kw, kh in kept:
+                overlap_w = min(x + w, kx + kw) - max(x, kx)
+                overlap_h = min(y + h, ky + kh) - max(y, ky)
+                if overlap_w > 0 and overlap_h > 0 and overlap_w * overlap_h > 0.5 * w * h:
+                    break
+            else:
+                kept.append(box)
+        return kept
+
+    def _group_lines(self, glyphs: List[Box]) -> List[List[Box]]:
+        """Chain glyphs into rows: similar height, overlapping vertically, small horizontal gaps"""
+        lines = []
+        for glyph in sorted(glyphs, key=lambda b: (b[0], b[1])):
+            x, y, w, h = glyph
+            center = y + h / 2.0
+            for line in lines:
+                lx, ly, lw, lh = line[-1]
+                if (abs(center - (ly + lh / 2.0)) < 0.5 * max(h, lh)
+                        and 0.5 < h / float(lh) < 2.0
+                        and x >= lx + 0.5 * lw
+                        and x - (lx + lw) < 1.5 * max(h, lh)):
+                    line.append(glyph)
+                    break
+            else:
+                lines.append([glyph])
+        return [line for line in lines if len(line) >= self.min_glyphs]
+
+    def detect(self, image: Image.Image) -> Dict[str, Any]:
+        """{"has_text", "lines", "glyphs", "regions": [(x, y, w, h), ...]} with regions in original pixels"""
+        rgb = np.asarray(image.convert('RGB'))
+        scale = min(1.0, self.max_side / float(max(rgb.shape[:2])))
+        if scale < 1.0:
+            rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        # Lightness first; the colour-opponent channels catch coloured text on a
+        # background of similar brightness and only run when lightness finds nothing
+        lab = cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB)
+        glyphs, lines = [], []
+        for channel in range(3):
+            plane = lab[:, :, channel]
+            if channel:
+                plane = cv2.normalize(plane, None, 0, 255, cv2.NORM_MINMAX)
+            # MSER finds dark-on-light glyphs; the inverted copy catches light-on-dark text
+            glyphs = self._suppress_nested(self._glyph_candidates(plane) + self._glyph_candidates(255 - plane))
+            lines = self._group_lines(glyphs)
+            if len(lines) >= self.min_lines:
+                break
+
+        regions = []
+        for line in lines:
+            x0 = min(b[0] for b in line)
+            y0 = min(b[1] for b in line)
+            x1 = max(b[0] + b[2] for b in line)
+            y1 = max(b[1] + b[3] for b in line)
+            pad = int((y1 - y0) * self.padding)
+            regions.append(tuple(int(round(v / scale)) for v in (
+                max(0, x0 - pad), max(0, y0 - pad), x1 - x0 + 2 * pad, y1 - y0 + 2 * pad
+            )))
+
+        return {
+            "has_text": len(lines) >= self.min_lines,
+            "lines": len(lines),
+            "glyphs": len(glyphs),
+            "regions": regions,
+        }
+
+    @staticmethod
+    def crop_text_regions(image: Image.Image, regions: List[Box], max_area_share: float = 0.6) -> Image.Image:
+        """Bounding crop around all text rows, or the full image when the text covers most of it"""
+        if not regions:
+            return image
+        x0 = max(0, min(r[0] for r in regions))
+        y0 = max(0, min(r[1] for r in regions))
+        x1 = min(image.width, max(r[0] + r[2] for r in regions))
+        y1 = min(image.height, max(r[1] + r[3] for r in regions))
+        if (x1 - x0) * (y1 - y0) > max_area_share * image.width * image.height:
+            return image
+        return image.crop((x0, y0, x1, y1))
+
+
+text_detector = TextPresenceDetector(
+    max_side=int(os.getenv('TEXT_DETECTOR_MAX_SIDE', '800')),
+    min_glyphs=int(os.getenv('TEXT_DETECTOR_MIN_GLYPHS', '3')),
+    min_lines=int(os.getenv('TEXT_DETECTOR_MIN_LINES', '1'))
+)
@@ -0,0 +1,146 @@
+import os
+import re
+import copy
+import difflib
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def text_tokens(text: str) -> tuple:
+    return tuple(WORD.findall(text.lower()))
+
+
+def token_changes(a: tuple, b: tuple) -> int:
+    """Tokens inserted, deleted or replaced to turn a into b, over the whole of both texts"""
+    changes = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag != "equal":
+            changes += max(i2 - i1, j2 - j1)
+    return changes
+
+
+class SemanticVerdictCache:
+    """Reuses compliance verdicts for near-duplicate ad texts.
+
+    Templated ad copy (same description, different product name or price)
+    embeds almost identically. Every analyzed text is stored with its
+    embedding, verdict, policy version, language and rule-engine matches in a
+    fixed-size ring buffer scanned with one matrix-vector product.
+
+    A lookup only reuses a verdict when the policy version, language and the
+    set of rule-engine terms all match, and the cosine similarity clears the
+    threshold. Compliant verdicts must clear it by an extra safety margin: a
+    near-duplicate that adds one prohibited claim must not inherit a pass.
+
+    The embedding only sees the start of a long ad, so the whole texts are
+    also compared word by word: at most max_token_changes words may differ
+    (a product name, a price). Anything more, however similar the embedding,
+    is returned as a seed; matches between seed_threshold and threshold are
+    seeds too, which the caller can show the LLM instead of skipping it.
+    """
+
+    def __init__(self, dim: int = 384, max_entries: int = 5000, threshold: float = 0.97,
+                 safety_margin: float = 0.015, seed_threshold: float = 0.9, max_token_changes: int = 3):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.safety_margin = safety_margin
+        self.seed_threshold = seed_threshold
+        self.max_token_changes = max_token_changes
+
+        self._lock = threading.Lock()
+        self._reset(dim)
+        self.stats = {"hits": 0, "seeds": 0, "misses": 0}
+
+    def _reset(self, dim):
+        self.dim = dim
+        self.matrix = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self.entries = [None] * self.max_entries
+        self._next = 0
+        self._size = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def rule_signature(rule_terms: Iterable[str]) -> frozenset:
+        return frozenset(term.lower() for term in rule_terms)
+
+    def lookup(self, embedding, text: str, policy_version: str, language: str,
+               rule_terms: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Best cached entry for this text, as {"verdict", "similarity", "reuse", "text_hash"}, or None"""
+        query = self._normalize(embedding)
+        signature = self.rule_signature(rule_terms)
+        tokens = text_tokens(text)
+
+        with self._lock:
+            if self._size == 0 or query.shape[0] != self.dim:
+                self.stats["misses"] += 1
+                return None
+            similarities = self.matrix[:self._size] @ query
+
+            for row in np.argsort(-similarities)[:8]:
+                similarity = float(similarities[row])
+                if similarity < self.seed_threshold:
+                    break
+                entry = self.entries[row]
+                if (entry["policy_version"], entry["language"], entry["rules"]) != (policy_version, language, signature):
+                    continue
+
+                required = self.threshold + (self.safety_margin if entry["verdict"].get("compliant") else 0.0)
+                reuse = similarity >= required and \
+                    token_changes(entry["tokens"], tokens) <= self.max_token_changes
+                self.stats["hits" if reuse else "seeds"] += 1
+                return {
+                    "verdict": copy.deepcopy(entry["verdict"]),
+                    "similarity": similarity,
+                    "reuse": reuse,
+                    "text_hash": entry["text_hash"]
+                }
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, embedding, text: str, verdict: Dict[str, Any], policy_version: str, language: str,
+            rule_terms: Iterable[str] = ()):
+        vector = self._normalize(embedding)
+        with self._lock:
+            if vector.shape[0] != self.dim:
+                # Embedding model changed; old vectors are not comparable
+                self._reset(vector.shape[0])
+            row = self._next
+            self.matrix[row] = vector
+            self.entries[row] = {
+                "verdict": copy.deepcopy(verdict),
+                "policy_version": policy_version,
+                "language": language,
+                "rules": self.rule_signature(rule_terms),
+                "tokens": text_tokens(text),
+                "text_hash": hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+            }
+            self._next = (row + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            self._reset(self.dim)
+
+    def __len__(self):
+        return self._size
+
+
+verdict_cache = SemanticVerdictCache(
+    max_entries=int(os.getenv('VERDICT_CACHE_SIZE', '5000')),
+    threshold=float(os.getenv('VERDICT_CACHE_THRESHOLD', '0.97')),
+    safety_margin=float(os.getenv('VERDICT_CACHE_SAFETY_MARGIN', '0.015')),
+    seed_threshold=float(os.getenv('VERDICT_CACHE_SEED_THRESHOLD', '0.9')),
+    max_token_changes=int(os.getenv('VERDICT_CACHE_MAX_TOKEN_CHANGES', '3'))
+)
@@ -282,19 +282,23 @@ class VideoComplianceChecker:
     def analyze_frame_sequence(self, cap: cv2.VideoCapture, frame_numbers: List[int], video_metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
         frame_results = []
         
-        for i, frame_num in enumerate(frame_numbers):
+        frames = []
+        for frame_num in frame_numbers:
+            frame = self.extract_frame(cap, frame_num)
+            if frame is None:
+                print(f"Skipping frame {frame_num} (extraction failed)")
+                continue
+            frames.append((frame_num, frame))
+        
+        # All sampled frames go to the image checker together so local VLM calls are batched
+        print(f"Analyzing {len(frames)} frames")
+        results = self.image_checker.check_images_compliance([frame for _, frame in frames])
+        
+        for (frame_num, _), result in zip(frames, results):
             try:
-                frame = self.extract_frame(cap, frame_num)
-                if frame is None:
-                    print(f"Skipping frame {frame_num} (extraction failed)")
-                    continue
-                
                 fps = video_metadata.get("fps", 30)
                 timestamp = frame_num / fps if fps > 0 else 0
                 
-                print(f"Analyzing frame {frame_num} (t={timestamp:.2f}s)")
-                result = self.image_checker.check_image_compliance(frame)
-                
                 result['frame_number'] = frame_num
                 result['timestamp'] = timestamp
                 result['frame_position'] = frame_num / video_metadata.get('total_frames', 1)
@@ -0,0 +1,135 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+from PIL import Image
+
+from app.helpers.vlm_payload import image_tokens, qwen_target_size
+
+# (image, prompt, max_new_tokens)
+GenerationRequest = Tuple[Image.Image, str, int]
+
+
+def _is_out_of_memory(error: Exception) -> bool:
+    return "out of memory" in str(error).lower() or type(error).__name__ == "OutOfMemoryError"
+
+
+class LocalVLMBatcher:
+    """Collects local Qwen2.5-VL generate calls into padded batches.
+
+    Callers (images of one request, frames of one video, or concurrent
+    requests) submit (image, prompt, max_new_tokens) and block on a future.
+    A worker drains the queue for up to batch_wait_ms and runs one
+    `generate_batch` call per batch, like the embedding service does for
+    query embeddings.
+
+    Batches are bounded by max_batch_size and by a sequence budget,
+    max_batch_tokens, which covers image tokens, prompt tokens and new tokens
+    summed over the batch. KV-cache memory grows with that sum. A batch that
+    still runs out of memory is split in half and retried, down to single
+    images.
+    """
+
+    def __init__(self, generate_batch: Callable[[List[GenerationRequest], int], List[str]],
+                 max_batch_size: int = 4, max_batch_tokens: int = 16384, batch_wait_ms: float = 50.0,
+                 max_pixels: int = None):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.max_pixels = max_pixels
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.stats = {"batches": 0, "batched_images": 0, "oom_splits": 0}
+
+    def sequence_cost(self, request: GenerationRequest) -> int:
+        image, prompt, max_new_tokens = request
+        size = qwen_target_size(*image.size, max_pixels=self.max_pixels) if self.max_pixels else image.size
+        # ~3.5 characters per token for the English prompt
+        return image_tokens(*size) + len(prompt) // 3 + max_new_tokens
+
+    def submit(self, image: Image.Image, prompt: str, max_new_tokens: int = 2048) -> Future:
+        future = Future()
+        self._queue.put(((image, prompt, max_new_tokens), future))
+        self._ensure_worker()
+        return future
+
+    def generate(self, image: Image.Image, prompt: str, max_new_tokens: int = 2048) -> str:
+        return self.submit(image, prompt, max_new_tokens).result()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._batch_loop, name="vlm-batcher", daemon=True)
+                self._worker.start()
+
+    def _batch_loop(self):
+        carry = None
+        while True:
+            first = carry or self._queue.get()
+            carry = None
+            batch = [first]
+            cost = self.sequence_cost(first[0])
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                item_cost = self.sequence_cost(item[0])
+                if cost + item_cost > self.max_batch_tokens:
+                    # Starts the next batch instead
+                    carry = item
+                    break
+                batch.append(item)
+                cost += item_cost
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        requests = [request for request, _ in batch]
+        try:
+            outputs = self._generate_with_split(requests)
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+
+    def _generate_with_split(self, requests: List[GenerationRequest]) -> List[str]:
+        max_new_tokens = max(request[2] for request in requests)
+        try:
+            outputs = self.generate_batch(requests, max_new_tokens)
+            self.stats["batches"] += 1
+            self.stats["batched_images"] += len(requests)
+            return outputs
+        except Exception as e:
+            if len(requests) == 1 or not _is_out_of_memory(e):
+                raise
+            self.stats["oom_splits"] += 1
+            print(f"VLM batch of {len(requests)} ran out of memory, splitting")
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+            half = len(requests) // 2
+            return self._generate_with_split(requests[:half]) + self._generate_with_split(requests[half:])
+
+
+def batcher_settings():
+    return {
+        "max_batch_size": int(os.getenv('LOCAL_VLM_MAX_BATCH', '4')),
+        "max_batch_tokens": int(os.getenv('LOCAL_VLM_BATCH_TOKENS', '16384')),
+        "batch_wait_ms": float(os.getenv('LOCAL_VLM_BATCH_WAIT_MS', '50')),
+    }
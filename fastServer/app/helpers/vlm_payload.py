@@ -0,0 +1,198 @@
+import io
+import os
+import math
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# Qwen2.5-VL: 14px patches merged 2x2, so one image token covers a 28x28 pixel block
+QWEN_PIXEL_FACTOR = 28
+QWEN_MIN_PIXELS = 4 * QWEN_PIXEL_FACTOR ** 2
+VLM_MAX_PIXELS = int(os.getenv('VLM_MAX_PIXELS', str(1024 * QWEN_PIXEL_FACTOR ** 2)))
+
+
+def qwen_target_size(width: int, height: int, max_pixels: int = VLM_MAX_PIXELS,
+                     min_pixels: int = QWEN_MIN_PIXELS) -> Tuple[int, int]:
+    """(width, height) the Qwen2.5-VL processor would resize to (qwen_vl_utils.smart_resize)"""
+    factor = QWEN_PIXEL_FACTOR
+    h_bar = max(factor, round(height / factor) * factor)
+    w_bar = max(factor, round(width / factor) * factor)
+    if h_bar * w_bar > max_pixels:
+        beta = math.sqrt((height * width) / max_pixels)
+        h_bar = max(factor, math.floor(height / beta / factor) * factor)
+        w_bar = max(factor, math.floor(width / beta / factor) * factor)
+    elif h_bar * w_bar < min_pixels:
+        beta = math.sqrt(min_pixels / (height * width))
+        h_bar = math.ceil(height * beta / factor) * factor
+        w_bar = math.ceil(width * beta / factor) * factor
+    return w_bar, h_bar
+
+
+def image_tokens(width: int, height: int) -> int:
+    return (width // QWEN_PIXEL_FACTOR) * (height // QWEN_PIXEL_FACTOR)
+
+
+def vlm_input_size(width: int, height: int, max_side: int = 1024, max_pixels: int = VLM_MAX_PIXELS) -> Tuple[int, int]:
+    """(width, height) an image is sent at: max_side cap, then the Qwen pixel budget"""
+    scale = min(1.0, max_side / float(max(width, height)))
+    width, height = int(width * scale), int(height * scale)
+    if width * height > max_pixels:
+        width, height = qwen_target_size(width, height, max_pixels)
+    return width, height
+
+
+def fit_for_vlm(image: Image.Image, max_side: int = 1024, max_pixels: int = VLM_MAX_PIXELS) -> Image.Image:
+    """One resize straight to the VLM's input size"""
+    width, height = vlm_input_size(image.width, image.height, max_side, max_pixels)
+    if (width, height) == image.size:
+        return image
+    return image.resize((width, height), Image.Resampling.BICUBIC, reducing_gap=2.0)
+
+
+def decode_for_vlm(data: bytes, max_side: int = 1024,
+                   max_pixels: int = VLM_MAX_PIXELS) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Decode encoded image bytes at about the VLM input size, upright.
+
+    JPEGs are decoded with libjpeg's DCT scaling (draft mode: 1/2, 1/4 or 1/8,
+    never below the target), so a 4000px upload never exists as a full-size
+    bitmap. Other formats have no reduced decode in Pillow and decode in full.
+    EXIF orientation is applied after decoding. Returns (image, info) with
+    the format, stored and decoded sizes, orientation and decode time.
+    """
+    t0 = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    source_format = image.format
+    original_size = image.size
+    orientation = image.getexif().get(0x0112, 1)
+
+    if source_format == 'JPEG':
+        # Target in stored orientation; vlm_input_size is symmetric in width/height
+        image.draft('RGB', vlm_input_size(*original_size, max_side, max_pixels))
+    image.load()
+    decoded_size = image.size
+    if orientation != 1:
+        image = ImageOps.exif_transpose(image)
+
+    return image, {
+        "format": source_format,
+        "original_size": original_size,
+        "decoded_size": decoded_size,
+        "orientation": orientation,
+        "decode_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+    }
+
+
+class VLMPayloadEncoder:
+    """JPEG payloads sized for what Qwen2.5-VL actually looks at.
+
+    The model resizes every image to multiples of 28px within its pixel budget
+    and spends one token per 28x28 block, so anything above max_pixels is
+    uploaded only to be thrown away. Larger images are resized once, straight
+    to the processor's target size, and the JPEG quality follows the image's
+    detail: flat product shots compress hard without losing anything, while
+    fine print keeps a high quality.
+
+    Source JPEG bytes (image.info["source_bytes"], set by preprocess_image)
+    are sent untouched when the image already fits the budget. Encoded
+    payloads are cached per pixel digest, so the same image sent in several
+    calls (OCR and analysis, escalation passes, retries) is encoded once.
+    """
+
+    def __init__(self, max_pixels: int = VLM_MAX_PIXELS, min_quality: int = 70, max_quality: int = 90,
+                 cache_size: int = 256, max_source_bytes_per_pixel: float = 0.2):
+        self.max_pixels = max_pixels
+        self.max_source_bytes_per_pixel = max_source_bytes_per_pixel
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"encoded": 0, "reused_source": 0, "cache_hits": 0, "bytes": 0, "encode_ms": 0.0}
+
+    @staticmethod
+    def digest(image: Image.Image) -> str:
+        # Remembered on the image so repeated calls for the same frame skip hashing
+        digest = image.info.get("pixel_digest")
+        if digest is None:
+            digest = hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+            image.info["pixel_digest"] = digest
+        return digest
+
+    def choose_quality(self, image: Image.Image) -> int:
+        """JPEG quality from high-frequency detail (mean edge response of a small grayscale copy)"""
+        small = image.convert('L')
+        small.thumbnail((256, 256), Image.Resampling.BILINEAR)
+        detail = float(np.asarray(small.filter(ImageFilter.FIND_EDGES), dtype=np.float32).mean())
+        # ~4 for smooth photos, 25+ for text-heavy creatives
+        share = min(max((detail - 4.0) / 20.0, 0.0), 1.0)
+        return int(round(self.min_quality + share * (self.max_quality - self.min_quality)))
+
+    def _reusable_source(self, image: Image.Image) -> Optional[bytes]:
+        source = image.info.get("source_bytes")
+        if not source or image.info.get("source_format") != "JPEG":
+            return None
+        if image.width * image.height > self.max_pixels:
+            return None
+        # Near-lossless uploads are worth re-encoding
+        if len(source) > self.max_source_bytes_per_pixel * image.width * image.height:
+            return None
+        return source
+
+    def encode(self, image: Image.Image) -> Dict[str, Any]:
+        """{"data": jpeg bytes, "base64", "width", "height", "quality", "image_tokens", "reused_source"}"""
+        key = (self.digest(image), self.max_pixels)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached
+
+        t0 = time.perf_counter()
+        source = self._reusable_source(image)
+        if source is not None:
+            width, height = image.size
+            data, quality = source, None
+        else:
+            # Within budget the processor only rounds to 28px multiples itself; resize only to shed pixels
+            width, height = image.size
+            resized = image
+            if width * height > self.max_pixels:
+                width, height = qwen_target_size(width, height, self.max_pixels)
+                resized = image.resize((width, height), Image.Resampling.BICUBIC, reducing_gap=2.0)
+            quality = self.choose_quality(resized)
+            buffer = io.BytesIO()
+            resized.convert('RGB').save(buffer, format='JPEG', quality=quality)
+            data = buffer.getvalue()
+
+        payload = {
+            "data": data,
+            "base64": base64.b64encode(data).decode(),
+            "width": width,
+            "height": height,
+            "quality": quality,
+            "image_tokens": image_tokens(*qwen_target_size(width, height, self.max_pixels)),
+            "reused_source": source is not None,
+        }
+
+        with self._lock:
+            self.stats["reused_source" if source is not None else "encoded"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["encode_ms"] += (time.perf_counter() - t0) * 1000.0
+            self._cache[key] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload
+
+
+vlm_payload_encoder = VLMPayloadEncoder(
+    min_quality=int(os.getenv('VLM_JPEG_MIN_QUALITY', '70')),
+    max_quality=int(os.getenv('VLM_JPEG_MAX_QUALITY', '90')),
+    cache_size=int(os.getenv('VLM_PAYLOAD_CACHE_SIZE', '256'))
+)
@@ -12,6 +12,7 @@ from app.models.schemas import (
     GenerateReportResponse
 )
 from app.services.compliance_service import ComplianceService
+from app.helpers.hf_warmup import hf_warmup
 from typing import Dict, Any
 import os
 
@@ -58,13 +59,22 @@ async def check_image_compliance(request: ImageAnalysisRequest):
     """
     try:
         results = compliance_service.analyze_images([request.image_url])
-        return {"image_analysis": results[0] if results else None}
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Image analysis failed: {str(e)}"
         )
+    
+    image_result = results[0] if results else None
+    compliance = (image_result or {}).get("image_compliance", {})
+    if compliance.get("analysis_method") == "model_warming":
+        # Cold vision model: no verdict yet, the client should retry
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=compliance["summary"],
+            headers={"Retry-After": str(compliance["retry_after"])} if compliance.get("retry_after") else None
+        )
+    return {"image_analysis": image_result}
 
 @router.post("/audio")
 async def check_audio_compliance(request: AudioAnalysisRequest):
@@ -109,7 +119,8 @@ async def health_check():
             "image_checker": compliance_service.image_checker is not None,
             "audio_checker": compliance_service.audio_checker is not None,
             "video_checker": compliance_service.video_checker is not None
-        }
+        },
+        "vlm_models": hf_warmup.status()
     }
 
 @router.post("/test-audio")
@@ -6,6 +6,7 @@ from app.helpers.policy_compliance_checker import PolicyComplianceChecker
 from app.helpers.image_compliance_checker import ImageComplianceChecker
 from app.helpers.audio_compliance_checker import AudioComplianceChecker
 from app.helpers.video_compliance_checker import VideoComplianceChecker
+from app.helpers.rule_engine import rule_engine
 from app.models.schemas import ComplianceCheckRequest, PCCAnalysisRequest, GenerateReportRequest
 from app.helpers.llm_client import call_llm_gemini
 import requests
@@ -72,7 +73,7 @@ class ComplianceService:
         except:
             return False
     
-    def analyze_text(self, text: str) -> Dict[str, Any]:
+    def analyze_text(self, text: str, target_region: Optional[str] = None, sector: Optional[str] = None) -> Dict[str, Any]:
         """Analyze text content for compliance"""
         try:
             if not text or not text.strip():
@@ -86,7 +87,7 @@ class ComplianceService:
                 }
             
             print(f"Analyzing text: {text[:100]}...")
-            result = self.policy_checker.check_compliance(text)
+            result = self.policy_checker.check_compliance(text, target_region, sector)
             print("Text analysis complete")
             return result
             
@@ -113,18 +114,21 @@ class ComplianceService:
         if not image_urls:
             return results
         
+        downloaded_images = []
         try:
             print(f"Downloading {len(image_urls)} images...")
-            local_image_paths = self.media_downloader.download_images(image_urls)
+            downloaded_images = self.media_downloader.download_images(image_urls)
             
-            for i, image_path in enumerate(local_image_paths):
+            print(f"Analyzing {len(downloaded_images)} images")
+            image_results = self.image_checker.check_images_compliance(downloaded_images)
+            
+            for media, result in zip(downloaded_images, image_results):
                 try:
-                    print(f"Analyzing image {i+1}/{len(local_image_paths)}")
-                    result = self.image_checker.check_image_compliance(image_path)
-                    result['source_url'] = image_urls[i] if i < len(image_urls) else "unknown"
+                    # Failed downloads are skipped, so the URL comes from the download, not the position
+                    result['source_url'] = media.url
                     results.append(result)
                 except Exception as e:
-                    print(f"Error analyzing image {image_path}: {e}")
+                    print(f"Error analyzing image {media.url}: {e}")
                     error_result = {
                         "image_compliance": {
                             "compliant": False,
@@ -139,7 +143,7 @@ class ComplianceService:
                             "summary": "Image analysis error",
                             "analysis_method": "error"
                         },
-                        "source_url": image_urls[i] if i < len(image_urls) else "unknown"
+                        "source_url": media.url
                     }
                     results.append(error_result)
             
@@ -163,6 +167,10 @@ class ComplianceService:
                     "analysis_method": "error"
                 }
             }]
+        finally:
+            # Spill files and buffers go even when the analysis failed
+            for media in downloaded_images:
+                media.discard()
     
     def analyze_audios(self, audio_urls: List[str]) -> List[Dict[str, Any]]:
         """Analyze multiple audio files for compliance"""
@@ -289,17 +297,14 @@ class ComplianceService:
             parsed_url = urlparse(url)
             
             # Check for suspicious patterns in URL
-            suspicious_patterns = ['adult', 'casino', 'gambling', 'pharma', 'pills']
             violations = []
-            
-            for pattern in suspicious_patterns:
-                if pattern in url.lower():
-                    violations.append({
-                        "policy_section": "Prohibited Content",
-                        "violation": f"URL contains suspicious pattern: {pattern}",
-                        "confidence": 0.7,
-                        "evidence": url
-                    })
+            for term in rule_engine.distinct_terms(url, "url_suspicious"):
+                violations.append({
+                    "policy_section": "Prohibited Content",
+                    "violation": f"URL contains suspicious pattern: {term}",
+                    "confidence": 0.7,
+                    "evidence": url
+                })
             
             risk_score = len(violations) * 0.3
             compliant = len(violations) == 0
@@ -369,7 +374,11 @@ class ComplianceService:
             if ad_text:
                 try:
                     print("Processing text content...")
-                    results["text_op"] = self.analyze_text(ad_text)
+                    results["text_op"] = self.analyze_text(
+                        ad_text,
+                        target_region=request.ad_details.target_region,
+                        sector=request.user_data.sector
+                    )
                     items_processed += 1
                 except Exception as e:
                     print(f"Text analysis error: {e}")
@@ -386,6 +395,12 @@ class ComplianceService:
                         "results": image_results
                     }
                     items_processed += len(image_results)
+                    warming = [r["image_compliance"] for r in image_results
+                               if r.get("image_compliance", {}).get("analysis_method") == "model_warming"]
+                    if warming:
+                        results["processing_summary"]["processing_errors"].append(
+                            f"Image analysis: {len(warming)} image(s) not analyzed - {warming[0]['summary']}"
+                        )
                 except Exception as e:
                     print(f"Image analysis error: {e}")
                     results["processing_summary"]["processing_errors"].append(f"Image analysis: {str(e)}")
@@ -0,0 +1,143 @@
+"""Compare prompt tokens and retrieval hit rate of policy chunking strategies.
+
+Run from fastServer/:
+
+    python -m benchmarks.chunking_benchmark --top-k 3 --output chunking.json
+
+Each strategy chunks policy.txt, embeds the chunks with the serving embedding
+model and retrieves the top-k chunks for every labeled ad in
+benchmarks/policy_queries.json. A query is a hit when any of its expected
+policy phrases appears in the retrieved context.
+"""
+import os
+import json
+import argparse
+from typing import List, Dict, Any
+
+import numpy as np
+
+from app.helpers.policy_chunker import chunk_policy_sections
+from app.helpers.policy_vector_index import PolicyVectorIndex
+from app.helpers.policy_compliance_checker import EMBED_MODEL_NAME
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUERIES = os.path.join(BENCH_DIR, "policy_queries.json")
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except ImportError:
+        return int(len(text.split()) * 1.3)
+
+
+def normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+
+def fixed_word_chunks(text: str, chunk_size: int = 512, overlap: int = 50) -> List[Dict[str, Any]]:
+    # Same windowing as chunk_policy_text in embeddings/multimodal_embedding.py
+    words = text.split()
+    chunks = []
+    for i in range(0, len(words), chunk_size - overlap):
+        chunks.append({"chunk_id": f"window-{len(chunks)}", "text": " ".join(words[i:i + chunk_size])})
+    return chunks
+
+
+def llama_index_default_chunks(text: str) -> List[Dict[str, Any]]:
+    from llama_index.core import Document
+    from llama_index.core.node_parser import SentenceSplitter
+
+    nodes = SentenceSplitter().get_nodes_from_documents([Document(text=text)])
+    return [{"chunk_id": f"node-{i}", "text": node.get_content()} for i, node in enumerate(nodes)]
+
+
+def section_chunks(text: str) -> List[Dict[str, Any]]:
+    return chunk_policy_sections(text)
+
+
+STRATEGIES = {
+    "fixed_512_words": fixed_word_chunks,
+    "llama_index_default": llama_index_default_chunks,
+    "sections": section_chunks,
+}
+
+
+def embed_text_for(chunk: Dict[str, Any]) -> str:
+    # Mirrors llama_index, which prepends non-excluded metadata when embedding a node
+    if chunk.get("section"):
+        return f"section: {chunk['section']}\n\n{chunk['text']}"
+    return chunk["text"]
+
+
+def run_strategy(name, chunker, policy_text, queries, encoder, top_k):
+    chunks = chunker(policy_text)
+    embeddings = encoder.encode([embed_text_for(c) for c in chunks], normalize_embeddings=True)
+    index = PolicyVectorIndex(np.asarray(embeddings), chunks)
+
+    query_embeddings = encoder.encode([q["text"] for q in queries], normalize_embeddings=True)
+    results = index.search_batch(np.asarray(query_embeddings), top_k=top_k)
+
+    per_query = []
+    for query, hits in zip(queries, results):
+        context = normalize_space(" ".join(hit["text"] for hit in hits))
+        hit = any(normalize_space(phrase) in context for phrase in query["expected"])
+        per_query.append({
+            "id": query["id"],
+            "hit": hit,
+            "context_tokens": count_tokens(context),
+            "retrieved": [h["chunk_id"] for h in hits],
+        })
+
+    tokens = [q["context_tokens"] for q in per_query]
+    return {
+        "strategy": name,
+        "num_chunks": len(chunks),
+        "mean_chunk_tokens": float(np.mean([count_tokens(c["text"]) for c in chunks])),
+        "hit_rate": sum(q["hit"] for q in per_query) / len(per_query),
+        "mean_context_tokens": float(np.mean(tokens)),
+        "max_context_tokens": int(np.max(tokens)),
+        "queries": per_query,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy-file", default="policy.txt")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES))
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    with open(args.policy_file, "r", encoding="utf-8") as f:
+        policy_text = f.read()
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    encoder = SentenceTransformer(EMBED_MODEL_NAME)
+    report = {"embed_model": EMBED_MODEL_NAME, "top_k": args.top_k, "strategies": []}
+
+    for name in args.strategies:
+        try:
+            report["strategies"].append(run_strategy(name, STRATEGIES[name], policy_text, queries, encoder, args.top_k))
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+
+    for result in report["strategies"]:
+        print(f"{result['strategy']:<22} chunks={result['num_chunks']:<4} "
+              f"hit_rate={result['hit_rate']:.2f} mean_context_tokens={result['mean_context_tokens']:.0f}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
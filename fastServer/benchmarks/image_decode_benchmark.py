@@ -0,0 +1,96 @@
+"""Decode time and decoded bitmap size of preprocess_image, full vs reduced-scale decode.
+
+Run from fastServer/:
+
+    python -m benchmarks.image_decode_benchmark --images creatives/ --output decode.json
+    python -m benchmarks.image_decode_benchmark --synthetic 20 --size 6000 4000
+
+    full     Image.open + load at native resolution, then one resize to the VLM input size
+    reduced  decode_for_vlm (JPEG DCT scaling to about the VLM input size), then the same resize
+
+Per strategy the report gives the mean / p99 time of decode plus resize,
+and the mean size of the bitmap the decoder produced (the peak image
+memory per request). Non-JPEG inputs take the full path either way and
+are reported separately under "by_format".
+"""
+import io
+import json
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from app.helpers.vlm_payload import decode_for_vlm, fit_for_vlm
+from benchmarks.text_detector_benchmark import git_commit
+from benchmarks.vlm_payload_benchmark import load_sources
+
+
+def full(source):
+    image = Image.open(io.BytesIO(source))
+    image.load()
+    decoded = image.size, len(image.getbands())
+    fit_for_vlm(image.convert("RGB"))
+    return decoded
+
+
+def reduced(source):
+    image, decode = decode_for_vlm(source)
+    fit_for_vlm(image.convert("RGB"))
+    return decode["decoded_size"], len(image.getbands())
+
+
+def measure(fn, sources):
+    times, bitmap_mb = [], []
+    for _, source in sources:
+        t0 = time.perf_counter()
+        (width, height), bands = fn(source)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        bitmap_mb.append(width * height * bands / 1e6)
+    return {
+        "mean_ms": round(float(np.mean(times)), 1),
+        "p99_ms": round(float(np.percentile(times, 99)), 1),
+        "mean_bitmap_mb": round(float(np.mean(bitmap_mb)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="directory of sample creatives")
+    parser.add_argument("--synthetic", type=int, default=20)
+    parser.add_argument("--size", nargs=2, type=int, default=[4000, 3000], metavar=("W", "H"))
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    sources = load_sources(args)
+    by_format = {}
+    for name, source in sources:
+        by_format.setdefault(Image.open(io.BytesIO(source)).format, []).append((name, source))
+
+    report = {"commit": git_commit(), "images": len(sources), "by_format": {}}
+    for name in ("full", "reduced"):
+        report[name] = measure(full if name == "full" else reduced, sources)
+    for image_format, group in sorted(by_format.items()):
+        report["by_format"][image_format] = {
+            "images": len(group),
+            "full": measure(full, group),
+            "reduced": measure(reduced, group),
+        }
+    report["decode_ms_saved"] = round(report["full"]["mean_ms"] - report["reduced"]["mean_ms"], 1)
+
+    for name in ("full", "reduced"):
+        result = report[name]
+        print(f"{name:<8} decode+resize={result['mean_ms']}ms p99={result['p99_ms']}ms "
+              f"bitmap={result['mean_bitmap_mb']}MB")
+    print(f"saved    {report['decode_ms_saved']}ms per image")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""VLM calls saved vs verdict agreement of CLIP image triage.
+
+Run from fastServer/:
+
+    python -m benchmarks.image_triage_benchmark --images reviewed_creatives/ --output triage.json
+    python -m benchmarks.image_triage_benchmark --images reviewed_creatives/ --clean-below 0.05 0.1 0.2 --escalate-above 0.4 0.6
+
+The reference verdicts are the VLM's (or a reviewer's). A set is a directory
+with compliant/ and non_compliant/ subdirectories, or any directory with a
+verdicts.json mapping file name -> true/false (compliant) or -> a saved
+check_image_compliance result. Images are embedded once; every threshold
+setting re-scores the same embeddings.
+
+For every (clean_below, escalate_above) pair the report gives:
+
+    clean_rate           share of images triaged clean (reduced prompt in "reduce" mode)
+    vlm_calls_saved      share triaged clean with no text detected (no VLM call in "skip" mode)
+    agreement            share of clean-triaged images the reference also found compliant
+    missed_violations    non-compliant images triaged clean / skipped
+    escalation_rate      share of images escalated
+    escalation_recall    share of non-compliant images that were escalated
+"""
+import os
+import glob
+import json
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from app.helpers.image_triage import ClipImageTriage
+from app.helpers.text_detector import text_detector
+from benchmarks.text_detector_benchmark import IMAGE_EXTENSIONS, git_commit
+
+
+def load_reviewed_images(directory):
+    verdicts_path = os.path.join(directory, "verdicts.json")
+    if os.path.exists(verdicts_path):
+        with open(verdicts_path, "r", encoding="utf-8") as f:
+            verdicts = json.load(f)
+        samples = []
+        for name, verdict in sorted(verdicts.items()):
+            if isinstance(verdict, dict):
+                verdict = verdict.get("image_compliance", verdict).get("compliant", False)
+            samples.append((os.path.join(directory, name), bool(verdict)))
+        return samples
+
+    samples = []
+    for subdir, compliant in (("compliant", True), ("non_compliant", False)):
+        for path in sorted(glob.glob(os.path.join(directory, subdir, "*"))):
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((path, compliant))
+    return samples
+
+
+def evaluate(triage, embeddings, compliant, has_text, clean_below, escalate_above):
+    triage.clean_below, triage.escalate_above = clean_below, escalate_above
+    decisions = np.array([triage._score(embedding)["decision"] for embedding in embeddings])
+    clean = decisions == "clean"
+    skipped = clean & ~has_text
+    escalated = decisions == "escalate"
+    violating = ~compliant
+    return {
+        "clean_below": clean_below,
+        "escalate_above": escalate_above,
+        "clean_rate": round(float(clean.mean()), 3),
+        "vlm_calls_saved": round(float(skipped.mean()), 3),
+        "agreement": round(float(compliant[clean].mean()), 3) if clean.any() else None,
+        "missed_violations": int((clean & violating).sum()),
+        "missed_violations_skipped": int((skipped & violating).sum()),
+        "escalation_rate": round(float(escalated.mean()), 3),
+        "escalation_recall": round(float(escalated[violating].mean()), 3) if violating.any() else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="directory of creatives with reference verdicts")
+    parser.add_argument("--clean-below", nargs="+", type=float, default=[0.05, 0.1, 0.15, 0.2, 0.3])
+    parser.add_argument("--escalate-above", nargs="+", type=float, default=[0.45])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    samples = load_reviewed_images(args.images)
+    if not samples:
+        raise SystemExit(f"No reviewed images found in {args.images}")
+
+    triage = ClipImageTriage()
+    if not triage.available:
+        raise SystemExit(f"CLIP triage unavailable: {triage.error}")
+
+    embeddings, has_text, embed_ms = [], [], []
+    for start in range(0, len(samples), args.batch_size):
+        images = [Image.open(path).convert("RGB") for path, _ in samples[start:start + args.batch_size]]
+        t0 = time.perf_counter()
+        embeddings.extend(triage.encoder.encode_images(images))
+        embed_ms.append((time.perf_counter() - t0) * 1000.0 / len(images))
+        has_text.extend(text_detector.detect(image)["has_text"] for image in images)
+    compliant = np.array([label for _, label in samples])
+    has_text = np.array(has_text)
+
+    report = {
+        "commit": git_commit(),
+        "images": len(samples),
+        "compliant": int(compliant.sum()),
+        "with_text": int(has_text.sum()),
+        "embed_ms_per_image": round(float(np.mean(embed_ms)), 1),
+        "settings": [
+            evaluate(triage, embeddings, compliant, has_text, clean_below, escalate_above)
+            for escalate_above in args.escalate_above
+            for clean_below in args.clean_below
+        ],
+    }
+
+    for result in report["settings"]:
+        print(f"clean<={result['clean_below']:<5} escalate>={result['escalate_above']:<5} "
+              f"clean={result['clean_rate']:.2f} saved={result['vlm_calls_saved']:.2f} "
+              f"agreement={result['agreement']} missed={result['missed_violations']} "
+              f"escalated={result['escalation_rate']:.2f} recall={result['escalation_recall']}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
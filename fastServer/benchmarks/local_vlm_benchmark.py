@@ -0,0 +1,119 @@
+"""RSS, load time and tokens/sec of local Qwen2.5-VL CPU profiles.
+
+Run from fastServer/ on the CPU box that will serve local mode:
+
+    python -m benchmarks.local_vlm_benchmark --output local_vlm.json
+    python -m benchmarks.local_vlm_benchmark --profiles float32:none bfloat16:int8 --new-tokens 64
+
+Each profile is dtype:quantization (see app/helpers/local_vlm.py) and runs
+in its own subprocess so resident memory is measured from a clean process.
+The baseline, float32:none, is the previous CPU loading path. Per profile:
+
+    load_seconds      from_pretrained + quantization
+    rss_mb / peak_mb  resident memory after the load / peak over the run
+    prefill_ms        time to the first generated token (image + prompt)
+    tokens_per_sec    decode throughput over --new-tokens generated tokens
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from benchmarks.text_detector_benchmark import git_commit, synthetic_images
+
+DEFAULT_PROFILES = ["float32:none", "float32:int8", "bfloat16:none", "bfloat16:int8", "bfloat16:int4"]
+PROMPT = "Describe this advertisement and list any visible text."
+
+
+def memory_mb():
+    """(current RSS, peak RSS) in MB from /proc"""
+    values = {}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key, amount = line.split(":", 1)
+                values[key] = int(amount.split()[0]) / 1024.0
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def run_profile(model_name, profile, new_tokens, threads):
+    import torch
+    from qwen_vl_utils import process_vision_info
+    from app.helpers.local_vlm import cpu_profile, load_local_vlm
+    from app.helpers.vlm_payload import VLM_MAX_PIXELS
+
+    dtype, quantization = profile.split(":")
+    model, processor, info = load_local_vlm(model_name, "cpu", cpu_profile(quantization, dtype, threads))
+    rss_after_load, _ = memory_mb()
+
+    image = synthetic_images(2)[1][2]
+    messages = [{"role": "user", "content": [
+        {"type": "image", "image": image, "max_pixels": VLM_MAX_PIXELS},
+        {"type": "text", "text": PROMPT},
+    ]}]
+    text = processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    image_inputs, video_inputs = process_vision_info(messages)
+    inputs = processor(text=[text], images=image_inputs, videos=video_inputs, padding=True, return_tensors="pt")
+
+    def generate(count):
+        t0 = time.perf_counter()
+        with torch.no_grad():
+            model.generate(**inputs, max_new_tokens=count, min_new_tokens=count, do_sample=False)
+        return time.perf_counter() - t0
+
+    prefill = generate(1)
+    total = generate(new_tokens)
+    _, peak = memory_mb()
+    return {
+        **info,
+        "rss_mb": round(rss_after_load),
+        "peak_mb": round(peak),
+        "input_tokens": int(inputs.input_ids.shape[1]),
+        "prefill_ms": round(prefill * 1000.0),
+        "tokens_per_sec": round((new_tokens - 1) / max(total - prefill, 1e-6), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="Qwen/Qwen2.5-VL-7B-Instruct")
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES)
+    parser.add_argument("--new-tokens", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0: all cores)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.model, args.child, args.new_tokens, args.threads or os.cpu_count())))
+        return
+
+    report = {"commit": git_commit(), "model": args.model, "new_tokens": args.new_tokens, "profiles": {}}
+    for profile in args.profiles:
+        command = [sys.executable, "-m", "benchmarks.local_vlm_benchmark", "--child", profile,
+                   "--model", args.model, "--new-tokens", str(args.new_tokens), "--threads", str(args.threads)]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            report["profiles"][profile] = {"error": completed.stderr.strip().splitlines()[-1:]}
+        else:
+            report["profiles"][profile] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    for profile, result in report["profiles"].items():
+        if "error" in result:
+            print(f"{profile:<16} failed: {result['error']}")
+            continue
+        print(f"{profile:<16} load={result['load_seconds']}s rss={result['rss_mb']}MB peak={result['peak_mb']}MB "
+              f"prefill={result['prefill_ms']}ms decode={result['tokens_per_sec']} tok/s ({result['quantization']})")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Per-language retrieval quality and latency, English-only vs multilingual embeddings.
+
+Run from fastServer/:
+
+    python -m benchmarks.multilingual_benchmark --output multilingual.json
+    python -m benchmarks.multilingual_benchmark --end-to-end --repeat 1
+
+Queries from benchmarks/policy_queries.json are grouped by their "language"
+field (English when absent). For each embedding model the hybrid retriever
+(the serving path) reports recall@k and p50/p99 retrieval latency per
+language.
+
+--end-to-end also runs PolicyComplianceChecker.check_compliance, which needs
+the Groq and Gemini API keys, under two configurations:
+
+    before  English MiniLM; non-English ads take the Gemini route
+    after   multilingual MiniLM; every language shares Groq + RAG
+
+The rule-engine short circuit and the verdict cache are disabled so every
+call reaches the LLM.
+"""
+import json
+import time
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from app.helpers import policy_compliance_checker as checker_module
+from app.helpers.policy_compliance_checker import EMBED_MODEL_NAME, MULTILINGUAL_EMBED_MODEL
+from benchmarks.retrieval_benchmark import DEFAULT_QUERIES, build_retrievers, relevant, git_commit
+
+END_TO_END_CONFIGS = {
+    "before": {"model": EMBED_MODEL_NAME, "route": "gemini"},
+    "after": {"model": MULTILINGUAL_EMBED_MODEL, "route": "shared"},
+}
+
+
+def group_by_language(queries):
+    groups = defaultdict(list)
+    for query in queries:
+        groups[query.get("language", "en")].append(query)
+    return dict(sorted(groups.items()))
+
+
+def summarize(latencies):
+    return {"p50_ms": float(np.percentile(latencies, 50)), "p99_ms": float(np.percentile(latencies, 99))}
+
+
+def retrieval_report(policy_text, model_name, groups, k, repeat):
+    retrievers, _ = build_retrievers(policy_text, ["hybrid"], model_name)
+    search = retrievers["hybrid"]
+    search("warm-up", k)
+
+    report = {}
+    for language, queries in groups.items():
+        latencies, recalls = [], []
+        for query in queries:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                hits = search(query["text"], k)
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+            expected = query["expected_sections"]
+            covered = {p for p in expected if any(relevant(hit["chunk_id"], [p]) for hit in hits)}
+            recalls.append(len(covered) / len(expected))
+        report[language] = {"queries": len(queries), f"recall@{k}": float(np.mean(recalls)), **summarize(latencies)}
+    return report
+
+
+def end_to_end_report(policy_file, config, groups, repeat):
+    from app.helpers.verdict_cache import verdict_cache
+
+    checker_module.RULE_ENGINE_SHORT_CIRCUIT = False
+    checker_module.VERDICT_CACHE_ENABLED = False
+    checker_module.NON_ENGLISH_ROUTE = config["route"]
+
+    checker = checker_module.PolicyComplianceChecker(policy_file=policy_file, embed_model_name=config["model"])
+    checker.setup_models()
+    checker.load_policy_documents()
+
+    report = {}
+    for language, queries in groups.items():
+        latencies, methods = [], defaultdict(int)
+        for query in queries:
+            for _ in range(repeat):
+                verdict_cache.clear()
+                t0 = time.perf_counter()
+                result = checker.check_compliance(query["text"])
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                methods[result.get("analysis_method", "unknown")] += 1
+        report[language] = {"queries": len(queries), "analysis_methods": dict(methods), **summarize(latencies)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy-file", default="policy.txt")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--models", nargs="+", default=[EMBED_MODEL_NAME, MULTILINGUAL_EMBED_MODEL])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--end-to-end", action="store_true", help="also time full check_compliance calls (needs API keys)")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    with open(args.policy_file, "r", encoding="utf-8") as f:
+        policy_text = f.read()
+    with open(args.queries, "r", encoding="utf-8") as f:
+        groups = group_by_language(json.load(f))
+
+    report = {"commit": git_commit(), "k": args.k, "retrieval": {}, "end_to_end": {}}
+    for model_name in args.models:
+        report["retrieval"][model_name] = retrieval_report(policy_text, model_name, groups, args.k, args.repeat)
+    if args.end_to_end:
+        for name, config in END_TO_END_CONFIGS.items():
+            report["end_to_end"][name] = {**config, "languages": end_to_end_report(args.policy_file, config, groups, args.repeat)}
+
+    for model_name, languages in report["retrieval"].items():
+        print(model_name)
+        for language, stats in languages.items():
+            print(f"  {language:<3} recall@{args.k}={stats[f'recall@{args.k}']:.2f} "
+                  f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+    for name, result in report["end_to_end"].items():
+        print(f"{name} ({result['model']}, route={result['route']})")
+        for language, stats in result["languages"].items():
+            print(f"  {language:<3} p50={stats['p50_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms {stats['analysis_methods']}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Parity, latency and memory benchmark for the ONNX Runtime encoder backend.
+
+Run from fastServer/:
+
+    python -m benchmarks.onnx_encoder_benchmark --min-cosine 0.98 --output onnx.json
+
+Every backend runs in its own subprocess so load time and peak RSS are not
+polluted by the other backend's allocations. The parent compares the
+embeddings row by row and exits non-zero when the mean cosine similarity
+against the torch reference falls below the threshold, so the
+script doubles as the parity check for EMBEDDING_BACKEND=onnx.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUERIES = os.path.join(BENCH_DIR, "policy_queries.json")
+TEXT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def load_texts(queries_path, policy_file):
+    from app.helpers.policy_chunker import chunk_policy_sections
+
+    with open(queries_path, "r", encoding="utf-8") as f:
+        texts = [q["text"] for q in json.load(f)]
+    with open(policy_file, "r", encoding="utf-8") as f:
+        texts += [c["text"] for c in chunk_policy_sections(f.read())]
+    return texts
+
+
+def load_images(image_dir, limit=32):
+    from PIL import Image
+
+    if not image_dir or not os.path.isdir(image_dir):
+        return []
+    paths = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    )
+    return [Image.open(path).convert("RGB") for path in paths[:limit]]
+
+
+def time_calls(fn, items, batch_size):
+    latencies = []
+    outputs = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        t0 = time.perf_counter()
+        outputs.append(np.asarray(fn(batch), dtype=np.float32))
+        latencies.append((time.perf_counter() - t0) * 1000.0 / len(batch))
+    return np.vstack(outputs), latencies
+
+
+def run_worker(args):
+    texts = load_texts(args.queries, args.policy_file)
+    images = load_images(args.image_dir)
+    report = {"backend": args.worker}
+
+    t0 = time.perf_counter()
+    if args.worker == "torch":
+        import torch
+        import open_clip
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(args.threads)
+        text_model = SentenceTransformer(TEXT_MODEL)
+        text_fn = lambda batch: text_model.encode(batch, normalize_embeddings=True)
+
+        clip_model, _, clip_preprocess = open_clip.create_model_and_transforms("ViT-B-32", pretrained="openai")
+        clip_model.eval()
+        clip_tokenizer = open_clip.get_tokenizer("ViT-B-32")
+
+        def clip_text_fn(batch):
+            with torch.no_grad():
+                features = clip_model.encode_text(clip_tokenizer(batch))
+            return (features / features.norm(dim=-1, keepdim=True)).numpy()
+
+        def clip_image_fn(batch):
+            with torch.no_grad():
+                features = clip_model.encode_image(torch.stack([clip_preprocess(image) for image in batch]))
+            return (features / features.norm(dim=-1, keepdim=True)).numpy()
+    else:
+        from app.helpers.onnx_encoders import OnnxTextEncoder, OnnxClipEncoder
+
+        text_fn = OnnxTextEncoder(TEXT_MODEL, num_threads=args.threads).encode
+        clip = OnnxClipEncoder(num_threads=args.threads)
+        clip_text_fn = clip.encode_texts
+        clip_image_fn = clip.encode_images
+    report["load_seconds"] = time.perf_counter() - t0
+
+    outputs = {}
+    for name, fn, items in (("minilm_text", text_fn, texts),
+                            ("clip_text", clip_text_fn, texts),
+                            ("clip_image", clip_image_fn, images)):
+        if not items:
+            continue
+        fn(items[:2])  # warm-up
+        embeddings, latencies = time_calls(fn, items, args.batch_size)
+        outputs[name] = embeddings
+        report[name] = {
+            "items": len(items),
+            "p50_ms_per_item": float(np.percentile(latencies, 50)),
+            "p99_ms_per_item": float(np.percentile(latencies, 99)),
+        }
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    np.savez(args.embeddings_out, **outputs)
+    print(json.dumps(report))
+
+
+def spawn_worker(backend, args, embeddings_path):
+    cmd = [sys.executable, "-m", "benchmarks.onnx_encoder_benchmark",
+           "--worker", backend, "--embeddings-out", embeddings_path,
+           "--queries", args.queries, "--policy-file", args.policy_file,
+           "--threads", str(args.threads), "--batch-size", str(args.batch_size)]
+    if args.image_dir:
+        cmd += ["--image-dir", args.image_dir]
+    completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--policy-file", default="policy.txt")
+    parser.add_argument("--image-dir", help="optional directory of sample creatives for the CLIP image tower")
+    parser.add_argument("--threads", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--output")
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {backend: os.path.join(tmp, f"{backend}.npz") for backend in ("torch", "onnx")}
+        reports = {backend: spawn_worker(backend, args, path) for backend, path in paths.items()}
+        reference = np.load(paths["torch"])
+        candidate = np.load(paths["onnx"])
+
+        parity = {}
+        for name in reference.files:
+            cosines = np.sum(reference[name] * candidate[name], axis=1)
+            parity[name] = {"mean_cosine": float(cosines.mean()), "min_cosine": float(cosines.min())}
+
+    report = {"threads": args.threads, "batch_size": args.batch_size, "backends": reports, "parity": parity}
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    failing = [name for name, p in parity.items() if p["mean_cosine"] < args.min_cosine]
+    if failing:
+        print(f"Parity below threshold for: {', '.join(failing)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Retrieval quality and latency of the policy retrievers.
+
+Run from fastServer/:
+
+    python -m benchmarks.retrieval_benchmark --k 1 3 5 --output retrieval.json
+
+Every retriever searches the same section-chunked index of policy.txt:
+
+    llama_index  VectorStoreIndex.as_retriever (the original query-engine path)
+    numpy        PolicyVectorIndex lifted from the llama_index vector store
+    hybrid       HybridPolicyRetriever (BM25 + vector, reciprocal rank fusion)
+
+Labeled queries come from benchmarks/policy_queries.json. A retrieved chunk is
+relevant when its chunk ID starts with one of the query's expected_sections.
+Recall@k is the fraction of expected sections covered by the top k; MRR uses
+the rank of the first relevant chunk. Ad texts from the sample response in
+output.json (ad copy and OCR text) carry no labels and only contribute to the
+latency and context-token figures. The report records the git commit so runs
+can be compared across commits.
+"""
+import os
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+from app.helpers.policy_vector_index import PolicyVectorIndex
+from app.helpers.hybrid_retriever import HybridPolicyRetriever
+from app.helpers.policy_compliance_checker import EMBED_MODEL_NAME, build_policy_nodes
+from benchmarks.chunking_benchmark import count_tokens
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUERIES = os.path.join(BENCH_DIR, "policy_queries.json")
+DEFAULT_SAMPLES = os.path.join(os.path.dirname(BENCH_DIR), "output.json", "output.json")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_sample_texts(path):
+    """Ad copy and OCR text from a saved /compliance response"""
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        response = json.load(f)
+
+    texts = []
+    text_op = response.get("text_op") or {}
+    if text_op.get("processed_content"):
+        texts.append(text_op["processed_content"].rstrip(". "))
+    for result in (response.get("image_op") or {}).get("results", []):
+        extracted = result.get("image_compliance", {}).get("extracted_text")
+        if extracted:
+            texts.append(extracted)
+    return [{"id": f"sample-{i}", "text": text} for i, text in enumerate(texts)]
+
+
+def build_retrievers(policy_text, names, model_name=EMBED_MODEL_NAME):
+    from llama_index.core import VectorStoreIndex, Settings
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    embed_model = HuggingFaceEmbedding(model_name=model_name)
+    Settings.embed_model = embed_model
+    index = VectorStoreIndex(build_policy_nodes(policy_text))
+
+    chunks, embeddings = [], []
+    for node_id, node in index.docstore.docs.items():
+        chunks.append({**node.metadata, "chunk_id": node_id, "text": node.get_content()})
+        embeddings.append(index.vector_store.get(node_id))
+    vector_index = PolicyVectorIndex(embeddings, chunks)
+
+    # Uncached encoder so every retriever pays for its query embedding
+    embed_fn = lambda texts: np.asarray(embed_model.get_text_embedding_batch(list(texts)), dtype=np.float32)
+    text_by_id = {chunk["chunk_id"]: chunk["text"] for chunk in chunks}
+
+    def llama_search(query, top_k):
+        nodes = index.as_retriever(similarity_top_k=top_k).retrieve(query)
+        return [{"chunk_id": n.node.node_id, "text": text_by_id[n.node.node_id]} for n in nodes]
+
+    def numpy_search(query, top_k):
+        return vector_index.search_batch(embed_fn([query]), top_k=top_k)[0]
+
+    hybrid = HybridPolicyRetriever(vector_index, embed_fn)
+    retrievers = {
+        "llama_index": llama_search,
+        "numpy": numpy_search,
+        "hybrid": hybrid.search,
+    }
+    return {name: retrievers[name] for name in names}, len(chunks)
+
+
+def relevant(chunk_id, expected_sections):
+    return any(chunk_id == prefix or chunk_id.startswith(prefix + "/") for prefix in expected_sections)
+
+
+def evaluate(search, queries, samples, ks, repeat):
+    max_k = max(ks)
+    latencies, context_tokens = [], []
+    recall = {k: [] for k in ks}
+    reciprocal_ranks = []
+    per_query = []
+
+    for query in queries + samples:
+        hits = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            hits = search(query["text"], max_k)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+        ids = [hit["chunk_id"] for hit in hits]
+        context_tokens.append(count_tokens(" ".join(hit["text"] for hit in hits[:min(ks)])))
+
+        expected = query.get("expected_sections")
+        if not expected:
+            continue
+        for k in ks:
+            covered = {p for p in expected if any(relevant(i, [p]) for i in ids[:k])}
+            recall[k].append(len(covered) / len(expected))
+        rank = next((r for r, i in enumerate(ids, 1) if relevant(i, expected)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        per_query.append({"id": query["id"], "first_relevant_rank": rank, "retrieved": ids})
+
+    return {
+        "recall": {f"@{k}": float(np.mean(v)) for k, v in recall.items()},
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "mean_context_tokens": float(np.mean(context_tokens)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "queries": per_query,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy-file", default="policy.txt")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="saved /compliance response with unlabeled ad texts")
+    parser.add_argument("--retrievers", nargs="+", default=["llama_index", "numpy", "hybrid"])
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=5, help="timed searches per query")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    with open(args.policy_file, "r", encoding="utf-8") as f:
+        policy_text = f.read()
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    samples = load_sample_texts(args.samples)
+
+    retrievers, num_chunks = build_retrievers(policy_text, args.retrievers)
+    for search in retrievers.values():
+        search(queries[0]["text"], max(args.k))  # warm-up
+
+    report = {
+        "commit": git_commit(),
+        "embed_model": EMBED_MODEL_NAME,
+        "num_chunks": num_chunks,
+        "labeled_queries": len(queries),
+        "unlabeled_samples": len(samples),
+        "k": args.k,
+        "context_tokens_at_k": min(args.k),
+        "retrievers": {},
+    }
+    for name, search in retrievers.items():
+        report["retrievers"][name] = evaluate(search, queries, samples, args.k, args.repeat)
+
+    for name, result in report["retrievers"].items():
+        recall = " ".join(f"R{k}={v:.2f}" for k, v in result["recall"].items())
+        print(f"{name:<12} {recall} MRR={result['mrr']:.2f} tokens={result['mean_context_tokens']:.0f} "
+              f"p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
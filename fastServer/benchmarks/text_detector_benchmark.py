@@ -0,0 +1,171 @@
+"""OCR skip rate vs missed text of the local text-presence detector.
+
+Run from fastServer/:
+
+    python -m benchmarks.text_detector_benchmark --images labeled_images/ --output text_detector.json
+    python -m benchmarks.text_detector_benchmark --synthetic 200 --min-glyphs 2 3 4
+
+A labeled image set is a directory with text/ and no_text/ subdirectories,
+or any directory with a labels.json mapping file name -> true/false (has
+text). Without one, --synthetic N renders N labeled creatives: product-photo
+style backgrounds (gradients, soft shapes, sensor noise), half of them with
+an ad line drawn in a random font, size, position and colour.
+
+For every --min-glyphs setting the report gives:
+
+    skip_rate          share of all images whose OCR VLM call would be skipped
+    missed_text_rate   share of text images wrongly skipped (text the VLM never reads)
+    false_alarm_rate   share of no-text images that would still get an OCR call
+    crop_area          mean share of the image sent to OCR when text is found
+    p50_ms / p99_ms    detector latency per image
+"""
+import os
+import glob
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from app.helpers.text_detector import TextPresenceDetector
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+AD_LINES = [
+    "Buy now 50% OFF today", "Limited offer - free delivery", "New flavour. Same joy.",
+    "Sign up and win big", "Shop the summer sale", "Guaranteed results in 7 days",
+]
+
+
+def git_commit():
+    # Not imported from retrieval_benchmark, which pulls in the llama_index stack
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_labeled_images(directory):
+    labels_path = os.path.join(directory, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+        return [(os.path.join(directory, name), bool(has_text)) for name, has_text in sorted(labels.items())]
+
+    samples = []
+    for subdir, has_text in (("text", True), ("no_text", False)):
+        for path in sorted(glob.glob(os.path.join(directory, subdir, "*"))):
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((path, has_text))
+    return samples
+
+
+def synthetic_creative(seed, with_text, fonts):
+    rng = np.random.default_rng(seed)
+    height, width = 720, 960
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = np.stack([
+        xx / width * rng.uniform(50, 200),
+        yy / height * rng.uniform(50, 200),
+        np.full(xx.shape, rng.uniform(30, 200)),
+    ], axis=-1).astype(np.uint8)
+
+    image = Image.fromarray(background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.integers(3, 9)):
+        x, y, r = int(rng.integers(0, width - 100)), int(rng.integers(0, height - 100)), int(rng.integers(30, 200))
+        draw.ellipse([x, y, x + r, y + r], fill=tuple(int(v) for v in rng.integers(0, 255, 3)))
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    noisy = np.asarray(image, dtype=np.float32) + rng.normal(0, 6, (height, width, 3))
+    image = Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+
+    if with_text:
+        draw = ImageDraw.Draw(image)
+        size = int(rng.integers(18, 60))
+        font = ImageFont.truetype(fonts[seed % len(fonts)], size) if fonts else ImageFont.load_default()
+        color = tuple(int(v) for v in rng.integers(0, 255, 3)) if seed % 2 else (255, 255, 255)
+        position = (int(rng.integers(10, 300)), int(rng.integers(10, 600)))
+        draw.text(position, AD_LINES[seed % len(AD_LINES)], fill=color, font=font)
+    return image
+
+
+def synthetic_images(count):
+    fonts = sorted(glob.glob("/usr/share/fonts/**/*.ttf", recursive=True))
+    return [(f"synthetic-{i}", i % 2 == 1, synthetic_creative(i, i % 2 == 1, fonts)) for i in range(count)]
+
+
+def evaluate(detector, samples):
+    latencies, crop_areas, per_image = [], [], []
+    counts = {"text": 0, "no_text": 0, "missed": 0, "false_alarm": 0, "skipped": 0}
+
+    for name, has_text, image in samples:
+        t0 = time.perf_counter()
+        detection = detector.detect(image)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        counts["text" if has_text else "no_text"] += 1
+        if not detection["has_text"]:
+            counts["skipped"] += 1
+            counts["missed"] += has_text
+        else:
+            counts["false_alarm"] += not has_text
+            crop = detector.crop_text_regions(image, detection["regions"])
+            crop_areas.append(crop.width * crop.height / float(image.width * image.height))
+        per_image.append({"image": name, "has_text": has_text, "detected": detection["has_text"],
+                          "lines": detection["lines"]})
+
+    return {
+        "skip_rate": counts["skipped"] / len(samples),
+        "missed_text_rate": counts["missed"] / max(counts["text"], 1),
+        "false_alarm_rate": counts["false_alarm"] / max(counts["no_text"], 1),
+        "crop_area": float(np.mean(crop_areas)) if crop_areas else None,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "counts": counts,
+        "images": per_image,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="labeled image directory (text/ + no_text/, or labels.json)")
+    parser.add_argument("--synthetic", type=int, default=100, help="synthetic creatives when --images is not given")
+    parser.add_argument("--min-glyphs", nargs="+", type=int, default=[3])
+    parser.add_argument("--max-side", type=int, default=800)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    if args.images:
+        samples = [(path, has_text, Image.open(path).convert("RGB"))
+                   for path, has_text in load_labeled_images(args.images)]
+    else:
+        samples = synthetic_images(args.synthetic)
+
+    report = {
+        "commit": git_commit(),
+        "source": args.images or f"synthetic:{args.synthetic}",
+        "images": len(samples),
+        "settings": {},
+    }
+    for min_glyphs in args.min_glyphs:
+        detector = TextPresenceDetector(max_side=args.max_side, min_glyphs=min_glyphs)
+        report["settings"][f"min_glyphs={min_glyphs}"] = evaluate(detector, samples)
+
+    for name, result in report["settings"].items():
+        crop = f"{result['crop_area']:.2f}" if result["crop_area"] is not None else "-"
+        print(f"{name:<14} skip={result['skip_rate']:.2f} missed_text={result['missed_text_rate']:.2f} "
+              f"false_alarm={result['false_alarm_rate']:.2f} crop_area={crop} "
+              f"p50={result['p50_ms']:.0f}ms p99={result['p99_ms']:.0f}ms")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
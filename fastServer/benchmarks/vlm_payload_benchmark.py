@@ -0,0 +1,140 @@
+"""Upload bytes, image tokens and CPU time of VLM image payloads, before vs after.
+
+Run from fastServer/:
+
+    python -m benchmarks.vlm_payload_benchmark --images creatives/ --output payload.json
+    python -m benchmarks.vlm_payload_benchmark --synthetic 50 --size 4000 3000
+
+    before  LANCZOS thumbnail to 1024px, JPEG quality 90 on every call
+    after   reduced-scale JPEG decode, one resize to the Qwen2.5-VL pixel
+            budget, detail-adaptive JPEG quality, original JPEG bytes
+            reused when they fit, payload cache
+
+Images come from a directory (any common format) or from synthetic
+creatives scaled to --size. --calls sets how many VLM calls each image
+makes (2 for two-pass OCR + analysis), which is where the payload cache
+pays off. CPU time covers preprocessing and encoding, not the upload.
+"""
+import io
+import os
+import glob
+import json
+import time
+import base64
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from app.helpers.vlm_payload import VLMPayloadEncoder, decode_for_vlm, fit_for_vlm, qwen_target_size, image_tokens
+from benchmarks.text_detector_benchmark import IMAGE_EXTENSIONS, git_commit, synthetic_images
+
+
+def load_sources(args):
+    """(name, encoded source bytes) pairs, as they would arrive from a download"""
+    if args.images:
+        paths = [p for p in sorted(glob.glob(os.path.join(args.images, "*"))) if p.lower().endswith(IMAGE_EXTENSIONS)]
+        sources = []
+        for path in paths:
+            with open(path, "rb") as f:
+                sources.append((os.path.basename(path), f.read()))
+        return sources
+
+    sources = []
+    for name, _, image in synthetic_images(args.synthetic):
+        buffer = io.BytesIO()
+        image.resize(tuple(args.size), Image.Resampling.BICUBIC).save(buffer, format="JPEG", quality=92)
+        sources.append((name, buffer.getvalue()))
+    return sources
+
+
+def before(source, calls):
+    image = Image.open(io.BytesIO(source))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if max(image.size) > 1024:
+        image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+
+    sent = 0
+    for _ in range(calls):
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        sent += len(base64.b64encode(buffer.getvalue()))
+    # Hosted Qwen2.5-VL keeps the full default budget (16384 tokens)
+    tokens = image_tokens(*qwen_target_size(*image.size, max_pixels=16384 * 28 * 28))
+    return sent, tokens * calls
+
+
+def after(source, calls, encoder):
+    # Same steps as ImageComplianceChecker.preprocess_image
+    image, decode = decode_for_vlm(source, 1024, encoder.max_pixels)
+    decoded_mode = image.mode
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image = fit_for_vlm(image, 1024, encoder.max_pixels)
+    if decode["format"] == "JPEG" and decode["orientation"] == 1 and decoded_mode == "RGB" \
+            and image.size == decode["original_size"]:
+        image.info["source_bytes"] = source
+        image.info["source_format"] = decode["format"]
+
+    sent, tokens, reused = 0, 0, False
+    for _ in range(calls):
+        payload = encoder.encode(image)
+        sent += len(payload["base64"])
+        tokens += payload["image_tokens"]
+        reused = payload["reused_source"]
+    return sent, tokens, reused
+
+
+def measure(fn, sources):
+    sent, tokens, cpu_ms = [], [], []
+    for _, source in sources:
+        t0 = time.process_time()
+        result = fn(source)
+        cpu_ms.append((time.process_time() - t0) * 1000.0)
+        sent.append(result[0])
+        tokens.append(result[1])
+    return {
+        "mean_upload_kb": float(np.mean(sent)) / 1024.0,
+        "mean_image_tokens": float(np.mean(tokens)),
+        "mean_cpu_ms": float(np.mean(cpu_ms)),
+        "p99_cpu_ms": float(np.percentile(cpu_ms, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="directory of sample creatives")
+    parser.add_argument("--synthetic", type=int, default=30)
+    parser.add_argument("--size", nargs=2, type=int, default=[2400, 1600], metavar=("W", "H"))
+    parser.add_argument("--calls", type=int, default=1, help="VLM calls per image")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    sources = load_sources(args)
+    encoder = VLMPayloadEncoder()
+    report = {
+        "commit": git_commit(),
+        "images": len(sources),
+        "calls_per_image": args.calls,
+        "max_pixels": encoder.max_pixels,
+        "before": measure(lambda source: before(source, args.calls), sources),
+        "after": measure(lambda source: after(source, args.calls, encoder), sources),
+        "encoder_stats": encoder.stats,
+    }
+
+    for name in ("before", "after"):
+        result = report[name]
+        print(f"{name:<7} upload={result['mean_upload_kb']:.0f}KB tokens={result['mean_image_tokens']:.0f} "
+              f"cpu={result['mean_cpu_ms']:.1f}ms p99={result['p99_cpu_ms']:.1f}ms")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from app.helpers.hf_warmup import ModelWarmingError, ModelWarmupManager
+
+
+def still_loading():
+    return False
+
+
+def test_fail_fast_raises_with_retry_after():
+    manager = ModelWarmupManager(base_delay=60)
+    manager.mark_cold("qwen", still_loading, estimated_time=20)
+
+    with pytest.raises(ModelWarmingError) as error:
+        manager.wait_until_ready("qwen", policy="fail_fast")
+
+    assert error.value.model_key == "qwen"
+    assert 1.0 <= error.value.retry_after <= 20
+    assert not manager.is_ready("qwen")
+
+
+def test_waiter_gives_up_at_its_deadline():
+    manager = ModelWarmupManager(base_delay=60)
+    manager.mark_cold("qwen", still_loading)
+
+    with pytest.raises(ModelWarmingError, match="still warming up"):
+        manager.wait_until_ready("qwen", deadline=time.monotonic() + 0.05, policy="queue")
+
+
+def test_waiter_returns_once_the_probe_answers():
+    answers = iter([False, True])
+    manager = ModelWarmupManager(base_delay=0.01, max_delay=0.02)
+    manager.mark_cold("qwen", lambda: next(answers))
+
+    manager.wait_until_ready("qwen", deadline=time.monotonic() + 2, policy="queue")
+
+    assert manager.is_ready("qwen")
+    assert manager.status()["qwen"]["probes"] == 2
+
+
+def test_probe_error_makes_the_model_unavailable():
+    def bad_key():
+        raise Exception("401 Unauthorized")
+
+    manager = ModelWarmupManager(base_delay=0.01)
+    manager.mark_cold("qwen", bad_key)
+
+    with pytest.raises(ModelWarmingError, match="401 Unauthorized"):
+        manager.wait_until_ready("qwen", deadline=time.monotonic() + 2, policy="queue")
+    assert manager.status()["qwen"]["status"] == "unavailable"
+
+
+def test_concurrent_cold_starts_share_one_probe():
+    calls = []
+    manager = ModelWarmupManager(base_delay=0.05)
+
+    def probe():
+        calls.append(threading.current_thread().name)
+        return True
+
+    for _ in range(5):
+        manager.mark_cold("qwen", probe)
+    manager.wait_until_ready("qwen", deadline=time.monotonic() + 2, policy="queue")
+
+    assert len(calls) == 1
+    assert manager.status()["qwen"]["cold_starts"] == 1
@@ -0,0 +1,59 @@
+from app.helpers.image_hash_cache import ImageHashCache, hamming
+
+P_HASH, D_HASH = 0x8F3C_0A51_77E2_19B4, 0x1234_5678_9ABC_DEF0
+SALE = [{"box": [0.1, 0.1, 0.8, 0.1], "hash": "0" * 64}]
+PHARMACY = [{"box": [0.1, 0.1, 0.8, 0.1], "hash": "f" * 64}]
+
+
+def verdict(summary):
+    return {"image_compliance": {"compliant": summary == "sale", "summary": summary}}
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_same_template_different_text_keeps_both_verdicts():
+    cache = ImageHashCache()
+    cache.put(P_HASH, D_HASH, "v1", SALE, verdict("sale"))
+    cache.put(P_HASH, D_HASH, "v1", PHARMACY, verdict("pharmacy"))
+
+    assert len(cache) == 2
+    assert cache.lookup(P_HASH, D_HASH, "v1", SALE)["verdict"] == verdict("sale")
+    assert cache.lookup(P_HASH, D_HASH, "v1", PHARMACY)["verdict"] == verdict("pharmacy")
+
+
+def test_near_duplicates_hit_within_max_distance_only():
+    cache = ImageHashCache(max_distance=6)
+    cache.put(P_HASH, D_HASH, "v1", SALE, verdict("sale"))
+
+    near = flip(P_HASH, [0, 17, 40, 63])
+    far = flip(P_HASH, range(0, 64, 8))
+    assert hamming(near, P_HASH) == 4 and hamming(far, P_HASH) == 8
+
+    assert cache.lookup(near, D_HASH, "v1", SALE)["distance"] == 4
+    assert cache.lookup(far, D_HASH, "v1", SALE) is None
+    assert cache.lookup(P_HASH, D_HASH, "v2", SALE) is None
+
+
+def test_nothing_written_without_a_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ImageHashCache(save_every=1)
+    cache.put(P_HASH, D_HASH, "v1", SALE, verdict("sale"))
+    cache.save()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_persisted_entries_reload_under_the_same_keys(tmp_path):
+    path = str(tmp_path / "image_verdicts.json")
+    cache = ImageHashCache(path=path)
+    cache.put(P_HASH, D_HASH, "v1", SALE, verdict("sale"))
+    cache.put(P_HASH, D_HASH, "v1", PHARMACY, verdict("pharmacy"))
+    cache.save()
+
+    reloaded = ImageHashCache(path=path)
+    assert len(reloaded) == 2
+    assert reloaded.lookup(P_HASH, D_HASH, "v1", PHARMACY)["verdict"] == verdict("pharmacy")
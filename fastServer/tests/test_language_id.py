@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("langdetect")
+
+from app.helpers.language_id import language_identifier
+
+# Short product ads are where n-gram identifiers go wrong; every one of them must stay on the English route
+ENGLISH = [
+    "Car insurance quote comparison instant",
+    "Protein powder chocolate flavour gym supplement",
+    "Fresh pizza delivered in 30 minutes",
+    "Summer sale on garden furniture",
+    "Dental implants at affordable cost",
+    "Solar panels installation quote",
+    "Croissant bakery café opening soon",
+    "Premium dog food grain free",
+    "Vegan leather handbags",
+    "Buy one get one free on all shoes",
+    "Best running shoes for marathon training",
+    "Limited time offer: 50% off laptops",
+    "Cheap flights to Paris and Rome",
+    "Organic green tea, now $9.99",
+    "Luxury watches at outlet prices",
+    "Home loans with low interest rates",
+    "Online casino bonus, bet now",
+    "Celebrate Diwali with Cadbury chocolates",
+    "Espresso machine with milk frother",
+    "Pasta sauce, tomato basil, family size",
+    "Gourmet chocolate truffles gift box",
+    "Visit Paris this spring, flights from $99",
+    "Ski resort packages, Alps and Dolomites",
+    "Designer sunglasses polarized lenses",
+    "Get fit fast with our 12 week program. Join today and get your first month free, no commitment.",
+    "Our mattresses are made with natural latex and come with a 100 night trial and free delivery.",
+]
+
+OTHER = [
+    ("es", "Compra ahora y obtén envío gratis en todos los pedidos"),
+    ("es", "Las mejores ofertas de verano para toda la familia"),
+    ("es", "Seguro de coche al mejor precio"),
+    ("fr", "Achetez maintenant et profitez de la livraison gratuite"),
+    ("fr", "Les meilleures offres de l'été pour toute la famille"),
+    ("fr", "Assurance auto au meilleur prix"),
+    ("de", "Jetzt kaufen und kostenlose Lieferung erhalten"),
+    ("de", "Die besten Sommerangebote für die ganze Familie"),
+    ("de", "Autoversicherung zum besten Preis"),
+    ("pt", "Compre agora e ganhe frete grátis em todos os pedidos"),
+    ("pt", "As melhores ofertas de verão para toda a família"),
+    ("it", "Acquista ora e ottieni la spedizione gratuita"),
+    ("it", "Le migliori offerte estive per tutta la famiglia"),
+    ("nl", "Koop nu en ontvang gratis verzending op alle bestellingen"),
+    ("id", "Beli sekarang dan dapatkan gratis ongkos kirim untuk semua pesanan"),
+    ("hi", "दिवाली पर मिठाई खरीदें और पाएं पचास प्रतिशत छूट"),
+    ("ar", "اشتر الآن واحصل على شحن مجاني"),
+    ("ru", "Купите сейчас и получите бесплатную доставку"),
+]
+
+
+@pytest.mark.parametrize("text", ENGLISH)
+def test_english_ads_stay_english(text):
+    assert language_identifier.detect(text) == "en"
+
+
+@pytest.mark.parametrize("language, text", OTHER)
+def test_other_languages_leave_english(language, text):
+    assert language_identifier.detect(text) == language
+
+
+def test_same_text_same_answer():
+    text = "Solar panels installation quote"
+    assert len({language_identifier._identify(text.lower()) for _ in range(5)}) == 1
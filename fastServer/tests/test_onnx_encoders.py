@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from app.helpers.onnx_encoders import OnnxTextEncoder
+
+TEXT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+TEXTS = [
+    "Online casino bonus, bet now and win real money",
+    "Buy prescription medication without a doctor's approval",
+    "Fresh chocolate cake delivered to your door",
+    "Ads must not target children with alcohol or tobacco products",
+]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return sentence_transformers.SentenceTransformer(TEXT_MODEL).encode(TEXTS, normalize_embeddings=True)
+
+
+@pytest.mark.parametrize("quantize, min_cosine", [(False, 0.999), (True, 0.98)])
+def test_onnx_minilm_matches_torch(reference, quantize, min_cosine):
+    embeddings = OnnxTextEncoder(TEXT_MODEL, quantize=quantize).encode(TEXTS)
+
+    assert embeddings.shape == reference.shape
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+    cosines = np.sum(embeddings * reference, axis=1)
+    assert cosines.min() >= min_cosine
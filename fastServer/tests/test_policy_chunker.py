@@ -0,0 +1,34 @@
+import os
+
+from app.helpers.policy_chunker import chunk_policy_sections, in_section
+
+POLICY_FILE = os.path.join(os.path.dirname(__file__), "..", "policy.txt")
+
+
+def policy_text():
+    with open(POLICY_FILE, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_in_section_compares_whole_path_segments():
+    assert in_section("media-net-ad-quality-policy/II", "media-net-ad-quality-policy/II")
+    assert in_section("media-net-ad-quality-policy/II/ads-that-promotes-crime-1a1639", "media-net-ad-quality-policy/II")
+    assert not in_section("media-net-ad-quality-policy/II/ads-that-promotes-crime-1a1639", "media-net-ad-quality-policy/I")
+    assert not in_section("media-net-ad-quality-policy/I", "media-net-ad-quality-policy/II")
+
+
+def test_chunk_ids_are_unique():
+    chunk_ids = [chunk["chunk_id"] for chunk in chunk_policy_sections(policy_text())]
+    assert len(chunk_ids) == len(set(chunk_ids))
+
+
+def test_editing_one_item_only_renames_its_own_chunk():
+    text = policy_text()
+    edited = text.replace("Gambling (online and offline)", "Gambling (online, offline and social casinos)")
+    assert edited != text
+
+    before = {chunk["chunk_id"] for chunk in chunk_policy_sections(text)}
+    after = {chunk["chunk_id"] for chunk in chunk_policy_sections(edited)}
+    renamed = before - after
+    assert len(renamed) == 1
+    assert all(in_section(chunk_id, "media-net-ad-quality-policy/II") for chunk_id in renamed)
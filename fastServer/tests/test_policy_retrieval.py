@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.helpers.hybrid_retriever import BM25Index, HybridPolicyRetriever, tokenize
+from app.helpers.policy_vector_index import PolicyVectorIndex
+
+CHUNKS = [
+    {"chunk_id": "policy/II/gambling", "section": "Prohibited", "text": "Gambling (online and offline)"},
+    {"chunk_id": "policy/II/piracy", "section": "Prohibited", "text": "Promoting file-sharing or torrent sites"},
+    {"chunk_id": "policy/I/privacy", "section": "Platform", "text": "Comply with COPPA for children's data"},
+]
+EMBEDDINGS = np.eye(3, dtype=np.float32)
+
+
+def test_vector_index_ranks_best_first():
+    index = PolicyVectorIndex(EMBEDDINGS * 3.0, CHUNKS)
+
+    hits = index.search(np.array([0.2, 1.0, 0.5]), top_k=2)
+
+    assert [hit["chunk_id"] for hit in hits] == ["policy/II/piracy", "policy/I/privacy"]
+    assert hits[0]["score"] == pytest.approx(1.0 / np.linalg.norm([0.2, 1.0, 0.5]))
+
+
+def test_vector_index_round_trips_through_npz(tmp_path):
+    path = str(tmp_path / "vectors.npz")
+    PolicyVectorIndex(EMBEDDINGS, CHUNKS, {"embed_model": "test"}).save_npz(path)
+
+    loaded = PolicyVectorIndex.from_npz(path)
+
+    assert loaded.metadata == {"embed_model": "test"}
+    assert loaded.chunks == CHUNKS
+    assert loaded.search(np.array([0.0, 0.0, 1.0]), top_k=1)[0]["chunk_id"] == "policy/I/privacy"
+
+
+def test_vector_index_rejects_mismatched_dimensions():
+    with pytest.raises(ValueError):
+        PolicyVectorIndex(EMBEDDINGS, CHUNKS[:2])
+    with pytest.raises(ValueError):
+        PolicyVectorIndex(EMBEDDINGS, CHUNKS).search(np.ones(4))
+
+
+def test_bm25_finds_exact_terms_and_skips_stopwords():
+    bm25 = BM25Index([chunk["text"] for chunk in CHUNKS])
+
+    assert tokenize("The torrent sites") == ["torrent", "sites"]
+    assert [doc for doc, _ in bm25.search("COPPA rules", top_k=3)] == [2]
+    assert bm25.search("the and of", top_k=3) == []
+
+
+def test_rrf_puts_agreeing_rankings_first():
+    # Dense ranking: gambling, piracy, privacy; BM25 only matches piracy
+    retriever = HybridPolicyRetriever(PolicyVectorIndex(EMBEDDINGS, CHUNKS),
+                                      lambda queries: np.array([[1.0, 0.9, 0.1]] * len(queries)))
+
+    hits = retriever.search("torrent download", top_k=3)
+
+    assert [hit["chunk_id"] for hit in hits] == ["policy/II/piracy", "policy/II/gambling", "policy/I/privacy"]
+    assert hits[0]["bm25_score"] > 0 and hits[1]["bm25_score"] == 0.0
+    assert hits[0]["score"] == pytest.approx(1 / 62 + 1 / 61)
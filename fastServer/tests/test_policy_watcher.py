@@ -0,0 +1,35 @@
+import hashlib
+import threading
+
+from app.helpers.policy_watcher import PolicyFileWatcher
+
+
+def watch(path, digest):
+    changed = threading.Event()
+    watcher = PolicyFileWatcher(str(path), changed.set, interval=0.02, digest=digest)
+    watcher.start()
+    return watcher, changed
+
+
+def test_edit_before_watcher_start_is_reloaded(tmp_path):
+    policy = tmp_path / "policy.txt"
+    built_from = b"No gambling ads."
+    # Edited after the snapshot was built, before the watcher was created
+    policy.write_bytes(b"No gambling or crypto ads.")
+
+    watcher, changed = watch(policy, hashlib.sha256(built_from).hexdigest())
+    try:
+        assert changed.wait(2)
+    finally:
+        watcher.stop()
+
+
+def test_unchanged_file_is_not_reloaded(tmp_path):
+    policy = tmp_path / "policy.txt"
+    policy.write_bytes(b"No gambling ads.")
+
+    watcher, changed = watch(policy, hashlib.sha256(b"No gambling ads.").hexdigest())
+    try:
+        assert not changed.wait(0.2)
+    finally:
+        watcher.stop()
@@ -0,0 +1,50 @@
+import os
+
+from app.helpers.policy_chunker import chunk_policy_sections
+from app.helpers.rule_engine import rule_engine
+
+POLICY_FILE = os.path.join(os.path.dirname(__file__), "..", "policy.txt")
+
+
+def categories(text):
+    return set(rule_engine.evaluate(text)["categories"])
+
+
+def test_every_rule_section_resolves_in_policy():
+    with open(POLICY_FILE, "r", encoding="utf-8") as f:
+        chunk_ids = [chunk["chunk_id"] for chunk in chunk_policy_sections(f.read())]
+    assert rule_engine.unresolved_sections(chunk_ids) == {}
+
+
+def test_unresolved_sections_compares_whole_segments():
+    chunk_ids = ["media-net-ad-quality-policy/II/ads-that-promotes-crime-1a1639"]
+    assert "gambling" not in rule_engine.unresolved_sections(chunk_ids)
+    assert "gambling" in rule_engine.unresolved_sections(["media-net-ad-quality-policy/I/buyer-s-may-only-purchase-7f55de"])
+
+
+def test_everyday_words_do_not_flag():
+    assert categories("Visit Paris this spring, flights from $99") == set()
+    assert categories("Burr coffee grinder with 40 grind settings") == set()
+    assert "illegal_drugs" in categories("Glass bong and herb grinder bundle")
+
+
+def test_plural_matches_and_counts_once_per_stem():
+    evaluation = rule_engine.evaluate("Download torrents here, every torrent is free")
+    assert evaluation["categories"]["piracy"]["block"] == ["torrent"]
+    assert not evaluation["short_circuit"]
+
+
+def test_two_block_stems_short_circuit_unless_psa():
+    assert rule_engine.evaluate("Cheap cocaine and heroin delivered")["short_circuit"]
+
+    psa = rule_engine.evaluate("Say no to cocaine and heroin, call our helpline")
+    assert not psa["short_circuit"]
+    assert psa["blocking_categories"] == {}
+    assert psa["psa_context"]
+
+
+def test_offsets_index_the_original_text():
+    # "İ".lower() is two code points; folding must not shift the offsets after it
+    text = "İSTANBUL online casino"
+    match = next(m for m in rule_engine.scan(text) if m["term"] == "online casino")
+    assert text[match["start"]:match["end"]] == "online casino"
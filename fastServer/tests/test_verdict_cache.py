@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.helpers.verdict_cache import SemanticVerdictCache
+
+OPENING = "Fresh farm vegetables delivered weekly. " * 40
+COMPLIANT = {"compliant": True, "violations": [], "risk_score": 0.0}
+
+
+def cache_with(text, verdict=COMPLIANT):
+    cache = SemanticVerdictCache(dim=4)
+    cache.put(np.ones(4), text, verdict, "v1", "en")
+    return cache
+
+
+def test_same_template_with_new_price_reuses():
+    cache = cache_with("Organic tea, now $9.99. Free shipping on every order.")
+
+    cached = cache.lookup(np.ones(4), "Organic tea, now $7.49. Free shipping on every order.", "v1", "en")
+
+    assert cached["reuse"]
+    assert cached["verdict"] == COMPLIANT
+
+
+def test_claim_past_the_embedding_window_is_only_a_seed():
+    # Identical embeddings: the model never saw the tail where the texts differ
+    cache = cache_with(OPENING + "Order today.")
+
+    cached = cache.lookup(np.ones(4), OPENING + "Guaranteed to cure diabetes in a week, no doctor needed.", "v1", "en")
+
+    assert cached is not None
+    assert not cached["reuse"]
+
+
+def test_policy_language_and_rules_must_match():
+    cache = cache_with("Organic tea, now $9.99.")
+
+    assert cache.lookup(np.ones(4), "Organic tea, now $9.99.", "v2", "en") is None
+    assert cache.lookup(np.ones(4), "Organic tea, now $9.99.", "v1", "fr") is None
+    assert cache.lookup(np.ones(4), "Organic tea, now $9.99.", "v1", "en", ["miracle"]) is None
+
+
+def test_compliant_verdicts_need_the_safety_margin():
+    cache = cache_with("Organic tea, now $9.99.")
+    # cosine 0.978: above the 0.97 threshold, below threshold + margin
+    query = np.array([1.0, 1.0, 1.0, 1.0]) + np.array([0.3, -0.3, 0.0, 0.0])
+
+    cached = cache.lookup(query, "Organic tea, now $9.99.", "v1", "en")
+
+    assert 0.97 <= cached["similarity"] < 0.985
+    assert not cached["reuse"]
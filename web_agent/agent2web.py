@@ -12,6 +12,7 @@ import google.generativeai as genai
 from playwright.async_api import async_playwright
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential
+import shared_policy
 
 # Make language detection deterministic
 DetectorFactory.seed = 0
@@ -112,6 +113,12 @@ class PolicyComplianceChecker:
                 response_mode="compact"
             )
             logger.info(f"Policy documents loaded and indexed from {self.policy_file}")
+
+            self.vector_index = shared_policy.load_policy_vector_index(
+                self.policy_file, Settings.embed_model, "sentence-transformers/all-MiniLM-L6-v2"
+            )
+            if self.vector_index is not None:
+                logger.info(f"Policy vector index ready: {len(self.vector_index)} chunks")
             
         except Exception as e:
             logger.error(f"Failed to load policy documents: {e}")
@@ -127,6 +134,12 @@ class PolicyComplianceChecker:
             "prohibited content advertising restrictions",
             "target audience compliance guidelines"
         ]
+
+        if getattr(self, 'vector_index', None) is not None:
+            try:
+                return shared_policy.search_policy_context(self.vector_index, Settings.embed_model, queries)
+            except Exception as e:
+                logger.error(f"Policy vector search failed, falling back to query engine: {e}")
         
         sections = []
         for query in queries:
@@ -371,14 +384,10 @@ Focus on: prohibited content, misleading claims, target audience violations."""
         """Check if ad claims are supported by page content"""
         claim_keywords = ["guaranteed", "100%", "instant", "free", "best", "proven", "certified", "risk-free"]
         
-        ad_lower = ad_text.lower()
-        page_lower = page_content.lower()
-        
-        ad_claims = [kw for kw in claim_keywords if kw in ad_lower]
         alignment_issues = []
         
-        for claim in ad_claims:
-            if claim not in page_lower:
+        for claim, supported in shared_policy.ad_claims(ad_text, page_content, claim_keywords):
+            if not supported:
                 alignment_issues.append({
                     "type": "unsupported_claim",
                     "claim": claim,
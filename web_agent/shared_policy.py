@@ -0,0 +1,101 @@
+"""Policy retrieval and rule lexicons shared with fastServer.
+
+The web agent chunks policy.txt with fastServer's section chunker and
+searches it with fastServer's in-process PolicyVectorIndex, so both
+services retrieve the same policy chunks (same IDs, same section paths)
+without an LLM-synthesized query_engine call per search query. Ad claims
+are found with fastServer's rule_engine (landing_page_claims lexicon).
+
+fastServer is found next to this directory, or at FAST_SERVER_DIR. When it
+is not importable, `available` is False, `rule_engine` is None and callers
+keep their llama_index query engine and keyword list.
+"""
+import os
+import sys
+import hashlib
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FAST_SERVER_DIR = os.getenv(
+    'FAST_SERVER_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fastServer')
+)
+if os.path.isdir(FAST_SERVER_DIR) and os.path.abspath(FAST_SERVER_DIR) not in sys.path:
+    sys.path.append(os.path.abspath(FAST_SERVER_DIR))
+
+try:
+    from app.helpers.policy_chunker import chunk_policy_sections, format_chunk_for_prompt, CHUNKER_VERSION
+    from app.helpers.policy_vector_index import PolicyVectorIndex
+    from app.helpers.rule_engine import rule_engine
+    available = True
+except ImportError as e:
+    logger.warning(f"fastServer policy helpers not importable from {FAST_SERVER_DIR}: {e}")
+    rule_engine = None
+    available = False
+
+
+def load_policy_vector_index(policy_file: str, embed_model: Any, model_name: str,
+                             cache_dir: Optional[str] = None) -> Optional["PolicyVectorIndex"]:
+    """Section chunks of policy_file embedded with embed_model (a llama_index embedding).
+
+    With cache_dir the index is saved as an npz keyed by the policy content,
+    model and chunker version, and loaded from there on the next start.
+    """
+    if not available:
+        return None
+
+    with open(policy_file, 'rb') as f:
+        policy_bytes = f.read()
+
+    cache_path = None
+    if cache_dir:
+        hasher = hashlib.sha256(policy_bytes)
+        hasher.update(model_name.encode('utf-8'))
+        hasher.update(CHUNKER_VERSION.encode('utf-8'))
+        cache_path = os.path.join(cache_dir, f"policy_vectors-{hasher.hexdigest()[:16]}.npz")
+        if os.path.exists(cache_path):
+            try:
+                return PolicyVectorIndex.from_npz(cache_path)
+            except Exception as e:
+                logger.warning(f"Cached policy vectors unreadable, rebuilding: {e}")
+
+    chunks = chunk_policy_sections(policy_bytes.decode('utf-8'))
+    if not chunks:
+        return None
+    embeddings = embed_model.get_text_embedding_batch([chunk["text"] for chunk in chunks])
+    vector_index = PolicyVectorIndex(embeddings, chunks, {"embed_model": model_name})
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so a concurrent worker never reads a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        vector_index.save_npz(tmp_path)
+        os.replace(tmp_path, cache_path)
+    return vector_index
+
+
+def ad_claims(ad_text: str, page_content: str, fallback_keywords: List[str]) -> List[tuple]:
+    """(claim, supported on page) for every claim term in the ad, one per stem"""
+    if rule_engine is None:
+        ad_lower, page_lower = ad_text.lower(), page_content.lower()
+        return [(kw, kw in page_lower) for kw in fallback_keywords if kw in ad_lower]
+
+    page_claims = set(rule_engine.distinct_terms(page_content, "landing_page_claims"))
+    return [(claim, claim in page_claims) for claim in rule_engine.distinct_terms(ad_text, "landing_page_claims")]
+
+
+def search_policy_context(vector_index: "PolicyVectorIndex", embed_model: Any, queries: List[str],
+                          top_k: int = 3, max_chars: int = 3000) -> str:
+    """Distinct top-k chunks over all queries, best first, formatted with their section paths"""
+    query_embeddings = [embed_model.get_query_embedding(query) for query in queries]
+    seen, hits = set(), []
+    for results in vector_index.search_batch(query_embeddings, top_k=top_k):
+        for hit in results:
+            if hit["chunk_id"] not in seen:
+                seen.add(hit["chunk_id"])
+                hits.append(hit)
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+
+    combined = "\n\n".join(format_chunk_for_prompt(hit) for hit in hits)
+    return combined[:max_chars]
@@ -15,6 +15,7 @@ import google.generativeai as genai
 from playwright.async_api import async_playwright
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential
+import shared_policy
 import uvicorn
 
 # Suppress warnings
@@ -145,6 +146,15 @@ class PolicyComplianceChecker:
                 logger.error(f"Failed to initialize Gemini: {e}")
 
     def _load_policy_documents(self) -> None:
+        try:
+            self.vector_index = shared_policy.load_policy_vector_index(
+                self.policy_file, Settings.embed_model, "sentence-transformers/all-MiniLM-L6-v2",
+                cache_dir=os.path.join(os.getcwd(), ".cache")
+            )
+        except Exception as e:
+            logger.error(f"Policy vector index unavailable, using query engine: {e}")
+            self.vector_index = None
+
         try:
             # Check if we already have a cached index
             index_cache_path = os.path.join(os.getcwd(), ".cache", "policy_index")
@@ -191,6 +201,12 @@ class PolicyComplianceChecker:
             "prohibited content advertising restrictions",
             "target audience compliance guidelines"
         ]
+
+        if self.vector_index is not None:
+            try:
+                return shared_policy.search_policy_context(self.vector_index, Settings.embed_model, queries)
+            except Exception as e:
+                logger.error(f"Policy vector search failed, falling back to query engine: {e}")
         
         sections = []
         for query in queries:
@@ -392,14 +408,10 @@ Focus on: prohibited content, misleading claims, target audience violations."""
     def check_ad_page_alignment(self, ad_text: str, page_content: str) -> List[Dict[str, str]]:
         claim_keywords = ["guaranteed", "100%", "instant", "free", "best", "proven", "certified", "risk-free"]
         
-        ad_lower = ad_text.lower()
-        page_lower = page_content.lower()
-        
-        ad_claims = [kw for kw in claim_keywords if kw in ad_lower]
         alignment_issues = []
         
-        for claim in ad_claims:
-            if claim not in page_lower:
+        for claim, supported in shared_policy.ad_claims(ad_text, page_content, claim_keywords):
+            if not supported:
                 alignment_issues.append({
                     "type": "unsupported_claim",
                     "claim": claim,